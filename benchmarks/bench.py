@@ -0,0 +1,316 @@
+"""
+Offline benchmark suite for the cqhyxk SDK
+
+Runs against the local stand-in of the OpenAPI in ``mock_server.py``, started
+in a subprocess so that its allocations and CPU time do not count towards the
+client's. Each scenario reports throughput and latency percentiles; with
+``--memory`` it is repeated under ``tracemalloc`` to report the client's peak
+Python memory.
+
+Scenarios:
+
+``paging``     iter_identities in every decode mode, streamed, and get_identity_pages
+``parsing``    JSON decoding and response model construction of one large page with each codec, no network
+``photos``     BulkPhotoDownloader into a temporary FacePhotoStore
+``callbacks``  CallbackReceiver ingesting callbacks over keep-alive connections
+
+Example::
+
+    pip install -e .[stream]    # optional: the script falls back to the checkout
+    python benchmarks/bench.py --identities 100000 --latency 0.005 --memory
+    python benchmarks/bench.py parsing --json before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Run from a checkout without installing: prefer the sources next to this script.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import MockConfig, MockData  # noqa: E402
+
+from cqhyxk import CqhyxkClient
+from cqhyxk.decoding import DECODE_MODES, decode_response
+from cqhyxk.codec import MsgspecCodec, OrjsonCodec
+from cqhyxk.models import IdentityPageResponse
+from cqhyxk.photos import BulkPhotoDownloader, FacePhotoStore
+from cqhyxk.receiver import CallbackReceiver
+from cqhyxk.streaming import ijson
+
+IDENTITY_ENDPOINT = "/open-api/member/identity/page"
+FACE_PHOTOS_ENDPOINT = "/open-api/member/face-photos"
+
+SCENARIOS = ("paging", "parsing", "photos", "callbacks")
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, Optional[float]]:
+    """p50 / p90 / p99 of a list of durations, in milliseconds"""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else None
+        return {"p50_ms": value, "p90_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": cuts[49] * 1000, "p90_ms": cuts[89] * 1000, "p99_ms": cuts[98] * 1000}
+
+
+def client_percentiles(client: CqhyxkClient, endpoint: str) -> Dict[str, Optional[float]]:
+    """Network latency percentiles recorded by the client metrics, in milliseconds"""
+    result = {}
+    for q in (0.5, 0.9, 0.99):
+        value = client.metrics.percentile(endpoint, "network", q)
+        result[f"p{int(q * 100)}_ms"] = value * 1000 if value is not None else None
+    return result
+
+
+def measure(run: Callable[[], Dict[str, Any]], memory: bool) -> Dict[str, Any]:
+    """Run a benchmark case; with ``memory`` run it again under tracemalloc and add its peak"""
+    result = run()
+    if memory:
+        tracemalloc.start()
+        try:
+            run()
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+class MockProcess:
+    """Mock server running in a subprocess"""
+
+    def __init__(self, config: MockConfig):
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_server.py"), "--port", "0"]
+        for name, value in vars(config).items():
+            command += [f"--{name.replace('_', '-')}", str(value)]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        self.url = self.process.stdout.readline().strip()
+        if not self.url:
+            raise RuntimeError("mock server failed to start")
+
+    def close(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+
+
+def bench_paging(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    results = {}
+    modes = [(mode, False) for mode in DECODE_MODES]
+    if ijson is not None:
+        modes += [(mode, True) for mode in DECODE_MODES]
+    for mode, stream in modes:
+        client = CqhyxkClient("bench", "bench", url, decode=mode, pool_maxsize=args.workers)
+
+        def run() -> Dict[str, Any]:
+            started = time.perf_counter()
+            count = sum(1 for _ in client.iter_identities(page_size=args.page_size, stream=stream))
+            elapsed = time.perf_counter() - started
+            return {"records": count, "seconds": elapsed, "records_per_s": count / elapsed}
+
+        result = measure(run, args.memory)
+        result.update(client_percentiles(client, IDENTITY_ENDPOINT))
+        results[f"iter_identities[{mode}{', stream' if stream else ''}]"] = result
+
+    for mode in DECODE_MODES:
+        client = CqhyxkClient("bench", "bench", url, decode=mode, pool_maxsize=args.workers)
+
+        def run() -> Dict[str, Any]:
+            started = time.perf_counter()
+            count = sum(len(page["data"]["content"] if isinstance(page, dict) else page.data.content)
+                        for page in client.get_identity_pages(page_size=args.page_size, max_workers=args.workers))
+            elapsed = time.perf_counter() - started
+            return {"records": count, "seconds": elapsed, "records_per_s": count / elapsed}
+
+        result = measure(run, args.memory)
+        result.update(client_percentiles(client, IDENTITY_ENDPOINT))
+        results[f"get_identity_pages[{mode}, workers={args.workers}]"] = result
+    return results
+
+
+def bench_parsing(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    data = MockData(MockConfig(identities=args.page_size))
+    page = data.identity_page({"current": 0, "size": args.page_size})
+    body = json.dumps({"code": "00000000", "message": "请求成功", "data": page}, ensure_ascii=False).encode("utf-8")
+    results = {}
+    rounds = max(3, args.rounds)
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        json.loads(body)
+        samples.append(time.perf_counter() - started)
+    results["json.loads"] = dict(percentiles(samples), bytes=len(body),
+                                 records_per_s=args.page_size / statistics.median(samples))
+
+    decoded = json.loads(body)
+    for mode in DECODE_MODES:
+        def run() -> Dict[str, Any]:
+            samples = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                decode_response(IdentityPageResponse, decoded, mode)
+                samples.append(time.perf_counter() - started)
+            return dict(percentiles(samples), records_per_s=args.page_size / statistics.median(samples))
+
+        results[f"decode[{mode}]"] = measure(run, args.memory)
+
+    # Body to model in one step, as the clients do with each codec.
+    codecs = [("json", lambda: decode_response(IdentityPageResponse, json.loads(body)))]
+    try:
+        loads = OrjsonCodec().loads
+    except ImportError:
+        pass
+    else:
+        codecs.append(("orjson", lambda: decode_response(IdentityPageResponse, loads(body))))
+    try:
+        schema = MsgspecCodec().schema_decoder(IdentityPageResponse)
+    except ImportError:
+        pass
+    else:
+        codecs.append(("msgspec", lambda: schema(body)))
+    for name, decode in codecs:
+        def run() -> Dict[str, Any]:
+            samples = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                decode()
+                samples.append(time.perf_counter() - started)
+            return dict(percentiles(samples), records_per_s=args.page_size / statistics.median(samples))
+
+        results[f"codec[{name}]"] = measure(run, args.memory)
+    return results
+
+
+def bench_photos(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    client = CqhyxkClient("bench", "bench", url, pool_maxsize=args.workers)
+    user_ids = [f"u{index:08d}" for index in range(min(args.photos, args.identities))]
+
+    def run() -> Dict[str, Any]:
+        with tempfile.TemporaryDirectory() as root:
+            downloader = BulkPhotoDownloader(client, FacePhotoStore(root), max_workers=args.workers)
+            started = time.perf_counter()
+            counts = downloader.download(user_ids)
+            elapsed = time.perf_counter() - started
+        photos = sum(counts.values())
+        return {"photos": photos, "seconds": elapsed, "photos_per_s": photos / elapsed,
+                "mb_per_s": photos * args.photo_bytes / elapsed / 1e6, "statuses": counts}
+
+    result = measure(run, args.memory)
+    result.update(client_percentiles(client, FACE_PHOTOS_ENDPOINT))
+    return {f"BulkPhotoDownloader[workers={args.workers}, {args.photo_bytes} bytes]": result}
+
+
+def _post_callbacks(port: int, count: int, latencies: List[float]) -> None:
+    """Send ``count`` callbacks over one keep-alive connection"""
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("rb")
+        for index in range(count):
+            payload = json.dumps({"eventType": 1, "dataStatus": 2, "dataIds": [f"u{index:08d}"]}).encode()
+            started = time.perf_counter()
+            sock.sendall(b"POST /callback HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\n\r\n%s" % (len(payload), payload))
+            status = reader.readline()
+            while reader.readline() not in (b"\r\n", b""):
+                pass
+            latencies.append(time.perf_counter() - started)
+            if not status.startswith(b"HTTP/1.1 200"):
+                raise RuntimeError(f"callback rejected: {status!r}")
+
+
+def bench_callbacks(args: argparse.Namespace, url: str) -> Dict[str, Any]:
+    connections = args.workers
+    per_connection = max(1, args.callbacks // connections)
+
+    async def scenario() -> Dict[str, Any]:
+        async with CallbackReceiver(host="127.0.0.1", port=0, path="/callback",
+                                    max_queue=args.callbacks + 1) as receiver:
+            latencies: List[float] = []
+            stats = {"batches": 0, "merged_ids": 0}
+
+            async def consume() -> None:
+                # Consume concurrently, as an application would.
+                async for batch in receiver.batches(max_ids=1000, max_wait=0.05):
+                    stats["batches"] += 1
+                    stats["merged_ids"] += sum(len(event.data_ids) for event in batch)
+
+            consumer = asyncio.ensure_future(consume())
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            await asyncio.gather(*[
+                loop.run_in_executor(None, _post_callbacks, receiver.port, per_connection, latencies)
+                for _ in range(connections)
+            ])
+            while receiver.queue.qsize():
+                await asyncio.sleep(0.001)
+            elapsed = time.perf_counter() - started
+            consumer.cancel()
+            total = per_connection * connections
+            return dict(percentiles(latencies), callbacks=total, seconds=elapsed, callbacks_per_s=total / elapsed, **stats)
+
+    return {f"CallbackReceiver[connections={connections}]": measure(lambda: asyncio.run(scenario()), args.memory)}
+
+
+BENCHMARKS = {
+    "paging": bench_paging,
+    "parsing": bench_parsing,
+    "photos": bench_photos,
+    "callbacks": bench_callbacks,
+}
+
+
+def format_value(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.3f}" if value < 100 else f"{value:,.0f}"
+    return str(value)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="cqhyxk offline benchmarks")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--identities", type=int, default=20000, help="identities served by the mock server")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8, help="threads / connections for concurrent cases")
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency per request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra server latency, seconds")
+    parser.add_argument("--photos", type=int, default=500, help="users whose photos are downloaded")
+    parser.add_argument("--photo-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--callbacks", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=20, help="repetitions of the parsing cases")
+    parser.add_argument("--memory", action="store_true", help="also measure peak Python memory (slower)")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON, e.g. to compare two revisions")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    config = MockConfig(identities=args.identities, photo_bytes=args.photo_bytes, latency=args.latency,
+                        jitter=args.jitter, max_page_size=max(args.page_size, MockConfig.max_page_size))
+    server = MockProcess(config)
+    results: Dict[str, Any] = {}
+    try:
+        for name in args.scenarios or SCENARIOS:
+            results[name] = BENCHMARKS[name](args, server.url)
+            print(f"== {name}")
+            for case, metrics in results[name].items():
+                print(f"  {case}")
+                for key, value in metrics.items():
+                    print(f"    {key:<16}{format_value(value)}")
+    finally:
+        server.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fp:
+            json.dump({"arguments": vars(args), "results": results}, fp, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Cold-start import benchmark for the cqhyxk SDK
+
+Each target is imported in a fresh interpreter with ``-X importtime``, so
+nothing is cached between rounds. The report gives the median cumulative
+import time of the target and, for the slowest round, the modules with the
+largest self time, which is where a cold-start regression usually shows up.
+
+Example::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py "from cqhyxk import CqhyxkClient" --rounds 20 --json imports.json
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+#: 默认测量的导入语句
+DEFAULT_TARGETS = (
+    "import cqhyxk",
+    "import cqhyxk.models",
+    "import cqhyxk.receiver",
+    "from cqhyxk import CqhyxkClient",
+    "from cqhyxk import AsyncCqhyxkClient",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(statement: str) -> List[Tuple[str, int, int, int]]:
+    """Run ``statement`` in a fresh interpreter and return ``(module, depth, self_us, cumulative_us)`` per import"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True, check=True)
+    profile = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            profile.append((match.group(4), depth, int(match.group(1)), int(match.group(2))))
+    return profile
+
+
+def statement_profile(profile: List[Tuple[str, int, int, int]]) -> List[Tuple[str, int, int, int]]:
+    """Drop the interpreter start-up imports, which end with the top-level ``site`` entry"""
+    for index, (module, depth, _, _) in enumerate(profile):
+        if module == "site" and depth == 0:
+            return profile[index + 1:]
+    return profile
+
+
+def measure(statement: str, rounds: int, top: int) -> Dict[str, Any]:
+    samples = []
+    slowest: Optional[List[Tuple[str, int, int, int]]] = None
+    for _ in range(rounds):
+        profile = statement_profile(import_profile(statement))
+        samples.append(sum(cumulative for _, depth, _, cumulative in profile if depth == 0))
+        if slowest is None or samples[-1] >= max(samples):
+            slowest = profile
+    heaviest = sorted(slowest or [], key=lambda entry: entry[2], reverse=True)[:top]
+    return {
+        "median_ms": statistics.median(samples) / 1000,
+        "min_ms": min(samples) / 1000,
+        "max_ms": max(samples) / 1000,
+        "modules": len(slowest or []),
+        "heaviest": [{"module": module, "self_ms": self_us / 1000} for module, _, self_us, _ in heaviest],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="cqhyxk cold-start import benchmark")
+    parser.add_argument("targets", nargs="*", metavar="statement",
+                        help="import statements to measure (default: the package, models, receiver and clients)")
+    parser.add_argument("--rounds", type=int, default=10, help="fresh interpreters per statement")
+    parser.add_argument("--top", type=int, default=8, help="modules with the largest self time to list")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON, e.g. to compare two revisions")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    for statement in args.targets or DEFAULT_TARGETS:
+        result = results[statement] = measure(statement, args.rounds, args.top)
+        print(f"== {statement}")
+        print(f"  median {result['median_ms']:.1f} ms  (min {result['min_ms']:.1f}, max {result['max_ms']:.1f}), "
+              f"{result['modules']} modules")
+        for entry in result["heaviest"]:
+            print(f"    {entry['self_ms']:8.2f} ms  {entry['module']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fp:
+            json.dump({"arguments": vars(args), "results": results}, fp, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
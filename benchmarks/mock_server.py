@@ -0,0 +1,360 @@
+"""
+Local stand-in of the 身份中台 OpenAPI v2.4 endpoints for benchmarks
+
+Implements the endpoints of ``docs/cqhyxk_OpenAPI_v2.4.md`` over synthetic,
+deterministic data generated on demand, so millions of identities cost no
+memory. Identity ``i`` is updated at ``BASE_TIME + i`` seconds, which lets
+``updateTimeStart`` / ``updateTimeEnd`` windows be resolved arithmetically.
+
+Run standalone::
+
+    python benchmarks/mock_server.py --identities 1000000 --latency 0.02 --failure-rate 0.01
+
+or in-process with :func:`start`.
+"""
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+SUCCESS_CODE = "00000000"
+BASE_TIME = datetime(2023, 1, 1)
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+JPEG_HEADER = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+
+
+@dataclass
+class MockConfig:
+    """Synthetic data sizes and failure injection of the mock server"""
+    identities: int = 10000
+    orgs: int = 200
+    tags: int = 50
+    tags_per_identity: int = 2
+    photo_bytes: int = 64 * 1024
+    photos_per_identity: int = 1
+    #: Fixed latency added to every response, in seconds
+    latency: float = 0.0
+    #: Random extra latency, uniformly distributed between 0 and this value
+    jitter: float = 0.0
+    #: Fraction of requests answered with 503
+    failure_rate: float = 0.0
+    #: Fraction of requests answered with 429 and ``Retry-After: 0``
+    throttle_rate: float = 0.0
+    #: Largest page size honoured, like a server-side cap
+    max_page_size: int = 1000
+    seed: int = 0
+
+
+def _time(index: int) -> datetime:
+    return BASE_TIME + timedelta(seconds=index)
+
+
+def _index_at(value: Optional[str], default: int) -> int:
+    """First identity index updated at or after a ``yyyy-MM-dd HH:mm:ss`` time"""
+    if not value:
+        return default
+    moment = datetime.strptime(value.replace("T", " ")[:19], TIME_FORMAT)
+    seconds = (moment - BASE_TIME).total_seconds()
+    return max(0, int(seconds) + (seconds != int(seconds)))
+
+
+class MockData:
+    """Deterministic synthetic records"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._photo_cache: Dict[int, str] = {}
+        self._tag_cache: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def org_id(self, index: int) -> str:
+        return f"org{index:05d}"
+
+    def org(self, index: int) -> Dict[str, Any]:
+        parent = (index - 1) // 8 if index else None
+        return {
+            "orgId": self.org_id(index),
+            "orgName": f"组织{index}",
+            "parentOrgId": self.org_id(parent) if parent is not None else None,
+            "orgType": 1000 if index == 0 else (1100 if index % 2 else 1200),
+            "physical": index % 3 != 0,
+            "sourceOrgId": f"s{index:05d}",
+            "sourceParentOrgId": f"s{parent:05d}" if parent is not None else None,
+            "level": 1 if index == 0 else 2,
+            "internal": True,
+            "updateTime": _time(index).isoformat(),
+        }
+
+    def tag(self, index: int) -> Dict[str, Any]:
+        return {
+            "tagId": f"tag{index:04d}",
+            "tagName": f"标签{index}",
+            "tagCode": f"TAG_{index}",
+            "tagType": 1 + index % 2,
+            "sceneId": "scene1",
+            "sceneName": "场景",
+            "status": 1,
+            "entityType": 202,
+            "updateTime": _time(index).isoformat(),
+        }
+
+    def identity(self, index: int) -> Dict[str, Any]:
+        org = self.org(1 + index % max(1, self.config.orgs - 1))
+        main_org = {key: org[key] for key in ("orgId", "orgName", "orgType", "sourceOrgId")}
+        return {
+            "sourceUserId": f"u{index:08d}",
+            "status": 1 + index % 4,
+            "name": f"姓名{index}",
+            "gender": 1 + index % 2,
+            "idCardType": 1,
+            "idCardNum": f"{110101199001010000 + index}",
+            "mobile": f"138{index:08d}",
+            "nation": 1 + index % 56,
+            "nativePlace": f"籍贯{index % 34}",
+            "politicalStatus": 1 + index % 13,
+            "orgList": [dict(main_org, associationSourceOrgId=None)],
+            "mainOrg": main_org,
+            "entityType": (202, 203, 204)[index % 3],
+            "dataMap": {"grade": str(2020 + index % 4), "major": f"专业{index % 40}"},
+            "updateTime": _time(index).isoformat(),
+        }
+
+    def member_tag(self, index: int) -> Dict[str, Any]:
+        per = self.config.tags_per_identity
+        identity, slot = divmod(index, per)
+        tag = (identity + slot) % self.config.tags
+        return {
+            "sourceUserId": f"u{identity:08d}",
+            "name": f"姓名{identity}",
+            "tagId": f"tag{tag:04d}",
+            "tagName": f"标签{tag}",
+            "tagCode": f"TAG_{tag}",
+        }
+
+    def photo(self, variant: int) -> str:
+        with self._lock:
+            encoded = self._photo_cache.get(variant)
+            if encoded is None:
+                size = self.config.photo_bytes
+                body = random.Random(variant).getrandbits(8 * max(0, size - len(JPEG_HEADER))).to_bytes(
+                    max(0, size - len(JPEG_HEADER)), "little")
+                encoded = self._photo_cache[variant] = base64.b64encode(JPEG_HEADER + body).decode("ascii")
+            return encoded
+
+    def identity_page(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        count = self.config.identities
+        start = min(count, _index_at(body.get("updateTimeStart"), 0))
+        end = max(start, min(count, _index_at(body.get("updateTimeEnd"), count)))
+        indices: Sequence[int] = range(start, end)
+        if body.get("sourceUserId"):
+            index = self._user_index(body["sourceUserId"])
+            indices = [index] if index is not None and start <= index < end else []
+        return self._page(body, indices, self.identity)
+
+    def member_tag_page(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        per = self.config.tags_per_identity
+        indices: Sequence[int] = range(self.config.identities * per)
+        if body.get("sourceUserId"):
+            index = self._user_index(body["sourceUserId"])
+            indices = range(index * per, (index + 1) * per) if index is not None else []
+        if body.get("tagId"):
+            if body.get("sourceUserId"):
+                indices = [index for index in indices if self.member_tag(index)["tagId"] == body["tagId"]]
+            else:
+                indices = self._tag_members(body["tagId"])
+        return self._page(body, indices, self.member_tag)
+
+    def _tag_members(self, tag_id: str) -> List[int]:
+        """Membership indices of a tag, in order"""
+        with self._lock:
+            members = self._tag_cache.get(tag_id)
+        if members is None:
+            try:
+                tag = int(tag_id[3:])
+            except ValueError:
+                tag = -1
+            per, tags = self.config.tags_per_identity, self.config.tags
+            members = []
+            if 0 <= tag < tags:
+                # Identity i holds tag (i + slot) % tags in each slot.
+                members = sorted(
+                    identity * per + slot
+                    for slot in range(per)
+                    for identity in range((tag - slot) % tags, self.config.identities, tags)
+                )
+            with self._lock:
+                self._tag_cache[tag_id] = members
+        return members
+
+    def _page(self, body: Dict[str, Any], indices: Sequence[int], make) -> Dict[str, Any]:
+        current = int(body.get("current") or 0)
+        size = min(int(body.get("size") or 10), self.config.max_page_size)
+        content = [make(index) for index in indices[current * size:(current + 1) * size]]
+        # Documented response shape: the counts sit under data.page.
+        return {"page": {"total": len(indices), "size": size}, "content": content, "empty": not content}
+
+    def _user_index(self, source_user_id: str) -> Optional[int]:
+        try:
+            index = int(source_user_id.lstrip("u"))
+        except ValueError:
+            return None
+        return index if 0 <= index < self.config.identities else None
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # One buffered write per response avoids Nagle / delayed-ACK stalls on keep-alive connections.
+    wbufsize = 1 << 16
+
+    server: "MockServer"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, payload: Optional[bytes] = None, headers: Tuple[Tuple[str, str], ...] = ()) -> None:
+        payload = payload or b""
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.wfile.flush()
+
+    def _send(self, data: Any) -> None:
+        payload = json.dumps({"code": SUCCESS_CODE, "message": "请求成功", "data": data}, ensure_ascii=False)
+        self._reply(200, payload.encode("utf-8"))
+
+    def _inject(self) -> bool:
+        """Apply latency and failures; return True if the request was answered with an error"""
+        config = self.server.config
+        rng = self.server.rng
+        with self.server.lock:
+            self.server.requests += 1
+            roll = rng.random()
+            extra = rng.random() * config.jitter
+        if config.latency or extra:
+            time.sleep(config.latency + extra)
+        if roll < config.failure_rate:
+            self._reply(503)
+            return True
+        if roll < config.failure_rate + config.throttle_rate:
+            self._reply(429, headers=(("Retry-After", "0"),))
+            return True
+        if not self.headers.get("app-key") or not self.headers.get("app-secret"):
+            self._reply(401)
+            return True
+        return False
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if self._inject():
+            return
+        data = self.server.data
+        config = self.server.config
+        if url.path.endswith("/open-api/org/list"):
+            orgs = (data.org(index) for index in range(config.orgs))
+            if "orgId" in query:
+                orgs = (org for org in orgs if org["orgId"] == query["orgId"])
+            if "physical" in query:
+                orgs = (org for org in orgs if str(org["physical"]).lower() == query["physical"].lower())
+            self._send({"content": list(orgs)})
+        elif url.path.endswith("/open-api/tag/list"):
+            tags = [data.tag(index) for index in range(config.tags)]
+            if "tagId" in query:
+                tags = [tag for tag in tags if tag["tagId"] == query["tagId"]]
+            self._send({"content": tags})
+        elif url.path.endswith("/open-api/member/face-photos"):
+            index = data._user_index(query.get("sourceUserId", ""))
+            photos = [] if index is None else [
+                {"faceType": 1 + n % 3, "faceFactory": 1, "faceId": f"face-{index}-{n}", "imageBase64": data.photo(index % 16)}
+                for n in range(config.photos_per_identity)
+            ]
+            self._send({"content": photos})
+        else:
+            self._reply(404)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self._inject():
+            return
+        data = self.server.data
+        if self.path.endswith("/open-api/member/identity/page"):
+            self._send(data.identity_page(body))
+        elif self.path.endswith("/open-api/tag/member-tags/page"):
+            self._send(data.member_tag_page(body))
+        elif self.path.endswith("/open-api/subscription/add"):
+            self._send({"result": "success"})
+        elif self.path.endswith("/open-api/subscription/cancel"):
+            self._send({})
+        else:
+            self._reply(404)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.data = MockData(config)
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        #: Number of requests received
+        self.requests = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start(config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0,
+          poll_interval: float = 0.5) -> MockServer:
+    """
+    Start a mock server on a background thread; stop it with ``server.shutdown()``,
+    which returns within ``poll_interval`` seconds.
+    """
+    server = MockServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, args=(poll_interval,), name="cqhyxk-mock-server", daemon=True).start()
+    return server
+
+
+def parse_args(argv: Optional[List[str]] = None) -> Tuple[MockConfig, argparse.Namespace]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    defaults = MockConfig()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+    config = MockConfig(**{name: getattr(args, name) for name in vars(defaults)})
+    return config, args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    config, args = parse_args(argv)
+    server = MockServer((args.host, args.port), config)
+    # The first line tells a parent process where to connect.
+    print(server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,37 @@ cqhyxk SDK - Python client for the 身份中台V2.0 OpenAPI
 This package provides a comprehensive client for interacting with the 
 Identity Management Platform (身份中台) V2.0 API, including personnel, 
 organization, tag, and event subscription functionality.
+
+The clients are imported on first access, so ``import cqhyxk`` and imports of
+light submodules such as ``cqhyxk.receiver`` do not load requests, httpx or
+the client machinery.
 """
+import importlib
+from typing import TYPE_CHECKING
 
-from .client import CqhyxkClient
+if TYPE_CHECKING:
+    from .client import CqhyxkClient
+    from .async_client import AsyncCqhyxkClient
 
 __version__ = "1.0.0"
 __author__ = "Qwen Code"
-__all__ = ["CqhyxkClient"]
\ No newline at end of file
+__all__ = ["CqhyxkClient", "AsyncCqhyxkClient"]
+
+#: 延迟导入的公开名称及其所在模块
+_LAZY_ATTRIBUTES = {
+    "CqhyxkClient": ".client",
+    "AsyncCqhyxkClient": ".async_client",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,348 @@
+"""
+Asyncio API client for cqhyxk SDK
+"""
+import asyncio
+import json
+import time
+from functools import partial
+from typing import TYPE_CHECKING, Optional, Dict, Any, AsyncIterator
+import os
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from .models import (
+    IdentityPageRequest, IdentityPageResponse,
+    FacePhotosResponse, OrgListResponse,
+    TagListResponse, MemberTagPageRequest,
+    MemberTagPageResponse, SubscriptionRequest,
+    SubscriptionResponse, CommonResponse,
+    IdentityInfo, MemberTagInfo
+)
+from .exceptions import AuthenticationError, APIError, RequestError
+from .env import load_env
+from .pagination import (
+    DEFAULT_PAGE_SIZE, DEFAULT_MAX_WORKERS, prepare_scan_request, aiter_page_items, afan_out_pages,
+    identity_key, member_tag_key
+)
+from .decoding import DECODE_MODEL, DECODE_RAW, check_decode_mode, decode_response
+from .metrics import (
+    MetricsSink, InMemoryMetrics, error_label,
+    METRIC_REQUESTS, METRIC_RETRIES, METRIC_ERRORS, METRIC_RESPONSE_BYTES, METRIC_NETWORK, METRIC_MODEL,
+    METRIC_COALESCED
+)
+from .retry import RetryPolicy, AdaptiveRateLimiter
+from .timeouts import Timeout, DEFAULT_TIMEOUT
+from .transport import build_request, read_response, retry_delay
+
+# As in the sync client, the codecs and coalescing are imported by the code paths using them.
+if TYPE_CHECKING:
+    from .codec import JsonCodec, SchemaDecoder
+
+#: 默认连接池最大连接数
+DEFAULT_MAX_CONNECTIONS = 100
+#: 默认空闲连接保持时间（秒）
+DEFAULT_KEEPALIVE_EXPIRY = 5.0
+
+
+def _httpx_timeout(timeout: Timeout) -> "httpx.Timeout":
+    """Convert a requests-style timeout (seconds or ``(connect, read)``) to ``httpx.Timeout``"""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class AsyncCqhyxkClient:
+    """
+    身份中台V2.0 OpenAPI Asyncio Client
+
+    Asyncio counterpart of :class:`~cqhyxk.client.CqhyxkClient` built on ``httpx``.
+    It exposes the same methods as coroutines, returns the same response models and
+    raises the same exceptions. All requests share one connection pool, so many
+    calls can run concurrently in one event loop.
+
+    Requires the ``async`` extra: ``pip install cqhyxk[async]``.
+
+    Example::
+
+        async with AsyncCqhyxkClient() as client:
+            response = await client.get_org_list()
+    """
+
+    def __init__(self, app_key: Optional[str] = None, app_secret: Optional[str] = None, base_url: Optional[str] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS, max_keepalive_connections: Optional[int] = None,
+                 decode: str = DECODE_MODEL, retry: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[AdaptiveRateLimiter] = None, timeout: Timeout = DEFAULT_TIMEOUT,
+                 endpoint_timeouts: Optional[Dict[str, Timeout]] = None,
+                 keepalive_expiry: Optional[float] = DEFAULT_KEEPALIVE_EXPIRY, metrics: Optional[MetricsSink] = None,
+                 coalesce: bool = False, codec: Optional['JsonCodec'] = None):
+        """
+        Initialize the client with app credentials.
+
+        Args:
+            app_key (Optional[str]): Application key for authentication.
+                If not provided, will be loaded from CQHYXK_APP_KEY environment variable.
+            app_secret (Optional[str]): Application secret for authentication.
+                If not provided, will be loaded from CQHYXK_APP_SECRET environment variable.
+            base_url (Optional[str]): Base URL for the API.
+                If not provided, will be loaded from CQHYXK_BASEURL environment variable.
+            max_connections (int): Maximum number of connections in the shared pool.
+            max_keepalive_connections (Optional[int]): Maximum number of idle keep-alive connections,
+                defaults to max_connections.
+            decode (str): Default decode mode of query responses (``model``, ``construct`` or ``raw``),
+                see :mod:`cqhyxk.decoding`.
+            retry (Optional[RetryPolicy]): Retry idempotent calls that fail with a transient
+                error. Disabled if not provided.
+            rate_limiter (Optional[AdaptiveRateLimiter]): Client-side rate limit, shared by all
+                tasks using this client. Disabled if not provided.
+            timeout (Timeout): Default timeout of each request in seconds, either one number or a
+                ``(connect, read)`` tuple; None waits forever.
+            endpoint_timeouts (Optional[Dict[str, Timeout]]): Timeouts overriding ``timeout`` per endpoint path.
+            keepalive_expiry (Optional[float]): Seconds an idle connection is kept alive.
+            metrics (Optional[MetricsSink]): Receiver of per-endpoint request metrics, defaults to a new
+                :class:`~cqhyxk.metrics.InMemoryMetrics`.
+            coalesce (bool): Let identical idempotent calls made concurrently by several tasks
+                share one upstream request instead of each sending its own. Because the callers
+                share the response data, the codec's schema decoder is not used for any call of
+                a coalescing client; responses take the generic decode path.
+            codec (Optional[JsonCodec]): JSON codec of request and response bodies, see :mod:`cqhyxk.codec`.
+
+        For an overall deadline over several calls, wrap them in ``asyncio.wait_for``.
+        """
+        if httpx is None:
+            raise ImportError("AsyncCqhyxkClient requires httpx. Install it with: pip install cqhyxk[async]")
+
+        # Use provided values or load from environment variables
+        if not (app_key and app_secret and base_url):
+            load_env()
+        self.app_key = app_key or os.getenv('CQHYXK_APP_KEY')
+        self.app_secret = app_secret or os.getenv('CQHYXK_APP_SECRET')
+        self.base_url = base_url or os.getenv('CQHYXK_BASEURL', 'https://your-domain/backend/school-platform/openapi')
+
+        if not self.app_key:
+            raise ValueError("app_key is required. Either pass it as parameter or set CQHYXK_APP_KEY environment variable.")
+        if not self.app_secret:
+            raise ValueError("app_secret is required. Either pass it as parameter or set CQHYXK_APP_SECRET environment variable.")
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections if max_keepalive_connections is not None else max_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.session = httpx.AsyncClient(
+            headers={
+                "Content-Type": "application/json",
+                "app-key": self.app_key,
+                "app-secret": self.app_secret
+            },
+            limits=limits,
+            timeout=_httpx_timeout(timeout)
+        )
+        self.endpoint_timeouts = {endpoint: _httpx_timeout(value) for endpoint, value in (endpoint_timeouts or {}).items()}
+        self.decode = check_decode_mode(decode)
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics if metrics is not None else InMemoryMetrics()
+        self.singleflight = None
+        if coalesce:
+            from .singleflight import AsyncSingleFlight
+            self.singleflight = AsyncSingleFlight()
+        if codec is None:
+            from .codec import JsonCodec
+            codec = JsonCodec()
+        self.codec = codec
+
+    async def __aenter__(self) -> "AsyncCqhyxkClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool"""
+        await self.session.aclose()
+
+    async def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None, json_data: Optional[Dict] = None,
+                            idempotent: Optional[bool] = None, schema: Optional['SchemaDecoder'] = None) -> Any:
+        """
+        Make an HTTP request to the API.
+
+        See :meth:`CqhyxkClient._make_request <cqhyxk.client.CqhyxkClient._make_request>`.
+        """
+        if idempotent is None:
+            idempotent = method == 'GET'
+        if self.singleflight is None or not idempotent:
+            return await self._send_request(method, endpoint, params, json_data, idempotent, schema)
+
+        from .singleflight import request_key
+
+        # Identical calls already in flight share its response data; each caller builds its own model.
+        key = request_key(method, endpoint, params, json_data)
+        result, shared = await self.singleflight.do(
+            key, lambda: self._send_request(method, endpoint, params, json_data, idempotent))
+        if shared:
+            self.metrics.increment(endpoint, METRIC_COALESCED)
+        return result
+
+    async def _send_request(self, method: str, endpoint: str, params: Optional[Dict], json_data: Optional[Dict],
+                            idempotent: bool, schema: Optional['SchemaDecoder'] = None) -> Any:
+        """Send a request, retrying it according to the retry policy"""
+        url, body = build_request(self.base_url, endpoint, json_data, self.codec)
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                wait = self.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self.metrics.increment(endpoint, METRIC_REQUESTS)
+            started = time.perf_counter()
+            try:
+                response = await self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    content=body,
+                    timeout=self.endpoint_timeouts.get(endpoint, httpx.USE_CLIENT_DEFAULT)
+                )
+
+                self.metrics.observe(endpoint, METRIC_NETWORK, time.perf_counter() - started)
+                self.metrics.increment(endpoint, METRIC_RESPONSE_BYTES, len(response.content))
+                result = read_response(response, endpoint, self.codec, self.metrics, schema)
+
+            except AuthenticationError:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label="http_401")
+                raise
+            except httpx.HTTPError as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise RequestError(f"Request failed: {str(e)}")
+            except json.JSONDecodeError as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                raise RequestError(f"Failed to decode JSON response: {str(e)}")
+            except APIError as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_success()
+                return result
+            self.metrics.increment(endpoint, METRIC_RETRIES)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+        """See :meth:`CqhyxkClient._retry_delay <cqhyxk.client.CqhyxkClient._retry_delay>`"""
+        response = error.response if isinstance(error, httpx.HTTPStatusError) else None
+        transport_error = isinstance(error, httpx.TransportError)
+        return retry_delay(error, attempt, idempotent, self.retry, self.rate_limiter, response, transport_error)
+
+    def _schema(self, model_class: type, decode: Optional[str] = None) -> Optional['SchemaDecoder']:
+        """See :meth:`CqhyxkClient._schema <cqhyxk.client.CqhyxkClient._schema>`"""
+        if (decode or self.decode) == DECODE_RAW or self.singleflight is not None:
+            return None
+        return self.codec.schema_decoder(model_class)
+
+    def _decode(self, endpoint: str, model_class: type, data: Any, decode: Optional[str] = None) -> Any:
+        """Build a response in the per-call decode mode, or the client default, timing it under ``endpoint``"""
+        if isinstance(data, model_class):
+            # Already built by the codec's schema decoder.
+            return data
+        started = time.perf_counter()
+        result = decode_response(model_class, data, decode or self.decode)
+        self.metrics.observe(endpoint, METRIC_MODEL, time.perf_counter() - started)
+        return result
+
+    async def _get(self, endpoint: str, params: Optional[Dict] = None, schema: Optional['SchemaDecoder'] = None) -> Any:
+        """Helper method for GET requests"""
+        return await self._make_request('GET', endpoint, params=params, schema=schema)
+
+    async def _post(self, endpoint: str, json_data: Optional[Dict] = None, idempotent: bool = False,
+                    schema: Optional['SchemaDecoder'] = None) -> Any:
+        """Helper method for POST requests; only idempotent ones (queries) are retried"""
+        return await self._make_request('POST', endpoint, json_data=json_data, idempotent=idempotent, schema=schema)
+
+    async def get_identity_list(self, request: IdentityPageRequest, decode: Optional[str] = None) -> IdentityPageResponse:
+        """人员身份信息分页列表，参见 :meth:`CqhyxkClient.get_identity_list <cqhyxk.client.CqhyxkClient.get_identity_list>`"""
+        response_data = await self._post("/open-api/member/identity/page", json_data=request.dict(exclude_none=True), idempotent=True,
+                                         schema=self._schema(IdentityPageResponse, decode))
+        return self._decode("/open-api/member/identity/page", IdentityPageResponse, response_data, decode)
+
+    async def get_face_photos(self, source_user_id: str, decode: Optional[str] = None) -> FacePhotosResponse:
+        """根据学工号获取人脸照片，参见 :meth:`CqhyxkClient.get_face_photos <cqhyxk.client.CqhyxkClient.get_face_photos>`"""
+        params = {"sourceUserId": source_user_id}
+        response_data = await self._get("/open-api/member/face-photos", params=params,
+                                        schema=self._schema(FacePhotosResponse, decode))
+        return self._decode("/open-api/member/face-photos", FacePhotosResponse, response_data, decode)
+
+    async def get_org_list(self, physical: Optional[str] = None, internal: Optional[str] = None, org_id: Optional[str] = None,
+                           decode: Optional[str] = None) -> OrgListResponse:
+        """组织列表，参见 :meth:`CqhyxkClient.get_org_list <cqhyxk.client.CqhyxkClient.get_org_list>`"""
+        params = {}
+        if physical is not None:
+            params['physical'] = physical
+        if internal is not None:
+            params['internal'] = internal
+        if org_id is not None:
+            params['orgId'] = org_id
+
+        response_data = await self._get("/open-api/org/list", params=params)
+        return self._decode("/open-api/org/list", OrgListResponse, response_data, decode)
+
+    async def get_tag_list(self, tag_id: Optional[str] = None, decode: Optional[str] = None) -> TagListResponse:
+        """标签列表，参见 :meth:`CqhyxkClient.get_tag_list <cqhyxk.client.CqhyxkClient.get_tag_list>`"""
+        params = {}
+        if tag_id is not None:
+            params['tagId'] = tag_id
+
+        response_data = await self._get("/open-api/tag/list", params=params)
+        return self._decode("/open-api/tag/list", TagListResponse, response_data, decode)
+
+    async def get_member_tags_page(self, request: MemberTagPageRequest, decode: Optional[str] = None) -> MemberTagPageResponse:
+        """人员标签关系分页列表，参见 :meth:`CqhyxkClient.get_member_tags_page <cqhyxk.client.CqhyxkClient.get_member_tags_page>`"""
+        response_data = await self._post("/open-api/tag/member-tags/page", json_data=request.dict(exclude_none=True), idempotent=True,
+                                         schema=self._schema(MemberTagPageResponse, decode))
+        return self._decode("/open-api/tag/member-tags/page", MemberTagPageResponse, response_data, decode)
+
+    def iter_identities(self, request: Optional[IdentityPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                        decode: Optional[str] = None) -> AsyncIterator[IdentityInfo]:
+        """遍历全部人员身份信息，参见 :meth:`CqhyxkClient.iter_identities <cqhyxk.client.CqhyxkClient.iter_identities>`"""
+        request = prepare_scan_request(request, IdentityPageRequest, page_size)
+        return aiter_page_items(partial(self.get_identity_list, decode=decode), request, key=identity_key)
+
+    def iter_member_tags(self, request: Optional[MemberTagPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                         decode: Optional[str] = None) -> AsyncIterator[MemberTagInfo]:
+        """遍历全部人员标签关系，参见 :meth:`CqhyxkClient.iter_member_tags <cqhyxk.client.CqhyxkClient.iter_member_tags>`"""
+        request = prepare_scan_request(request, MemberTagPageRequest, page_size)
+        return aiter_page_items(partial(self.get_member_tags_page, decode=decode), request, key=member_tag_key)
+
+    def get_identity_pages(self, request: Optional[IdentityPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                           max_workers: int = DEFAULT_MAX_WORKERS, ordered: bool = True,
+                           decode: Optional[str] = None) -> AsyncIterator[IdentityPageResponse]:
+        """并发获取全部人员身份信息分页，max_workers 为最大并发任务数，参见 :meth:`CqhyxkClient.get_identity_pages <cqhyxk.client.CqhyxkClient.get_identity_pages>`"""
+        request = prepare_scan_request(request, IdentityPageRequest, page_size)
+        return afan_out_pages(partial(self.get_identity_list, decode=decode), request, max_concurrency=max_workers, ordered=ordered)
+
+    def get_member_tags_pages(self, request: Optional[MemberTagPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                              max_workers: int = DEFAULT_MAX_WORKERS, ordered: bool = True,
+                              decode: Optional[str] = None) -> AsyncIterator[MemberTagPageResponse]:
+        """并发获取全部人员标签关系分页，max_workers 为最大并发任务数，参见 :meth:`CqhyxkClient.get_member_tags_pages <cqhyxk.client.CqhyxkClient.get_member_tags_pages>`"""
+        request = prepare_scan_request(request, MemberTagPageRequest, page_size)
+        return afan_out_pages(partial(self.get_member_tags_page, decode=decode), request, max_concurrency=max_workers, ordered=ordered)
+
+    async def add_subscription(self, request: SubscriptionRequest) -> SubscriptionResponse:
+        """事件订阅，参见 :meth:`CqhyxkClient.add_subscription <cqhyxk.client.CqhyxkClient.add_subscription>`"""
+        response_data = await self._post("/open-api/subscription/add", json_data=request.dict(exclude_none=True))
+        return SubscriptionResponse(**response_data)
+
+    async def cancel_subscription(self, event_type: int) -> CommonResponse:
+        """取消事件订阅，参见 :meth:`CqhyxkClient.cancel_subscription <cqhyxk.client.CqhyxkClient.cancel_subscription>`"""
+        request_data = {"eventType": event_type}
+        response_data = await self._post("/open-api/subscription/cancel", json_data=request_data)
+        return CommonResponse(**response_data)
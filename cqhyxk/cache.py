@@ -0,0 +1,217 @@
+"""
+Response cache for cqhyxk SDK
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .models import CallbackRequest, EventType
+
+ORG_LIST_ENDPOINT = "/open-api/org/list"
+TAG_LIST_ENDPOINT = "/open-api/tag/list"
+
+#: 默认缓存的接口及其 TTL（秒）
+DEFAULT_ENDPOINT_TTLS = {
+    ORG_LIST_ENDPOINT: 300.0,
+    TAG_LIST_ENDPOINT: 300.0,
+}
+
+#: 变动事件影响的接口，以及接口中用于筛选该事件数据 id 的参数
+EVENT_ENDPOINTS = {
+    EventType.ORGANIZATION: (ORG_LIST_ENDPOINT, "orgId"),
+    EventType.TAG: (TAG_LIST_ENDPOINT, "tagId"),
+}
+
+
+def make_cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Hashable]:
+    """Build a cache key from an endpoint and its query parameters"""
+    return endpoint, tuple(sorted((params or {}).items()))
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until")
+
+    def __init__(self, value: Any, expires_at: float, stale_until: float):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL cache for GET responses of slowly changing reference endpoints.
+
+    Only endpoints listed in ``endpoint_ttls`` are cached. Entries are fresh for
+    their TTL; for ``stale_while_revalidate`` seconds after that the stale value
+    is still returned while one background thread refreshes it. Older entries are
+    fetched synchronously. At most ``maxsize`` entries are kept, least recently
+    used first out. A fetch that was in flight while its entry was invalidated
+    is returned to its caller but not stored.
+
+    Example::
+
+        cache = ResponseCache()
+        client = CqhyxkClient(cache=cache)
+        client.get_org_list()                  # network
+        client.get_org_list()                  # cache
+        cache.invalidate_event(callback)       # on an org or tag change event
+    """
+
+    def __init__(self, endpoint_ttls: Optional[Dict[str, float]] = None, maxsize: int = 256,
+                 stale_while_revalidate: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            endpoint_ttls (Optional[Dict[str, float]]): TTL in seconds per endpoint,
+                defaults to DEFAULT_ENDPOINT_TTLS
+            maxsize (int): Maximum number of cached responses
+            stale_while_revalidate (float): Seconds a stale entry may be served while refreshing
+            clock (Callable[[], float]): Monotonic clock, replaceable for testing
+        """
+        self.endpoint_ttls = dict(DEFAULT_ENDPOINT_TTLS if endpoint_ttls is None else endpoint_ttls)
+        self.maxsize = maxsize
+        self.stale_while_revalidate = stale_while_revalidate
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Hashable], _Entry]" = OrderedDict()
+        self._refreshing = set()
+        # Fetches in flight per key, and the invalidation generation they started in.
+        self._fetching: Dict[Tuple[str, Hashable], int] = {}
+        self._generations: Dict[Tuple[str, Hashable], int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def handles(self, endpoint: str) -> bool:
+        """Return whether responses of an endpoint are cached"""
+        return endpoint in self.endpoint_ttls
+
+    def get_or_fetch(self, endpoint: str, params: Optional[Dict[str, Any]], fetch: Callable[[], Any],
+                     refresh: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Return the cached response of a request, fetching it when missing or expired.
+
+        Args:
+            endpoint (str): API endpoint
+            params (Optional[Dict[str, Any]]): Query parameters
+            fetch (Callable[[], Any]): Function performing the request for this caller
+            refresh (Optional[Callable[[], Any]]): Function performing the background refresh
+                of a stale entry, which outlives the caller; defaults to ``fetch``
+        """
+        key = make_cache_key(endpoint, params)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now < entry.expires_at:
+                    return entry.value
+                if now < entry.stale_until:
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        generation = self._begin_fetch(key)
+                        threading.Thread(target=self._refresh, args=(key, refresh or fetch, generation), daemon=True).start()
+                    return entry.value
+            generation = self._begin_fetch(key)
+        value = None
+        try:
+            value = fetch()
+        finally:
+            self._end_fetch(key, generation, value)
+        return value
+
+    def _refresh(self, key: Tuple[str, Hashable], fetch: Callable[[], Any], generation: int) -> None:
+        value = None
+        try:
+            value = fetch()
+        except Exception:
+            # Keep serving the stale entry; the next expired read fetches synchronously.
+            pass
+        finally:
+            self._end_fetch(key, generation, value)
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _begin_fetch(self, key: Tuple[str, Hashable]) -> int:
+        """Register a fetch of ``key`` and return its generation; called with the lock held"""
+        self._fetching[key] = self._fetching.get(key, 0) + 1
+        return self._generations.setdefault(key, 0)
+
+    def _end_fetch(self, key: Tuple[str, Hashable], generation: int, value: Any) -> None:
+        """Store a fetched value (None if the fetch failed) unless the key was invalidated meanwhile"""
+        ttl = self.endpoint_ttls.get(key[0], 0.0)
+        now = self._clock()
+        with self._lock:
+            current = self._generations.get(key, 0)
+            remaining = self._fetching[key] - 1
+            if remaining:
+                self._fetching[key] = remaining
+            else:
+                del self._fetching[key]
+                del self._generations[key]
+            if value is None or generation != current:
+                return
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + self.stale_while_revalidate)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, endpoint: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Evict cached responses.
+
+        Args:
+            endpoint (Optional[str]): Evict only this endpoint; all endpoints if None
+            params (Optional[Dict[str, Any]]): Evict only the entry with exactly these parameters
+
+        Returns:
+            int: Number of evicted entries
+        """
+        with self._lock:
+            if endpoint is not None and params is not None:
+                key = make_cache_key(endpoint, params)
+                self._bump(key)
+                return 1 if self._entries.pop(key, None) is not None else 0
+            for key in self._fetching:
+                if endpoint is None or key[0] == endpoint:
+                    self._bump(key)
+            keys = [key for key in self._entries if endpoint is None or key[0] == endpoint]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def _bump(self, key: Tuple[str, Hashable]) -> None:
+        """Keep the fetches of ``key`` in flight from storing their now stale values; called with the lock held"""
+        if key in self._generations:
+            self._generations[key] += 1
+
+    def invalidate_event(self, event: CallbackRequest) -> int:
+        """
+        Evict the entries affected by a subscription callback event.
+
+        An organization or tag change evicts every unfiltered list of that kind,
+        plus the lists filtered by one of the changed ``dataIds``.
+
+        Returns:
+            int: Number of evicted entries
+        """
+        target = EVENT_ENDPOINTS.get(event.event_type)
+        if target is None:
+            return 0
+        endpoint, id_param = target
+        data_ids = set(event.data_ids)
+
+        def affected(key: Tuple[str, Hashable]) -> bool:
+            if key[0] != endpoint:
+                return False
+            filtered_id = dict(key[1]).get(id_param)
+            return filtered_id is None or filtered_id in data_ids
+
+        with self._lock:
+            for key in self._fetching:
+                if affected(key):
+                    self._bump(key)
+            keys = [key for key in self._entries if affected(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
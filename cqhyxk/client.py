@@ -1,23 +1,57 @@
 """
 API client for cqhyxk SDK
 """
+import copy
 import json
-from typing import Optional, Dict, Any
+import threading
+import time
+from functools import partial
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, Union
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 import os
 
-# Load environment variables from .env file
-load_dotenv()
-
 from .models import (
     IdentityPageRequest, IdentityPageResponse,
     FacePhotosResponse, OrgListResponse,
     TagListResponse, MemberTagPageRequest,
     MemberTagPageResponse, SubscriptionRequest,
-    SubscriptionResponse, CancelSubscriptionRequest, CommonResponse
+    SubscriptionResponse, CancelSubscriptionRequest, CommonResponse,
+    IdentityInfo, MemberTagInfo, FacePhoto
+)
+from .exceptions import AuthenticationError, APIError, RequestError, DeadlineExceeded, SUCCESS_CODE
+from .env import load_env
+from .cache import ResponseCache
+from .metrics import (
+    MetricsSink, InMemoryMetrics, error_label,
+    METRIC_REQUESTS, METRIC_RETRIES, METRIC_ERRORS, METRIC_RESPONSE_BYTES, METRIC_NETWORK, METRIC_MODEL,
+    METRIC_COALESCED
 )
-from .exceptions import AuthenticationError, APIError, RequestError
+from .retry import RetryPolicy, AdaptiveRateLimiter
+from .transport import build_request, read_response, retry_delay
+from .timeouts import Deadline, Timeout, DEFAULT_TIMEOUT
+from .pagination import (
+    DEFAULT_PAGE_SIZE, DEFAULT_MAX_WORKERS, DEFAULT_MAX_WINDOW_ROWS, prepare_scan_request, iter_page_items,
+    fan_out_pages, iter_window_items, iter_adaptive_page_items, identity_key, member_tag_key
+)
+from .page_size import AdaptivePageSize
+from .decoding import DECODE_MODEL, DECODE_RAW, check_decode_mode, decode_response
+
+# The codecs, coalescing and streaming (orjson, msgspec, ijson) are imported by
+# the code paths using them, keeping them out of the client's import time.
+if TYPE_CHECKING:
+    from .codec import JsonCodec, SchemaDecoder
+    from .streaming import StreamingPage
+
+
+#: 流式解析时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+#: 默认连接池数量（每个主机一个连接池）
+DEFAULT_POOL_CONNECTIONS = 10
+#: 默认每个连接池保持的最大连接数，不小于常用的并发线程数
+DEFAULT_POOL_MAXSIZE = 32
 
 
 class CqhyxkClient:
@@ -26,9 +60,22 @@ class CqhyxkClient:
     
     This client provides methods to interact with the Identity Management Platform API,
     including personnel, organization, tag, and event subscription functionality.
+
+    Thread safety: one client instance may be shared by any number of threads. The
+    session's headers and adapters are only set up in ``__init__``, connections are
+    taken from a pool of ``pool_maxsize`` per host (threads beyond that open extra,
+    non-pooled connections rather than waiting), and the response cache and rate
+    limiter are internally locked. Size ``pool_maxsize`` to at least the number of
+    threads using the client to keep every connection alive between calls.
     """
     
-    def __init__(self, app_key: Optional[str] = None, app_secret: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(self, app_key: Optional[str] = None, app_secret: Optional[str] = None, base_url: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None, decode: str = DECODE_MODEL,
+                 retry: Optional[RetryPolicy] = None, rate_limiter: Optional[AdaptiveRateLimiter] = None,
+                 timeout: Timeout = DEFAULT_TIMEOUT, endpoint_timeouts: Optional[Dict[str, Timeout]] = None,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS, pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 keep_alive: bool = True, metrics: Optional[MetricsSink] = None,
+                 coalesce: bool = False, codec: Optional['JsonCodec'] = None):
         """
         Initialize the client with app credentials.
 
@@ -39,8 +86,38 @@ class CqhyxkClient:
                 If not provided, will be loaded from CQHYXK_APP_SECRET environment variable.
             base_url (Optional[str]): Base URL for the API.
                 If not provided, will be loaded from CQHYXK_BASEURL environment variable.
+            cache (Optional[ResponseCache]): Opt-in response cache for reference endpoints
+                such as get_org_list and get_tag_list. Disabled if not provided.
+            decode (str): Default decode mode of query responses: ``model`` (validated Pydantic
+                models), ``construct`` (the same models built without validation, for trusted
+                bulk pipelines) or ``raw`` (plain dicts). See :mod:`cqhyxk.decoding`.
+            retry (Optional[RetryPolicy]): Retry idempotent calls that fail with a transient
+                error. Disabled if not provided.
+            rate_limiter (Optional[AdaptiveRateLimiter]): Client-side rate limit, shared by all
+                threads using this client. Disabled if not provided.
+            timeout (Timeout): Default timeout of each request in seconds, either one number or a
+                ``(connect, read)`` tuple; None waits forever.
+            endpoint_timeouts (Optional[Dict[str, Timeout]]): Timeouts overriding ``timeout`` per
+                endpoint path, e.g. ``{"/open-api/member/face-photos": (5, 120)}``.
+            pool_connections (int): Number of per-host connection pools to keep.
+            pool_maxsize (int): Maximum number of connections kept alive per host.
+            keep_alive (bool): Reuse connections between requests; if False every request
+                opens a new connection.
+            metrics (Optional[MetricsSink]): Receiver of per-endpoint request metrics, see
+                :mod:`cqhyxk.metrics`. Defaults to a new :class:`~cqhyxk.metrics.InMemoryMetrics`;
+                pass ``MetricsSink()`` to discard them.
+            coalesce (bool): Let identical idempotent calls made concurrently by several threads
+                share one upstream request instead of each sending its own. Only calls with the
+                same ``deadline`` (or none) are shared. Because the callers share the response
+                data, the codec's schema decoder (e.g. :class:`~cqhyxk.codec.MsgspecCodec`) is not
+                used for any call of a coalescing client; responses take the generic decode path.
+            codec (Optional[JsonCodec]): JSON codec of request and response bodies, see
+                :mod:`cqhyxk.codec`. Defaults to the standard library ``json``; with
+                :class:`~cqhyxk.codec.MsgspecCodec` page responses are decoded straight into models.
         """
         # Use provided values or load from environment variables
+        if not (app_key and app_secret and base_url):
+            load_env()
         self.app_key = app_key or os.getenv('CQHYXK_APP_KEY')
         self.app_secret = app_secret or os.getenv('CQHYXK_APP_SECRET')
         self.base_url = base_url or os.getenv('CQHYXK_BASEURL', 'https://your-domain/backend/school-platform/openapi')
@@ -56,8 +133,32 @@ class CqhyxkClient:
             "app-key": self.app_key,
             "app-secret": self.app_secret
         })
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        # Retries are handled by _make_request, so the adapter makes a single attempt.
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = timeout
+        self.endpoint_timeouts = dict(endpoint_timeouts or {})
+        self.cache = cache
+        self.decode = check_decode_mode(decode)
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics if metrics is not None else InMemoryMetrics()
+        self.singleflight = None
+        if coalesce:
+            from .singleflight import SingleFlight
+            self.singleflight = SingleFlight()
+        if codec is None:
+            from .codec import JsonCodec
+            codec = JsonCodec()
+        self.codec = codec
+        self._local = threading.local()
     
-    def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None, json_data: Optional[Dict] = None) -> Dict[str, Any]:
+    def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None, json_data: Optional[Dict] = None,
+                      idempotent: Optional[bool] = None, deadline: Optional[Deadline] = None,
+                      schema: Optional['SchemaDecoder'] = None) -> Any:
         """
         Make an HTTP request to the API.
         
@@ -66,64 +167,236 @@ class CqhyxkClient:
             endpoint (str): API endpoint
             params (Optional[Dict]): Query parameters
             json_data (Optional[Dict]): JSON payload for the request
+            idempotent (Optional[bool]): Whether the call may be retried, defaults to GET requests only
+            deadline (Optional[Deadline]): Overall budget capping the timeouts of all attempts
+            schema (Optional[SchemaDecoder]): Codec decoder building the response model directly
             
         Returns:
-            Dict[str, Any]: JSON response from the API
+            Any: JSON response from the API, or the model built by ``schema``
             
         Raises:
             AuthenticationError: If authentication fails
             APIError: If the API returns an error response
+            DeadlineExceeded: If the deadline runs out
             RequestError: If there's an error making the request
         """
-        url = f"{self.base_url}{endpoint}"
-        
-        try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json_data
-            )
-            
-            # Check if the request was successful
-            if response.status_code == 401:
-                raise AuthenticationError("Authentication failed. Please check your app key and secret.")
-            
-            response.raise_for_status()
-            
-            # Parse the JSON response
-            data = response.json()
-            
-            # Check for API error codes
-            if data.get('code') != '00000000':
-                message = data.get('message', 'Unknown error')
-                # Safely handle potential Unicode encoding issues in error messages
-                try:
-                    message = str(message)
-                except UnicodeError:
-                    message = message.encode('utf-8', errors='ignore').decode('utf-8')
+        if idempotent is None:
+            idempotent = method == 'GET'
+        if self.singleflight is None or not idempotent:
+            return self._send_request(method, endpoint, params, json_data, idempotent, deadline, schema)
+
+        from .singleflight import request_key
+
+        # Identical calls already in flight share its response data; each caller builds its own model.
+        # Calls only share a request sent under the same deadline, so none is cut off by another's budget.
+        key = request_key(method, endpoint, params, json_data), deadline
+        result, shared = self.singleflight.do(
+            key, lambda: self._send_request(method, endpoint, params, json_data, idempotent, deadline))
+        if shared:
+            self.metrics.increment(endpoint, METRIC_COALESCED)
+        return result
 
-                raise APIError(
-                    message=message,
-                    code=data.get('code')
+    def _send_request(self, method: str, endpoint: str, params: Optional[Dict], json_data: Optional[Dict],
+                      idempotent: bool, deadline: Optional[Deadline], schema: Optional['SchemaDecoder'] = None) -> Any:
+        """Send a request, retrying it according to the retry policy"""
+        url, body = build_request(self.base_url, endpoint, json_data, self.codec)
+
+        attempt = 0
+        while True:
+            self._throttle(deadline)
+            self.metrics.increment(endpoint, METRIC_REQUESTS)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    data=body,
+                    timeout=self._timeout(endpoint, deadline)
                 )
-            
+
+                self.metrics.observe(endpoint, METRIC_NETWORK, time.perf_counter() - started)
+                self.metrics.increment(endpoint, METRIC_RESPONSE_BYTES, len(response.content))
+                self._local.response_bytes = len(response.content)
+                result = read_response(response, endpoint, self.codec, self.metrics, schema)
+
+            except AuthenticationError:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label="http_401")
+                raise
+            except requests.exceptions.RequestException as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    if deadline is not None and deadline.expired:
+                        raise DeadlineExceeded(f"Deadline exceeded: {str(e)}")
+                    raise RequestError(f"Request failed: {str(e)}")
+            except json.JSONDecodeError as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                raise RequestError(f"Failed to decode JSON response: {str(e)}")
+            except APIError as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None:
+                    raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_success()
+                return result
+            self.metrics.increment(endpoint, METRIC_RETRIES)
+            self._sleep_before_retry(delay, deadline)
+            attempt += 1
+
+    def _pop_response_bytes(self) -> Optional[int]:
+        """Size of the last response received on this thread, if not yet taken"""
+        return self._local.__dict__.pop("response_bytes", None)
+
+    def _timeout(self, endpoint: str, deadline: Optional[Deadline] = None) -> Timeout:
+        """Timeout of one request to an endpoint, capped by the remaining deadline budget"""
+        timeout = self.endpoint_timeouts.get(endpoint, self.timeout)
+        return deadline.cap(timeout) if deadline is not None else timeout
+
+    @staticmethod
+    def _sleep_before_retry(delay: float, deadline: Optional[Deadline] = None) -> None:
+        """Wait before a retry, failing at once if the retry could not start before the deadline"""
+        if deadline is not None and delay >= deadline.remaining():
+            raise DeadlineExceeded("Deadline exceeded before the request could be retried")
+        time.sleep(delay)
+
+    def _throttle(self, deadline: Optional[Deadline] = None) -> None:
+        """Wait for the rate limiter, if any, failing at once if the request could not start before the deadline"""
+        if self.rate_limiter is None:
+            return
+        if not self.rate_limiter.acquire(deadline.remaining() if deadline is not None else None):
+            raise DeadlineExceeded("Deadline exceeded before the rate limiter let the request through")
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool) -> Optional[float]:
+        """
+        Signal a failed attempt to the rate limiter and return the seconds to wait before retrying it,
+        or None if it must not be retried.
+        """
+        response = error.response if isinstance(error, requests.exceptions.HTTPError) else None
+        transport_error = isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+        return retry_delay(error, attempt, idempotent, self.retry, self.rate_limiter, response, transport_error)
+
+    def _stream_request(self, method: str, endpoint: str, model: type, params: Optional[Dict] = None,
+                        json_data: Optional[Dict] = None, decode: Optional[str] = None,
+                        deadline: Optional[Deadline] = None) -> 'StreamingPage':
+        """
+        Make an HTTP request whose ``data.content`` records are parsed while streaming.
+
+        Args:
+            method (str): HTTP method (GET, POST, etc.)
+            endpoint (str): API endpoint
+            model (type): Model built from each ``data.content`` record
+            params (Optional[Dict]): Query parameters
+            json_data (Optional[Dict]): JSON payload for the request
+            decode (Optional[str]): Decode mode of each record, defaults to the client setting
+            deadline (Optional[Deadline]): Overall budget capping the timeouts of all attempts
+
+        Returns:
+            StreamingPage: Iterable of records
+
+        Raises:
+            AuthenticationError: If authentication fails
+            RequestError: If there's an error making the request
+        """
+        url, body = build_request(self.base_url, endpoint, json_data, self.codec)
+
+        attempt = 0
+        while True:
+            self._throttle(deadline)
+            self.metrics.increment(endpoint, METRIC_REQUESTS)
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    data=body,
+                    stream=True,
+                    timeout=self._timeout(endpoint, deadline)
+                )
+                # Time to the response headers; the body is read while the records are parsed.
+                self.metrics.observe(endpoint, METRIC_NETWORK, time.perf_counter() - started)
+                if response.status_code == 401:
+                    response.close()
+                    self.metrics.increment(endpoint, METRIC_ERRORS, label="http_401")
+                    raise AuthenticationError("Authentication failed. Please check your app key and secret.")
+                try:
+                    response.raise_for_status()
+                except requests.exceptions.HTTPError:
+                    response.close()
+                    raise
+            except requests.exceptions.RequestException as e:
+                self.metrics.increment(endpoint, METRIC_ERRORS, label=error_label(e))
+                # Streaming endpoints are all queries, so they are idempotent.
+                delay = self._retry_delay(e, attempt, idempotent=True)
+                if delay is None:
+                    if deadline is not None and deadline.expired:
+                        raise DeadlineExceeded(f"Deadline exceeded: {str(e)}")
+                    raise RequestError(f"Request failed: {str(e)}")
+                self.metrics.increment(endpoint, METRIC_RETRIES)
+                self._sleep_before_retry(delay, deadline)
+                attempt += 1
+                continue
+            if self.rate_limiter is not None:
+                self.rate_limiter.on_success()
+            break
+
+        from .streaming import ChunkReader, StreamingPage
+
+        return StreamingPage(ChunkReader(response.iter_content(STREAM_CHUNK_SIZE)), model,
+                             close=response.close, success_code=SUCCESS_CODE, decode=decode or self.decode)
+
+    def _schema(self, model_class: type, decode: Optional[str] = None) -> Optional['SchemaDecoder']:
+        """Codec decoder of ``model_class`` responses, unless the call decodes to raw dicts or is coalesced"""
+        # Coalesced callers share the response data, so each must build its own model from it.
+        if (decode or self.decode) == DECODE_RAW or self.singleflight is not None:
+            return None
+        return self.codec.schema_decoder(model_class)
+
+    def _decode(self, endpoint: str, model_class: type, data: Any, decode: Optional[str] = None) -> Any:
+        """Build a response in the per-call decode mode, or the client default, timing it under ``endpoint``"""
+        if isinstance(data, model_class):
+            # Already built by the codec's schema decoder.
             return data
+        started = time.perf_counter()
+        result = decode_response(model_class, data, decode or self.decode)
+        self.metrics.observe(endpoint, METRIC_MODEL, time.perf_counter() - started)
+        return result
+
+    def _get(self, endpoint: str, model_class: type, params: Optional[Dict] = None, decode: Optional[str] = None,
+             deadline: Optional[Deadline] = None) -> Any:
+        """
+        Helper method for GET requests returning the decoded response, served from the response cache when enabled.
 
-        except requests.exceptions.RequestException as e:
-            raise RequestError(f"Request failed: {str(e)}")
-        except json.JSONDecodeError as e:
-            raise RequestError(f"Failed to decode JSON response: {str(e)}")
+        The cache keeps the response data and the validated model built from it
+        once. Hits return a deep copy of the model, or build the ``construct`` or
+        ``raw`` response from a copy of the data, so that callers cannot change
+        the cached entry. ``deadline`` only bounds this caller's fetch, not the
+        background refresh of a stale entry.
+        """
+        if self.cache is not None and self.cache.handles(endpoint):
+            def fetch(deadline=deadline):
+                data = self._make_request('GET', endpoint, params=params, deadline=deadline)
+                return data, self._decode(endpoint, model_class, data, DECODE_MODEL)
 
-    def _get(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Helper method for GET requests"""
-        return self._make_request('GET', endpoint, params=params)
+            data, model = self.cache.get_or_fetch(endpoint, params, fetch, refresh=partial(fetch, deadline=None))
+            mode = decode or self.decode
+            if mode == DECODE_MODEL:
+                return model.copy(deep=True)
+            return self._decode(endpoint, model_class, copy.deepcopy(data), mode)
+        response_data = self._make_request('GET', endpoint, params=params, deadline=deadline,
+                                           schema=self._schema(model_class, decode))
+        return self._decode(endpoint, model_class, response_data, decode)
 
-    def _post(self, endpoint: str, json_data: Optional[Dict] = None) -> Dict[str, Any]:
-        """Helper method for POST requests"""
-        return self._make_request('POST', endpoint, json_data=json_data)
+    def _post(self, endpoint: str, json_data: Optional[Dict] = None, idempotent: bool = False,
+              deadline: Optional[Deadline] = None, schema: Optional['SchemaDecoder'] = None) -> Any:
+        """Helper method for POST requests; only idempotent ones (queries) are retried"""
+        return self._make_request('POST', endpoint, json_data=json_data, idempotent=idempotent, deadline=deadline,
+                                  schema=schema)
 
-    def get_identity_list(self, request: IdentityPageRequest) -> IdentityPageResponse:
+    def get_identity_list(self, request: IdentityPageRequest, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> IdentityPageResponse:
         """
         人员身份信息分页列表
 
@@ -139,6 +412,8 @@ class CqhyxkClient:
                 - updateTimeEnd: 更新时间 - 结束（可选）
                 - sourceUserId: 源系统用户 id（学工号，可选）
                 ```
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
 
         Returns:
             IdentityPageResponse: 人员身份信息分页响应
@@ -220,10 +495,11 @@ class CqhyxkClient:
                 }
             }
         """
-        response_data = self._post("/open-api/member/identity/page", json_data=request.dict(exclude_none=True))
-        return IdentityPageResponse(**response_data)
+        response_data = self._post("/open-api/member/identity/page", json_data=request.dict(exclude_none=True), idempotent=True,
+                                   deadline=deadline, schema=self._schema(IdentityPageResponse, decode))
+        return self._decode("/open-api/member/identity/page", IdentityPageResponse, response_data, decode)
 
-    def get_face_photos(self, source_user_id: str) -> FacePhotosResponse:
+    def get_face_photos(self, source_user_id: str, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> FacePhotosResponse:
         """
         根据学工号获取人脸照片
 
@@ -231,6 +507,8 @@ class CqhyxkClient:
 
         Args:
             source_user_id (str): 学工号
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
 
         Returns:
             FacePhotosResponse: 人脸照片响应
@@ -265,10 +543,11 @@ class CqhyxkClient:
             }
         """
         params = {"sourceUserId": source_user_id}
-        response_data = self._get("/open-api/member/face-photos", params=params)
-        return FacePhotosResponse(**response_data)
+        return self._get("/open-api/member/face-photos", FacePhotosResponse, params=params, decode=decode,
+                         deadline=deadline)
 
-    def get_org_list(self, physical: Optional[str] = None, internal: Optional[str] = None, org_id: Optional[str] = None) -> OrgListResponse:
+    def get_org_list(self, physical: Optional[str] = None, internal: Optional[str] = None, org_id: Optional[str] = None,
+                     decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> OrgListResponse:
         """
         组织列表
 
@@ -278,6 +557,8 @@ class CqhyxkClient:
             physical (Optional[str]): 是否实体组织，true: 只查询实体组织，false: 查询非实体组织，null: 查询所有组织
             internal (Optional[str]): 是否校内组织（true: 查询校内组织；false: 查询非校内组织；null: 查询所有组织）
             org_id (Optional[str]): 组织 id（orgId）
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
 
         Returns:
             OrgListResponse: 组织列表响应
@@ -333,10 +614,9 @@ class CqhyxkClient:
         if org_id is not None:
             params['orgId'] = org_id
 
-        response_data = self._get("/open-api/org/list", params=params)
-        return OrgListResponse(**response_data)
+        return self._get("/open-api/org/list", OrgListResponse, params=params, decode=decode, deadline=deadline)
 
-    def get_tag_list(self, tag_id: Optional[str] = None) -> TagListResponse:
+    def get_tag_list(self, tag_id: Optional[str] = None, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> TagListResponse:
         """
         标签列表
 
@@ -344,6 +624,8 @@ class CqhyxkClient:
 
         Args:
             tag_id (Optional[str]): 标签 id（tagId）
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
 
         Returns:
             TagListResponse: 标签列表响应
@@ -391,10 +673,9 @@ class CqhyxkClient:
         if tag_id is not None:
             params['tagId'] = tag_id
 
-        response_data = self._get("/open-api/tag/list", params=params)
-        return TagListResponse(**response_data)
+        return self._get("/open-api/tag/list", TagListResponse, params=params, decode=decode, deadline=deadline)
 
-    def get_member_tags_page(self, request: MemberTagPageRequest) -> MemberTagPageResponse:
+    def get_member_tags_page(self, request: MemberTagPageRequest, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> MemberTagPageResponse:
         """
         人员标签关系分页列表
 
@@ -411,6 +692,8 @@ class CqhyxkClient:
                 - sourceUserId: 源系统用户 id（学工号，可选）
                 - tagId: 标签 id（可选）
                 ```
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
 
         Returns:
             MemberTagPageResponse: 人员标签关系分页响应
@@ -455,8 +738,245 @@ class CqhyxkClient:
                 }
             }
         """
-        response_data = self._post("/open-api/tag/member-tags/page", json_data=request.dict(exclude_none=True))
-        return MemberTagPageResponse(**response_data)
+        response_data = self._post("/open-api/tag/member-tags/page", json_data=request.dict(exclude_none=True), idempotent=True,
+                                   deadline=deadline, schema=self._schema(MemberTagPageResponse, decode))
+        return self._decode("/open-api/tag/member-tags/page", MemberTagPageResponse, response_data, decode)
+
+    def stream_identity_list(self, request: IdentityPageRequest, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> 'StreamingPage':
+        """
+        人员身份信息分页列表（流式解析）
+
+        与 get_identity_list 相同，但在下载过程中逐条解析并返回 IdentityInfo，
+        内存中只保留一条记录。需要安装 stream 扩展（ijson）。
+
+        Args:
+            request (IdentityPageRequest): 人员身份信息分页查询请求参数
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
+
+        Returns:
+            StreamingPage: 可迭代的 IdentityInfo，迭代结束后 total 为总数
+        """
+        return self._stream_request('POST', "/open-api/member/identity/page", IdentityInfo,
+                                    json_data=request.dict(exclude_none=True), decode=decode, deadline=deadline)
+
+    def stream_member_tags_page(self, request: MemberTagPageRequest, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> 'StreamingPage':
+        """
+        人员标签关系分页列表（流式解析）
+
+        与 get_member_tags_page 相同，但在下载过程中逐条解析并返回 MemberTagInfo。
+        需要安装 stream 扩展（ijson）。
+
+        Args:
+            request (MemberTagPageRequest): 人员标签关系分页参数
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
+
+        Returns:
+            StreamingPage: 可迭代的 MemberTagInfo，迭代结束后 total 为总数
+        """
+        return self._stream_request('POST', "/open-api/tag/member-tags/page", MemberTagInfo,
+                                    json_data=request.dict(exclude_none=True), decode=decode, deadline=deadline)
+
+    def stream_face_photos(self, source_user_id: str, decode: Optional[str] = None, deadline: Optional[Deadline] = None) -> 'StreamingPage':
+        """
+        根据学工号获取人脸照片（流式解析）
+
+        与 get_face_photos 相同，但在下载过程中逐张解析并返回 FacePhoto。
+        需要安装 stream 扩展（ijson）。
+
+        Args:
+            source_user_id (str): 学工号
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Optional[Deadline]): 截止时间（可选），请求超时不超过剩余时间，用尽时抛出 DeadlineExceeded
+
+        Returns:
+            StreamingPage: 可迭代的 FacePhoto
+        """
+        return self._stream_request('GET', "/open-api/member/face-photos", FacePhoto,
+                                    params={"sourceUserId": source_user_id}, decode=decode, deadline=deadline)
+
+    def iter_identities(self, request: Optional[IdentityPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                        stream: bool = False, decode: Optional[str] = None,
+                        deadline: Union[None, float, Deadline] = None,
+                        adaptive: Optional[AdaptivePageSize] = None) -> Iterator[IdentityInfo]:
+        """
+        遍历全部人员身份信息
+
+        自动翻页获取人员身份信息，逐条返回，内存中最多只保留一页数据。
+        开始时固定 updateTimeEnd，并按 sourceUserId 去重，保证全量扫描结果正确。
+
+        Args:
+            request (Optional[IdentityPageRequest]): 查询条件（可选），current 默认为 0，
+                size 默认为 page_size，updateTimeEnd 默认为当前时间
+            page_size (int): 未指定 size 时的页面大小
+            stream (bool): 是否流式解析每页（需要安装 stream 扩展）
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Union[None, float, Deadline]): 整个遍历的截止时间（秒数或 Deadline，可选），
+                所有分页请求共享，用尽时抛出 DeadlineExceeded
+            adaptive (Optional[AdaptivePageSize]): 根据每页耗时、响应大小和失败情况自动调整页面大小
+                （可选，不能与 stream 同时使用）
+
+        Yields:
+            IdentityInfo: 人员身份信息
+        """
+        request = prepare_scan_request(request, IdentityPageRequest, page_size)
+        deadline = Deadline.coerce(deadline)
+        if adaptive is not None:
+            if stream:
+                raise ValueError("adaptive page size cannot be combined with stream=True")
+            return iter_adaptive_page_items(partial(self.get_identity_list, decode=decode, deadline=deadline), request, adaptive,
+                                            key=identity_key, response_bytes=self._pop_response_bytes)
+        if stream:
+            from .streaming import iter_streamed_page_items
+            return iter_streamed_page_items(partial(self.stream_identity_list, decode=decode, deadline=deadline), request, key=identity_key)
+        return iter_page_items(partial(self.get_identity_list, decode=decode, deadline=deadline), request, key=identity_key)
+
+    def iter_member_tags(self, request: Optional[MemberTagPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                         stream: bool = False, decode: Optional[str] = None,
+                         deadline: Union[None, float, Deadline] = None,
+                         adaptive: Optional[AdaptivePageSize] = None) -> Iterator[MemberTagInfo]:
+        """
+        遍历全部人员标签关系
+
+        自动翻页获取人员标签关系，逐条返回，内存中最多只保留一页数据。
+        开始时固定 updateTimeEnd，并按 (sourceUserId, tagId) 去重。
+
+        Args:
+            request (Optional[MemberTagPageRequest]): 查询条件（可选），current 默认为 0，
+                size 默认为 page_size，updateTimeEnd 默认为当前时间
+            page_size (int): 未指定 size 时的页面大小
+            stream (bool): 是否流式解析每页（需要安装 stream 扩展）
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Union[None, float, Deadline]): 整个遍历的截止时间（秒数或 Deadline，可选），
+                所有分页请求共享，用尽时抛出 DeadlineExceeded
+            adaptive (Optional[AdaptivePageSize]): 根据每页耗时、响应大小和失败情况自动调整页面大小
+                （可选，不能与 stream 同时使用）
+
+        Yields:
+            MemberTagInfo: 人员标签关系
+        """
+        request = prepare_scan_request(request, MemberTagPageRequest, page_size)
+        deadline = Deadline.coerce(deadline)
+        if adaptive is not None:
+            if stream:
+                raise ValueError("adaptive page size cannot be combined with stream=True")
+            return iter_adaptive_page_items(partial(self.get_member_tags_page, decode=decode, deadline=deadline), request, adaptive,
+                                            key=member_tag_key, response_bytes=self._pop_response_bytes)
+        if stream:
+            from .streaming import iter_streamed_page_items
+            return iter_streamed_page_items(partial(self.stream_member_tags_page, decode=decode, deadline=deadline), request, key=member_tag_key)
+        return iter_page_items(partial(self.get_member_tags_page, decode=decode, deadline=deadline), request, key=member_tag_key)
+
+    def get_identity_pages(self, request: Optional[IdentityPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                           max_workers: int = DEFAULT_MAX_WORKERS, ordered: bool = True,
+                           decode: Optional[str] = None,
+                           deadline: Union[None, float, Deadline] = None) -> Iterator[IdentityPageResponse]:
+        """
+        并发获取全部人员身份信息分页
+
+        先获取第一页，根据返回的 total 计算剩余页数，再通过线程池并发获取剩余分页。
+
+        Args:
+            request (Optional[IdentityPageRequest]): 查询条件（可选），current 默认为 0，
+                size 默认为 page_size，updateTimeEnd 默认为当前时间
+            page_size (int): 未指定 size 时的页面大小
+            max_workers (int): 最大并发请求数
+            ordered (bool): True 时按页码顺序返回，False 时按完成顺序返回
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Union[None, float, Deadline]): 整个遍历的截止时间（秒数或 Deadline，可选），
+                所有分页请求共享，用尽时抛出 DeadlineExceeded
+
+        Yields:
+            IdentityPageResponse: 人员身份信息分页响应
+        """
+        request = prepare_scan_request(request, IdentityPageRequest, page_size)
+        deadline = Deadline.coerce(deadline)
+        return fan_out_pages(partial(self.get_identity_list, decode=decode, deadline=deadline), request, max_workers=max_workers, ordered=ordered)
+
+    def get_member_tags_pages(self, request: Optional[MemberTagPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                              max_workers: int = DEFAULT_MAX_WORKERS, ordered: bool = True,
+                              decode: Optional[str] = None,
+                              deadline: Union[None, float, Deadline] = None) -> Iterator[MemberTagPageResponse]:
+        """
+        并发获取全部人员标签关系分页
+
+        先获取第一页，根据返回的 total 计算剩余页数，再通过线程池并发获取剩余分页。
+
+        Args:
+            request (Optional[MemberTagPageRequest]): 查询条件（可选），current 默认为 0，
+                size 默认为 page_size，updateTimeEnd 默认为当前时间
+            page_size (int): 未指定 size 时的页面大小
+            max_workers (int): 最大并发请求数
+            ordered (bool): True 时按页码顺序返回，False 时按完成顺序返回
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Union[None, float, Deadline]): 整个遍历的截止时间（秒数或 Deadline，可选），
+                所有分页请求共享，用尽时抛出 DeadlineExceeded
+
+        Yields:
+            MemberTagPageResponse: 人员标签关系分页响应
+        """
+        request = prepare_scan_request(request, MemberTagPageRequest, page_size)
+        deadline = Deadline.coerce(deadline)
+        return fan_out_pages(partial(self.get_member_tags_page, decode=decode, deadline=deadline), request, max_workers=max_workers, ordered=ordered)
+
+    def scan_identities(self, request: Optional[IdentityPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                        max_workers: int = DEFAULT_MAX_WORKERS, max_window_rows: int = DEFAULT_MAX_WINDOW_ROWS,
+                        start: Optional[datetime] = None, decode: Optional[str] = None,
+                        deadline: Union[None, float, Deadline] = None) -> Iterator[IdentityInfo]:
+        """
+        按更新时间窗口并发遍历全部人员身份信息
+
+        将 updateTimeStart 至 updateTimeEnd 的时间范围拆分为多个窗口并发获取，每个窗口只浅层翻页；
+        记录数超过 max_window_rows 的窗口会自动继续拆分，使每个请求的分页深度有上限。
+        结果不保证顺序，并按 sourceUserId 去重。
+
+        Args:
+            request (Optional[IdentityPageRequest]): 查询条件（可选），size 默认为 page_size，
+                updateTimeEnd 默认为当前时间
+            page_size (int): 未指定 size 时的页面大小
+            max_workers (int): 最大并发请求数，也是初始窗口数
+            max_window_rows (int): 单个窗口内翻页的最大记录数
+            start (Optional[datetime]): 时间范围起点，默认为 request.updateTimeStart，
+                均未指定时从 2000-01-01 开始，并用一个无起点的窗口获取更早的记录
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Union[None, float, Deadline]): 整个遍历的截止时间（秒数或 Deadline，可选），
+                所有分页请求共享，用尽时抛出 DeadlineExceeded
+
+        Yields:
+            IdentityInfo: 人员身份信息
+        """
+        request = prepare_scan_request(request, IdentityPageRequest, page_size)
+        deadline = Deadline.coerce(deadline)
+        return iter_window_items(partial(self.get_identity_list, decode=decode, deadline=deadline), request, start=start,
+                                 max_workers=max_workers, max_window_rows=max_window_rows, key=identity_key)
+
+    def scan_member_tags(self, request: Optional[MemberTagPageRequest] = None, page_size: int = DEFAULT_PAGE_SIZE,
+                         max_workers: int = DEFAULT_MAX_WORKERS, max_window_rows: int = DEFAULT_MAX_WINDOW_ROWS,
+                         start: Optional[datetime] = None, decode: Optional[str] = None,
+                         deadline: Union[None, float, Deadline] = None) -> Iterator[MemberTagInfo]:
+        """
+        按更新时间窗口并发遍历全部人员标签关系
+
+        参见 :meth:`scan_identities`，结果按 (sourceUserId, tagId) 去重。
+
+        Args:
+            request (Optional[MemberTagPageRequest]): 查询条件（可选），size 默认为 page_size，
+                updateTimeEnd 默认为当前时间
+            page_size (int): 未指定 size 时的页面大小
+            max_workers (int): 最大并发请求数，也是初始窗口数
+            max_window_rows (int): 单个窗口内翻页的最大记录数
+            start (Optional[datetime]): 时间范围起点，默认为 request.updateTimeStart
+            decode (Optional[str]): 解码模式（model / construct / raw），默认使用客户端的 decode 设置
+            deadline (Union[None, float, Deadline]): 整个遍历的截止时间（秒数或 Deadline，可选）
+
+        Yields:
+            MemberTagInfo: 人员标签关系
+        """
+        request = prepare_scan_request(request, MemberTagPageRequest, page_size)
+        deadline = Deadline.coerce(deadline)
+        return iter_window_items(partial(self.get_member_tags_page, decode=decode, deadline=deadline), request, start=start,
+                                 max_workers=max_workers, max_window_rows=max_window_rows, key=member_tag_key)
 
     def add_subscription(self, request: SubscriptionRequest) -> SubscriptionResponse:
         """
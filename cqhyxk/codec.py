@@ -0,0 +1,272 @@
+"""
+Pluggable JSON codecs for cqhyxk SDK
+
+The clients encode request bodies and decode responses through a codec:
+
+:class:`JsonCodec`
+    The standard library ``json`` module (default). Responses are then built
+    by the Pydantic path of :mod:`cqhyxk.decoding`.
+:class:`OrjsonCodec`
+    The same with ``orjson`` (``pip install cqhyxk[orjson]``).
+:class:`MsgspecCodec`
+    ``msgspec`` (``pip install cqhyxk[msgspec]``). For the bulk responses in
+    :data:`SCHEMA_MODELS` it decodes the body straight into msgspec structs
+    compiled from the Pydantic models, checking types in C, and builds the
+    Pydantic models from them without validating again. Bodies the strict
+    schema rejects, and error responses, take the Pydantic path instead, so
+    results and errors are the same as with :class:`JsonCodec`.
+
+orjson and msgspec are imported when their codec is first constructed.
+"""
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from .decoding import _DEFAULTS, _plan
+from .exceptions import SUCCESS_CODE
+from .models import FacePhotosResponse, IdentityPageResponse, MemberTagPageResponse, enum_lookup
+
+# Imported by the first OrjsonCodec / MsgspecCodec, see _require_orjson and _require_msgspec.
+orjson = None
+msgspec = None
+
+#: 可由结构化解码器直接解码的响应模型
+SCHEMA_MODELS = (IdentityPageResponse, MemberTagPageResponse, FacePhotosResponse)
+
+_object_setattr = object.__setattr__
+
+
+class SchemaDecoder:
+    """
+    结构化解码器
+
+    Decodes a response body in two steps, so the clients can time them as JSON
+    decoding and model building: :meth:`parse` returns an intermediate value,
+    or None if the body must take the generic path, and :meth:`build` turns
+    that value into the response model.
+    """
+
+    def __init__(self, parse: Callable[[bytes], Any], build: Callable[[Any], BaseModel]):
+        self.parse = parse
+        self.build = build
+
+    def __call__(self, content: bytes) -> Optional[BaseModel]:
+        """Decode ``content`` in one step, or return None if it must take the generic path"""
+        value = self.parse(content)
+        return None if value is None else self.build(value)
+
+
+class JsonCodec:
+    """
+    标准库 JSON 编解码器
+
+    Subclasses override :meth:`dumps` and :meth:`loads`, and may return a
+    :data:`SchemaDecoder` from :meth:`schema_decoder` for response models they
+    can decode directly.
+    """
+
+    #: 编解码器名称
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode a request body as UTF-8 JSON, like ``requests``' ``json=`` argument"""
+        return json.dumps(obj, allow_nan=False).encode("utf-8")
+
+    def loads(self, content: bytes) -> Any:
+        """
+        Decode a response body.
+
+        Raises:
+            json.JSONDecodeError: If the body is not valid JSON
+        """
+        return json.loads(content)
+
+    def schema_decoder(self, model_class: Type[BaseModel]) -> Optional[SchemaDecoder]:
+        """Return a direct decoder of ``model_class`` responses, or None to use :meth:`loads` and Pydantic"""
+        return None
+
+
+def _require_orjson() -> None:
+    global orjson
+    if orjson is None:
+        try:
+            import orjson as module
+        except ImportError:
+            raise ImportError("OrjsonCodec requires orjson. Install it with: pip install cqhyxk[orjson]") from None
+        orjson = module
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson 编解码器"""
+
+    name = "orjson"
+
+    def __init__(self):
+        _require_orjson()
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, content: bytes) -> Any:
+        # orjson.JSONDecodeError is a subclass of json.JSONDecodeError.
+        return orjson.loads(content)
+
+
+def _require_msgspec() -> None:
+    global msgspec
+    if msgspec is None:
+        try:
+            import msgspec as module
+        except ImportError:
+            raise ImportError("MsgspecCodec requires msgspec. Install it with: pip install cqhyxk[msgspec]") from None
+        msgspec = module
+
+
+class _Unsupported(Exception):
+    """A model field type that has no struct equivalent"""
+
+
+class MsgspecCodec(JsonCodec):
+    """
+    msgspec 编解码器
+
+    Example::
+
+        client = CqhyxkClient(codec=MsgspecCodec())
+        for identity in client.iter_identities():   # decoded by compiled structs
+            ...
+    """
+
+    name = "msgspec"
+
+    def __init__(self, models: Tuple[Type[BaseModel], ...] = SCHEMA_MODELS):
+        """
+        Args:
+            models (Tuple[Type[BaseModel], ...]): Response models decoded through compiled structs
+        """
+        _require_msgspec()
+        self.models = tuple(models)
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decoders: Dict[Type[BaseModel], Optional[SchemaDecoder]] = {}
+        self._structs: Dict[Type[BaseModel], Tuple[type, Callable[[Any], BaseModel]]] = {}
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, content: bytes) -> Any:
+        try:
+            return self._decoder.decode(content)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), content.decode("utf-8", errors="replace"), 0) from e
+
+    def schema_decoder(self, model_class: Type[BaseModel]) -> Optional[SchemaDecoder]:
+        if model_class not in self._decoders:
+            decoder = None
+            if model_class in self.models:
+                try:
+                    struct, build = self._compile(model_class)
+                except _Unsupported:
+                    pass
+                else:
+                    code = f"f{list(model_class.__fields__).index('code')}"
+                    decoder = self._make_decoder(struct, build, code)
+            self._decoders[model_class] = decoder
+        return self._decoders[model_class]
+
+    @staticmethod
+    def _make_decoder(struct: type, build: Callable[[Any], BaseModel], code: str) -> SchemaDecoder:
+        decoder = msgspec.json.Decoder(struct)
+
+        def parse(content: bytes) -> Any:
+            try:
+                value = decoder.decode(content)
+            except msgspec.DecodeError:
+                # Includes msgspec.ValidationError: let Pydantic decide.
+                return None
+            if getattr(value, code) != SUCCESS_CODE:
+                # Error responses are raised by the generic path.
+                return None
+            return value
+
+        return SchemaDecoder(parse, build)
+
+    def _compile(self, model_class: Type[BaseModel]) -> Tuple[type, Callable[[Any], BaseModel]]:
+        """Compile a model into a struct type and a function building the model from a struct"""
+        compiled = self._structs.get(model_class)
+        if compiled is not None:
+            return compiled
+        _plan(model_class)  # computes the model defaults
+        defaults = _DEFAULTS[model_class]
+        if defaults is None:
+            raise _Unsupported(model_class)
+        fields = []
+        steps: List[Tuple[str, str, Optional[Callable[[Any], Any]]]] = []
+        for index, field in enumerate(model_class.__fields__.values()):
+            struct_type, convert = self._field_type(field.outer_type_)
+            attribute = f"f{index}"
+            if field.required:
+                fields.append((attribute, struct_type))
+            else:
+                fields.append((attribute, Union[struct_type, None, msgspec.UnsetType], msgspec.UNSET))
+            steps.append((field.name, attribute, convert))
+        # Required fields must come first in a struct definition.
+        fields.sort(key=lambda item: len(item) == 3)
+        renames = {f"f{index}": field.alias for index, field in enumerate(model_class.__fields__.values())}
+        struct = msgspec.defstruct(f"{model_class.__name__}Struct", fields, rename=renames)
+        unset = msgspec.UNSET
+
+        def build(value: Any) -> BaseModel:
+            values = {}
+            for name, attribute, convert in steps:
+                item = getattr(value, attribute)
+                if item is unset:
+                    continue
+                values[name] = convert(item) if convert is not None and item is not None else item
+            # Same result as decoding.construct_model.
+            model = model_class.__new__(model_class)
+            fields_set = set(values)
+            if len(values) < len(defaults):
+                values = dict(defaults, **values)
+            _object_setattr(model, "__dict__", values)
+            _object_setattr(model, "__fields_set__", fields_set)
+            return model
+
+        self._structs[model_class] = struct, build
+        return struct, build
+
+    def _field_type(self, tp: Any) -> Tuple[Any, Optional[Callable[[Any], Any]]]:
+        """Struct annotation of a model field type and the conversion of decoded values, if any"""
+        origin = getattr(tp, "__origin__", None)
+        if origin is Union:
+            args = [arg for arg in tp.__args__ if arg is not type(None)]
+            enums = [arg for arg in args if isinstance(arg, type) and issubclass(arg, Enum)]
+            if enums and all(arg is int or arg in enums for arg in args):
+                # Union[SomeEnum, int]: Pydantic keeps unknown values as int.
+                table = enum_lookup(enums[0])
+                return int, lambda value: table.get(value, value)
+            if len(args) == 1:
+                return self._field_type(args[0])
+            raise _Unsupported(tp)
+        if origin in (list, List):
+            inner, convert = self._field_type(tp.__args__[0])
+            if convert is None:
+                return List[inner], None
+            return List[inner], lambda values: [convert(value) for value in values]
+        if origin in (dict, Dict):
+            key_type, value_type = tp.__args__
+            if key_type is str and value_type is Any:
+                return Dict[str, Any], None
+            raise _Unsupported(tp)
+        if isinstance(tp, type):
+            if issubclass(tp, BaseModel):
+                struct, build = self._compile(tp)
+                return struct, build
+            if issubclass(tp, Enum):
+                raise _Unsupported(tp)
+            if tp in (str, int, float, bool, datetime):
+                return tp, None
+        raise _Unsupported(tp)
@@ -0,0 +1,140 @@
+"""
+Response decoding modes for cqhyxk SDK
+
+``model``
+    Full Pydantic validation (default).
+``construct``
+    Builds the same models without validation. Enum fields are coerced through
+    precomputed lookup tables, ``datetime`` fields are parsed and nested models
+    are constructed, but types are otherwise trusted as returned by the API.
+``raw``
+    Returns the response dicts exactly as decoded from JSON.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+from pydantic.datetime_parse import parse_datetime
+
+from .models import enum_lookup
+
+DECODE_MODEL = "model"
+DECODE_CONSTRUCT = "construct"
+DECODE_RAW = "raw"
+DECODE_MODES = (DECODE_MODEL, DECODE_CONSTRUCT, DECODE_RAW)
+
+_Converter = Optional[Callable[[Any], Any]]
+
+#: 每个模型类的字段解码计划（JSON 键 -> (字段名, 转换函数)，转换函数为 None 表示原样保留）
+_PLANS: Dict[Type[BaseModel], Dict[str, Tuple[str, _Converter]]] = {}
+
+#: 每个模型类的字段默认值；有可变默认值或私有属性时为 None，改用 construct()
+_DEFAULTS: Dict[Type[BaseModel], Optional[Dict[str, Any]]] = {}
+
+_object_setattr = object.__setattr__
+
+
+def check_decode_mode(mode: str) -> str:
+    """Return ``mode`` if it is a known decode mode, otherwise raise ValueError"""
+    if mode not in DECODE_MODES:
+        raise ValueError(f"Unknown decode mode {mode!r}, expected one of {', '.join(DECODE_MODES)}")
+    return mode
+
+
+def _enum_converter(enum_class: Type[Enum]) -> Callable[[Any], Any]:
+    table = enum_lookup(enum_class)
+    return lambda value: table.get(value, value)
+
+
+def _converter(tp: Any) -> _Converter:
+    """Build the conversion function of a field type, or None if values are kept as is"""
+    origin = getattr(tp, "__origin__", None)
+    if origin is Union:
+        args = [arg for arg in tp.__args__ if arg is not type(None)]
+        for arg in args:
+            if isinstance(arg, type) and issubclass(arg, Enum):
+                return _enum_converter(arg)
+        return _converter(args[0]) if len(args) == 1 else None
+    if origin in (list, List):
+        inner = _converter(tp.__args__[0])
+        if inner is None:
+            return None
+        return lambda values: [inner(value) if value is not None else None for value in values]
+    if isinstance(tp, type):
+        if issubclass(tp, BaseModel):
+            return lambda value: construct_model(tp, value)
+        if issubclass(tp, Enum):
+            return _enum_converter(tp)
+        if tp is datetime:
+            return _parse_datetime
+    return None
+
+
+def _parse_datetime(value: Any) -> datetime:
+    """Parse a datetime like Pydantic, taking the fast ISO 8601 path when possible"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return parse_datetime(value)
+
+
+def _plan(model_class: Type[BaseModel]) -> Dict[str, Tuple[str, _Converter]]:
+    plan = _PLANS.get(model_class)
+    if plan is None:
+        fields = model_class.__fields__.values()
+        plan = {field.alias: (field.name, _converter(field.outer_type_)) for field in fields}
+        immutable = not model_class.__private_attributes__ and all(
+            not field.default_factory and isinstance(field.default, (type(None), bool, int, float, str))
+            for field in fields
+        )
+        _DEFAULTS[model_class] = {field.name: field.default for field in fields} if immutable else None
+        _PLANS[model_class] = plan
+    return plan
+
+
+def construct_model(model_class: Type[BaseModel], data: Dict[str, Any]) -> BaseModel:
+    """
+    Build a model from trusted data without validation.
+
+    Unknown keys are ignored, as with validated models.
+    """
+    plan = _plan(model_class)
+    values = {}
+    for key, value in data.items():
+        entry = plan.get(key)
+        if entry is None:
+            continue
+        name, convert = entry
+        values[name] = convert(value) if convert is not None and value is not None else value
+    defaults = _DEFAULTS[model_class]
+    if defaults is None:
+        return model_class.construct(**values)
+    # Same result as construct(), without copying every default value.
+    model = model_class.__new__(model_class)
+    fields_set = set(values)
+    if len(values) < len(defaults):
+        values = dict(defaults, **values)
+    _object_setattr(model, "__dict__", values)
+    _object_setattr(model, "__fields_set__", fields_set)
+    return model
+
+
+def decode_response(model_class: Type[BaseModel], data: Dict[str, Any], mode: str = DECODE_MODEL) -> Any:
+    """
+    Build a response in the given decode mode.
+
+    Args:
+        model_class (Type[BaseModel]): Response model
+        data (Dict[str, Any]): Decoded JSON response
+        mode (str): ``model``, ``construct`` or ``raw``
+    """
+    if mode == DECODE_MODEL:
+        return model_class(**data)
+    if mode == DECODE_CONSTRUCT:
+        return construct_model(model_class, data)
+    if mode == DECODE_RAW:
+        return data
+    return check_decode_mode(mode)
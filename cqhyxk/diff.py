@@ -0,0 +1,352 @@
+"""
+Snapshot diff for cqhyxk SDK
+
+:class:`Snapshot` keeps a fingerprint of each record of a full listing,
+keyed by ``sourceUserId`` for identities, ``orgId`` for organizations and
+``tagId`` for tags. A fingerprint is a short BLAKE2b digest of every field, so
+a snapshot holds a few hundred bytes per record whatever the record size, can
+be saved between runs, and tells which fields of a record changed without
+keeping the previous record. Comparing a snapshot with a new listing is one
+pass over the listing with a dict lookup per record, and reports the added,
+updated and deleted records with the :class:`~cqhyxk.models.DataChangeStatus`
+vocabulary.
+"""
+import json
+import os
+import struct
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from hashlib import blake2b
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from .models import DataChangeStatus, IdentityInfo, MemberTagInfo, OrgInfoDetail, TagInfo
+
+#: 各记录模型的主键字段
+KEY_FIELDS = {
+    IdentityInfo: "sourceUserId",
+    OrgInfoDetail: "orgId",
+    TagInfo: "tagId",
+    MemberTagInfo: ("sourceUserId", "tagId"),
+}
+
+#: 每个字段摘要的字节数
+FIELD_DIGEST_SIZE = 8
+#: 快照文件格式版本
+SNAPSHOT_FORMAT = 1
+
+#: Digest of a missing or null field
+_NULL_DIGEST = bytes(FIELD_DIGEST_SIZE)
+#: Separator of the parts of a composite key in snapshot files
+_KEY_SEPARATOR = "\x1f"
+_KEY_LENGTH = struct.Struct("<H")
+
+Key = Union[str, Tuple[str, ...]]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_dump_nested = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+                                default=_json_default).encode
+
+#: Encoders of the scalar types, looked up by exact type
+_SCALAR_ENCODERS = {
+    str: lambda value: b"s" + value.encode("utf-8"),
+    int: lambda value: b"i%d" % value,
+    bool: lambda value: b"b1" if value else b"b0",
+    float: lambda value: b"f" + repr(value).encode("ascii"),
+    datetime: lambda value: b"t" + value.isoformat().encode("ascii"),
+}
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Stable byte encoding of a field value.
+
+    Enum members encode as their values and nested models as their fields, so
+    a record encodes the same whether it was validated or constructed. Raw
+    dicts keep ``updateTime`` as the API string, so compare snapshots decoded
+    the same way (models or raw).
+    """
+    encoder = _SCALAR_ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, Enum):
+        return encode_value(value.value)
+    for scalar_type, encoder in _SCALAR_ENCODERS.items():
+        if isinstance(value, scalar_type):
+            return encoder(value)
+    # Nested values; int subclasses such as IntEnum members are written as plain ints.
+    return b"j" + _dump_nested(value).encode("utf-8")
+
+
+@dataclass
+class RecordChange:
+    """
+    一条记录的变更
+
+    ``data`` is the new record for added and updated records and None for
+    deleted ones; ``fields`` names the changed fields of updated records.
+    """
+    data_status: DataChangeStatus
+    key: Key
+    data: Any = None
+    fields: Tuple[str, ...] = ()
+
+
+@dataclass
+class SnapshotDiff:
+    """两个快照之间的差异"""
+    added: List[RecordChange] = field(default_factory=list)
+    updated: List[RecordChange] = field(default_factory=list)
+    deleted: List[RecordChange] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.updated) + len(self.deleted)
+
+    def __iter__(self) -> Iterator[RecordChange]:
+        yield from self.added
+        yield from self.updated
+        yield from self.deleted
+
+
+class Snapshot:
+    """
+    记录指纹快照
+
+    Example::
+
+        baseline = Snapshot.load("identities.snapshot")      # last night's run
+        current = Snapshot.for_model(IdentityInfo)
+        diff = baseline.diff(client.iter_identities(), into=current)
+        for change in diff.updated:
+            print(change.key, change.fields)
+        current.save("identities.snapshot")                  # tonight's baseline
+    """
+
+    def __init__(self, key: Union[str, Sequence[str]], fields: Sequence[str], records: Iterable[Any] = ()):
+        """
+        Args:
+            key (Union[str, Sequence[str]]): Key field, or the fields of a composite key
+            fields (Sequence[str]): Fields compared between snapshots
+            records (Iterable[Any]): Records to add, as models or raw dicts
+        """
+        self.key_fields: Tuple[str, ...] = (key,) if isinstance(key, str) else tuple(key)
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self._fingerprints: Dict[Key, bytes] = {}
+        self.add(records)
+
+    @classmethod
+    def for_model(cls, model_class: Type[BaseModel], key: Optional[Union[str, Sequence[str]]] = None,
+                  ignore: Sequence[str] = (), records: Iterable[Any] = ()) -> "Snapshot":
+        """
+        Create a snapshot comparing every field of a record model.
+
+        Args:
+            model_class (Type[BaseModel]): Record model, e.g. :class:`~cqhyxk.models.IdentityInfo`
+            key (Optional[Union[str, Sequence[str]]]): Key field(s), defaults to :data:`KEY_FIELDS`
+            ignore (Sequence[str]): Fields not compared, e.g. ``["updateTime"]``
+            records (Iterable[Any]): Records to add
+        """
+        if key is None:
+            if model_class not in KEY_FIELDS:
+                raise ValueError(f"No default key for {model_class.__name__}; pass key=")
+            key = KEY_FIELDS[model_class]
+        key_fields = (key,) if isinstance(key, str) else tuple(key)
+        fields = [model_field.alias for model_field in model_class.__fields__.values()
+                  if model_field.alias not in key_fields and model_field.alias not in ignore]
+        return cls(key, fields, records)
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._fingerprints
+
+    def keys(self) -> List[Key]:
+        """Return the keys of the records in the snapshot"""
+        return list(self._fingerprints)
+
+    # ---------------------------------------------------------------- records
+
+    def record_key(self, record: Any) -> Optional[Key]:
+        """Return the key of a record, or None if a key field is missing"""
+        if isinstance(record, dict):
+            parts = tuple(record.get(name) for name in self.key_fields)
+        else:
+            parts = tuple(getattr(record, name, None) for name in self.key_fields)
+        if any(part is None for part in parts):
+            return None
+        return parts[0] if len(parts) == 1 else parts
+
+    def fingerprint(self, record: Any) -> bytes:
+        """Return the concatenated field digests of a record"""
+        values = record if isinstance(record, dict) else record.__dict__
+        digests = []
+        append = digests.append
+        for name in self.fields:
+            value = values.get(name)
+            if value is None:
+                append(_NULL_DIGEST)
+                continue
+            encoder = _SCALAR_ENCODERS.get(type(value))
+            data = encoder(value) if encoder is not None else encode_value(value)
+            append(blake2b(data, digest_size=FIELD_DIGEST_SIZE).digest())
+        return b"".join(digests)
+
+    def add(self, records: Iterable[Any]) -> int:
+        """
+        Add records, replacing earlier records with the same key; returns the number added.
+
+        Records without a key are skipped.
+        """
+        fingerprints = self._fingerprints
+        count = 0
+        for record in records:
+            key = self.record_key(record)
+            if key is not None:
+                fingerprints[key] = self.fingerprint(record)
+                count += 1
+        return count
+
+    def discard(self, key: Key) -> None:
+        """Remove a record"""
+        self._fingerprints.pop(key, None)
+
+    # ------------------------------------------------------------------ diffs
+
+    def changed_fields(self, old: bytes, new: bytes) -> Tuple[str, ...]:
+        """Names of the fields whose digests differ between two fingerprints"""
+        size = FIELD_DIGEST_SIZE
+        return tuple(name for index, name in enumerate(self.fields)
+                     if old[index * size:(index + 1) * size] != new[index * size:(index + 1) * size])
+
+    def changes(self, records: Iterable[Any], into: Optional["Snapshot"] = None) -> Iterator[RecordChange]:
+        """
+        Compare a new listing with this snapshot, yielding its changes as they are found.
+
+        Added and updated records are yielded while ``records`` is read, deleted
+        ones after it is exhausted. A key seen again later in ``records`` (e.g.
+        a record shifted across a page boundary) is compared once. Only the keys
+        of ``records`` are held in memory, not the records.
+
+        Args:
+            records (Iterable[Any]): The new listing, as models or raw dicts
+            into (Optional[Snapshot]): Snapshot receiving the fingerprints of ``records``,
+                to become the next baseline
+        """
+        fingerprints = self._fingerprints
+        seen = set()
+        for record in records:
+            key = self.record_key(record)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            fingerprint = self.fingerprint(record)
+            if into is not None:
+                into._fingerprints[key] = fingerprint
+            old = fingerprints.get(key)
+            if old is None:
+                yield RecordChange(DataChangeStatus.ADDED, key, record)
+            elif old != fingerprint:
+                yield RecordChange(DataChangeStatus.UPDATED, key, record, self.changed_fields(old, fingerprint))
+        for key in fingerprints:
+            if key not in seen:
+                yield RecordChange(DataChangeStatus.DELETED, key)
+
+    def diff(self, records: Iterable[Any], into: Optional["Snapshot"] = None) -> SnapshotDiff:
+        """Compare a new listing with this snapshot, see :meth:`changes`"""
+        result = SnapshotDiff()
+        lists = {
+            DataChangeStatus.ADDED: result.added,
+            DataChangeStatus.UPDATED: result.updated,
+            DataChangeStatus.DELETED: result.deleted,
+        }
+        for change in self.changes(records, into):
+            lists[change.data_status].append(change)
+        return result
+
+    def compare(self, other: "Snapshot") -> SnapshotDiff:
+        """
+        Compare two snapshots; the changes carry keys and changed fields but no records.
+
+        Raises:
+            ValueError: If the snapshots have different keys or fields
+        """
+        if other.key_fields != self.key_fields or other.fields != self.fields:
+            raise ValueError("Snapshots with different keys or fields cannot be compared")
+        result = SnapshotDiff()
+        fingerprints = self._fingerprints
+        for key, fingerprint in other._fingerprints.items():
+            old = fingerprints.get(key)
+            if old is None:
+                result.added.append(RecordChange(DataChangeStatus.ADDED, key))
+            elif old != fingerprint:
+                result.updated.append(RecordChange(DataChangeStatus.UPDATED, key,
+                                                   fields=self.changed_fields(old, fingerprint)))
+        for key in fingerprints:
+            if key not in other._fingerprints:
+                result.deleted.append(RecordChange(DataChangeStatus.DELETED, key))
+        return result
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, path: str) -> None:
+        """
+        Write the snapshot to a file, atomically replacing it.
+
+        The file holds a JSON header line with the key and fields, then one
+        length-prefixed key and fingerprint per record.
+        """
+        header = {"format": SNAPSHOT_FORMAT, "key": list(self.key_fields), "fields": list(self.fields),
+                  "digest_size": FIELD_DIGEST_SIZE}
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+                for key, fingerprint in self._fingerprints.items():
+                    encoded = (key if isinstance(key, str) else _KEY_SEPARATOR.join(key)).encode("utf-8")
+                    f.write(_KEY_LENGTH.pack(len(encoded)))
+                    f.write(encoded)
+                    f.write(fingerprint)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot":
+        """
+        Read a snapshot written by :meth:`save`.
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported format
+        """
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("digest_size") != FIELD_DIGEST_SIZE:
+                raise ValueError(f"Unsupported snapshot file: {path}")
+            snapshot = cls(header["key"], header["fields"])
+            size = FIELD_DIGEST_SIZE * len(snapshot.fields)
+            composite = len(snapshot.key_fields) > 1
+            fingerprints = snapshot._fingerprints
+            while True:
+                prefix = f.read(_KEY_LENGTH.size)
+                if not prefix:
+                    break
+                key = f.read(_KEY_LENGTH.unpack(prefix)[0]).decode("utf-8")
+                fingerprints[tuple(key.split(_KEY_SEPARATOR)) if composite else key] = f.read(size)
+        return snapshot
@@ -0,0 +1,23 @@
+"""
+Environment loading for cqhyxk SDK
+
+The ``.env`` file is loaded when the first client is constructed rather than
+when the package is imported, so importing ``cqhyxk`` neither imports
+python-dotenv nor searches the filesystem.
+"""
+import threading
+
+_lock = threading.Lock()
+_loaded = False
+
+
+def load_env() -> None:
+    """Load environment variables from a ``.env`` file, once per process"""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _loaded = True
@@ -0,0 +1,272 @@
+"""
+Debounced processing of subscription callback events for cqhyxk SDK
+
+Callback events are collected over a short window, their ``dataIds`` are
+deduplicated across events and only the latest change of each entity is kept,
+so an update followed by a delete becomes a single delete. The remaining
+entities are then re-fetched concurrently and handed to a handler in one batch.
+Tag member events are always re-fetched, since their ``dataIds`` are tags
+whose members were added or removed.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .decoding import DECODE_MODEL
+from .exceptions import CqhyxkException
+from .models import (
+    CallbackRequest, DataChangeStatus, EventType, IdentityPageRequest, MemberTagPageRequest
+)
+from .pagination import DEFAULT_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+#: 默认去抖窗口（秒）
+DEFAULT_WINDOW = 1.0
+#: 组织或标签变动超过该数量时，改为一次获取完整列表后本地筛选
+FULL_LIST_THRESHOLD = 20
+#: 重新获取出现意外错误时，一个实体重新排队的最大次数
+MAX_REQUEUES = 3
+
+
+@dataclass
+class EntityChange:
+    """
+    一个实体的最终变动
+
+    ``data`` is the re-fetched entity: :class:`~cqhyxk.models.IdentityInfo`,
+    :class:`~cqhyxk.models.OrgInfoDetail` or :class:`~cqhyxk.models.TagInfo`, or the
+    list of :class:`~cqhyxk.models.MemberTagInfo` of a tag for ``TAG_MEMBER``
+    events. It is None for deletes (except ``TAG_MEMBER``, whose deletes mean
+    members were removed), for entities the API no longer returns, and when
+    fetching failed (``error`` is set).
+    """
+    event_type: EventType
+    data_status: DataChangeStatus
+    data_id: str
+    data: Any = None
+    error: Optional[str] = None
+
+
+def merge_status(previous: Optional[DataChangeStatus], current: DataChangeStatus,
+                 event_type: Optional[EventType] = None) -> DataChangeStatus:
+    """
+    Combine two consecutive changes of one entity.
+
+    An add stays an add when updated, otherwise the latest wins. For
+    ``TAG_MEMBER`` events the status says whether members of the tag were added
+    or removed, not what happened to the tag, so different statuses merge into
+    an update.
+    """
+    if event_type == EventType.TAG_MEMBER:
+        return current if previous is None or previous == current else DataChangeStatus.UPDATED
+    if previous == DataChangeStatus.ADDED and current == DataChangeStatus.UPDATED:
+        return previous
+    return current
+
+
+class EventProcessor:
+    """
+    事件去抖批处理器
+
+    Example::
+
+        def handle(changes):
+            for change in changes:
+                mirror_apply(change)
+
+        with EventProcessor(client, handle, window=2.0) as processor:
+            processor.submit(callback_request)   # from any thread, e.g. a CallbackReceiver consumer
+    """
+
+    def __init__(self, client, handler: Callable[[List[EntityChange]], None], window: float = DEFAULT_WINDOW,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            client (CqhyxkClient): API client used to re-fetch changed entities
+            handler (Callable[[List[EntityChange]], None]): Called with the changes of each window
+            window (float): Seconds to collect events after the first pending one
+            max_workers (int): Maximum number of concurrent re-fetch requests
+        """
+        self.client = client
+        self.handler = handler
+        self.window = window
+        self.max_workers = max_workers
+        self._pending: Dict[Tuple[EventType, str], DataChangeStatus] = {}
+        self._requeues: Dict[Tuple[EventType, str], int] = {}
+        self._first_at: Optional[float] = None
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="cqhyxk-event-processor", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "EventProcessor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def submit(self, event: CallbackRequest) -> None:
+        """Queue a callback event; returns immediately"""
+        cache = getattr(self.client, "cache", None)
+        if cache is not None:
+            cache.invalidate_event(event)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("EventProcessor is closed")
+            pending = self._pending
+            for data_id in event.data_ids:
+                key = (event.event_type, data_id)
+                pending[key] = merge_status(pending.get(key), event.data_status, event.event_type)
+            if pending and self._first_at is None:
+                self._first_at = time.monotonic()
+                self._condition.notify()
+
+    def close(self) -> None:
+        """Process the pending events and stop the background thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _take(self) -> Dict[Tuple[EventType, str], DataChangeStatus]:
+        pending, self._pending, self._first_at = self._pending, {}, None
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._first_at is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._first_at + self.window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                pending = self._take()
+                closed = self._closed
+            if pending:
+                try:
+                    changes = self.process(pending)
+                    if changes:
+                        self.handler(changes)
+                except Exception:
+                    logger.exception("Event handler failed")
+            if closed:
+                return
+
+    def process(self, pending: Dict[Tuple[EventType, str], DataChangeStatus]) -> List[EntityChange]:
+        """
+        Re-fetch the entities of a set of merged changes.
+
+        Args:
+            pending (Dict[Tuple[EventType, str], DataChangeStatus]): Final status per ``(eventType, dataId)``
+
+        Returns:
+            List[EntityChange]: One change per entity
+        """
+        changes = [EntityChange(event_type, status, data_id) for (event_type, data_id), status in pending.items()]
+        to_fetch: Dict[EventType, List[EntityChange]] = {}
+        for change in changes:
+            if change.data_status != DataChangeStatus.DELETED or change.event_type == EventType.TAG_MEMBER:
+                to_fetch.setdefault(change.event_type, []).append(change)
+
+        # Changes whose re-fetch failed with an unexpected error (not a CqhyxkException).
+        failed: List[Tuple[EntityChange, Exception]] = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for event_type, group in to_fetch.items():
+                try:
+                    if event_type == EventType.PERSONNEL:
+                        self._fetch_each(executor, group, self._fetch_identity, failed)
+                    elif event_type == EventType.TAG_MEMBER:
+                        self._fetch_each(executor, group, self._fetch_tag_members, failed)
+                    elif event_type == EventType.ORGANIZATION:
+                        self._fetch_listed(executor, group, self._fetch_orgs, "orgId", failed)
+                    elif event_type == EventType.TAG:
+                        self._fetch_listed(executor, group, self._fetch_tags, "tagId", failed)
+                except Exception as e:
+                    failed.extend((change, e) for change in group)
+
+        requeued = set()
+        for change, error in failed:
+            if self._requeue(change):
+                logger.warning("Re-fetching %s %s failed, requeued: %s", change.event_type, change.data_id, error)
+                requeued.add(id(change))
+            else:
+                change.error = str(error)
+        with self._condition:
+            for change in changes:
+                if id(change) not in requeued:
+                    self._requeues.pop((change.event_type, change.data_id), None)
+        return [change for change in changes if id(change) not in requeued]
+
+    def _requeue(self, change: EntityChange) -> bool:
+        """Put a change back into the pending window, unless closed or requeued too often"""
+        key = (change.event_type, change.data_id)
+        with self._condition:
+            attempts = self._requeues.get(key, 0)
+            if self._closed or attempts >= MAX_REQUEUES:
+                return False
+            self._requeues[key] = attempts + 1
+            # Events that arrived meanwhile are newer than the requeued change.
+            status = change.data_status
+            if key in self._pending:
+                status = merge_status(status, self._pending[key], change.event_type)
+            self._pending[key] = status
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+                self._condition.notify()
+            return True
+
+    @staticmethod
+    def _fetch_each(executor: ThreadPoolExecutor, group: List[EntityChange], fetch: Callable[[str], Any],
+                    failed: List[Tuple[EntityChange, Exception]]) -> None:
+        futures = [(change, executor.submit(fetch, change.data_id)) for change in group]
+        for change, future in futures:
+            try:
+                change.data = future.result()
+            except CqhyxkException as e:
+                change.error = str(e)
+            except Exception as e:
+                failed.append((change, e))
+
+    def _fetch_listed(self, executor: ThreadPoolExecutor, group: List[EntityChange],
+                      fetch: Callable[[Optional[str]], List[Any]], id_field: str,
+                      failed: List[Tuple[EntityChange, Exception]]) -> None:
+        if len(group) > FULL_LIST_THRESHOLD:
+            # One full list is cheaper than many filtered requests.
+            try:
+                items = {getattr(item, id_field): item for item in fetch(None)}
+            except CqhyxkException as e:
+                for change in group:
+                    change.error = str(e)
+                return
+            for change in group:
+                change.data = items.get(change.data_id)
+            return
+        self._fetch_each(executor, group, lambda data_id: self._find(fetch(data_id), id_field, data_id), failed)
+
+    @staticmethod
+    def _find(items: Iterable[Any], id_field: str, data_id: str) -> Any:
+        return next((item for item in items if getattr(item, id_field) == data_id), None)
+
+    def _fetch_identity(self, source_user_id: str) -> Any:
+        response = self.client.get_identity_list(IdentityPageRequest(current=0, size=1, sourceUserId=source_user_id),
+                                                decode=DECODE_MODEL)
+        content = response.data.content if response.data else None
+        return self._find(content or (), "sourceUserId", source_user_id)
+
+    def _fetch_tag_members(self, tag_id: str) -> List[Any]:
+        return list(self.client.iter_member_tags(MemberTagPageRequest(tagId=tag_id), decode=DECODE_MODEL))
+
+    def _fetch_orgs(self, org_id: Optional[str]) -> List[Any]:
+        response = self.client.get_org_list(org_id=org_id, decode=DECODE_MODEL)
+        return (response.data.content if response.data else None) or []
+
+    def _fetch_tags(self, tag_id: Optional[str]) -> List[Any]:
+        response = self.client.get_tag_list(tag_id=tag_id, decode=DECODE_MODEL)
+        return (response.data.content if response.data else None) or []
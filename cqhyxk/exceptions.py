@@ -1,6 +1,10 @@
 """
 Custom exceptions for the cqhyxk SDK
 """
+from typing import Any, Dict
+
+#: 请求成功状态码
+SUCCESS_CODE = '00000000'
 
 
 class CqhyxkException(Exception):
@@ -27,4 +31,33 @@ class APIError(CqhyxkException):
 
 class RequestError(CqhyxkException):
     """Raised when there is an error making a request"""
-    pass
\ No newline at end of file
+    pass
+
+
+class DeadlineExceeded(RequestError):
+    """Raised when the deadline budget of a call or scan runs out"""
+    pass
+
+
+def check_response_data(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check the common response structure and return it unchanged.
+
+    Raises:
+        APIError: If the API returns an error code
+    """
+    # Check for API error codes
+    if data.get('code') != SUCCESS_CODE:
+        message = data.get('message', 'Unknown error')
+        # Safely handle potential Unicode encoding issues in error messages
+        try:
+            message = str(message)
+        except UnicodeError:
+            message = message.encode('utf-8', errors='ignore').decode('utf-8')
+
+        raise APIError(
+            message=message,
+            code=data.get('code')
+        )
+
+    return data
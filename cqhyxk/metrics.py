@@ -0,0 +1,202 @@
+"""
+Request metrics for cqhyxk SDK
+
+The clients report, per endpoint:
+
+- ``requests``, ``retries`` and ``errors`` counters (errors labelled by
+  ``APIError.code``, ``http_<status>`` or the exception name),
+- ``coalesced`` counter of calls served by another caller's in-flight request,
+- ``response_bytes`` counter,
+- ``network``, ``json_decode`` and ``model`` latency histograms in seconds,
+  i.e. time spent waiting for the platform and the network, parsing JSON and
+  building response models.
+
+Metrics go to a :class:`MetricsSink`. :class:`InMemoryMetrics` is the default
+sink; it can be dumped as a dict or scraped in the Prometheus text format.
+"""
+import bisect
+import json
+import threading
+from typing import Any, Dict, IO, List, Optional, Sequence, Tuple
+
+#: 计数器名称
+METRIC_REQUESTS = "requests"
+METRIC_RETRIES = "retries"
+METRIC_ERRORS = "errors"
+METRIC_RESPONSE_BYTES = "response_bytes"
+METRIC_COALESCED = "coalesced"
+
+#: 耗时直方图名称
+METRIC_NETWORK = "network"
+METRIC_JSON_DECODE = "json_decode"
+METRIC_MODEL = "model"
+
+#: 默认直方图桶上界（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class MetricsSink:
+    """
+    指标接收器
+
+    Base class of metrics sinks. It discards everything, so it can also be passed
+    to a client to turn metrics off. Implementations must be thread-safe.
+    """
+
+    def increment(self, endpoint: str, name: str, value: int = 1, label: Optional[str] = None) -> None:
+        """Add ``value`` to a counter"""
+
+    def observe(self, endpoint: str, name: str, seconds: float) -> None:
+        """Record one duration in a histogram"""
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum", "min", "max")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+
+class InMemoryMetrics(MetricsSink):
+    """
+    内存指标
+
+    Example::
+
+        metrics = InMemoryMetrics()
+        client = CqhyxkClient(metrics=metrics)
+        ...
+        print(metrics.percentile("/open-api/member/identity/page", "network", 0.99))
+        metrics.dump(sys.stdout)
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            buckets (Sequence[float]): Ascending upper bounds of the histogram buckets in seconds
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, str, Optional[str]], int] = {}
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+
+    def increment(self, endpoint: str, name: str, value: int = 1, label: Optional[str] = None) -> None:
+        key = (endpoint, name, label)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, endpoint: str, name: str, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get((endpoint, name))
+            if histogram is None:
+                histogram = self._histograms[(endpoint, name)] = _Histogram(len(self.buckets) + 1)
+            histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            if seconds < histogram.min:
+                histogram.min = seconds
+            if seconds > histogram.max:
+                histogram.max = seconds
+
+    def reset(self) -> None:
+        """Discard all recorded metrics"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def counter(self, endpoint: str, name: str, label: Optional[str] = None) -> int:
+        """Return a counter value"""
+        with self._lock:
+            return self._counters.get((endpoint, name, label), 0)
+
+    def percentile(self, endpoint: str, name: str, q: float) -> Optional[float]:
+        """
+        Estimate a quantile of a histogram, or None if it is empty.
+
+        The result is interpolated linearly within the bucket holding the quantile.
+
+        Args:
+            q (float): Quantile between 0 and 1, e.g. 0.99
+        """
+        with self._lock:
+            histogram = self._histograms.get((endpoint, name))
+            if histogram is None:
+                return None
+            return self._quantile(histogram, q)
+
+    def _quantile(self, histogram: _Histogram, q: float) -> Optional[float]:
+        if not histogram.count:
+            return None
+        rank = q * histogram.count
+        seen = 0
+        for index, count in enumerate(histogram.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else histogram.max
+                lower, upper = max(lower, histogram.min), min(upper, histogram.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return histogram.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return all metrics grouped by endpoint::
+
+            {endpoint: {"counters": {name or "name{label}": value},
+                        "histograms": {name: {"count", "sum", "min", "max", "p50", "p90", "p99"}}}}
+        """
+        result: Dict[str, Any] = {}
+
+        def group(endpoint: str) -> Dict[str, Any]:
+            return result.setdefault(endpoint, {"counters": {}, "histograms": {}})
+
+        with self._lock:
+            for (endpoint, name, label), value in sorted(self._counters.items(), key=lambda item: tuple(map(str, item[0]))):
+                group(endpoint)["counters"][f"{name}{{{label}}}" if label is not None else name] = value
+            for (endpoint, name), histogram in sorted(self._histograms.items()):
+                summary = {"count": histogram.count, "sum": histogram.sum, "min": histogram.min, "max": histogram.max}
+                for q in (0.5, 0.9, 0.99):
+                    summary[f"p{int(q * 100)}"] = self._quantile(histogram, q)
+                group(endpoint)["histograms"][name] = summary
+        return result
+
+    def dump(self, fp: IO[str]) -> None:
+        """Write :meth:`snapshot` as JSON"""
+        json.dump(self.snapshot(), fp, indent=2, ensure_ascii=False)
+        fp.write("\n")
+
+    def to_prometheus(self, prefix: str = "cqhyxk") -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items(), key=lambda item: tuple(map(str, item[0])))
+            histograms = [(key, list(h.counts), h.count, h.sum) for key, h in sorted(self._histograms.items())]
+        for (endpoint, name, label), value in counters:
+            labels = f'endpoint="{endpoint}"' + (f',code="{label}"' if label is not None else "")
+            lines.append(f"{prefix}_{name}_total{{{labels}}} {value}")
+        for (endpoint, name), counts, count, total in histograms:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{prefix}_{name}_seconds_bucket{{endpoint="{endpoint}",le="{le}"}} {cumulative}')
+            lines.append(f'{prefix}_{name}_seconds_sum{{endpoint="{endpoint}"}} {total}')
+            lines.append(f'{prefix}_{name}_seconds_count{{endpoint="{endpoint}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def error_label(error: BaseException) -> str:
+    """Label of an error: the ``APIError.code``, ``http_<status>`` for HTTP status errors, or the exception name"""
+    code = getattr(error, "code", None)
+    if code is not None:
+        return str(code)
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        return f"http_{status}"
+    return type(error).__name__
@@ -0,0 +1,331 @@
+"""
+Local SQLite mirror for cqhyxk SDK
+
+:class:`LocalMirror` persists identities, organizations, tags and tag
+memberships into SQLite so that frequent lookups are served locally instead of
+over the network. Records are stored as their JSON form next to indexed key
+columns, and queries return the same Pydantic models as the client.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Union
+
+from .decoding import DECODE_MODEL, construct_model
+from .models import IdentityInfo, MemberTagInfo, OrgInfoDetail, TagInfo
+from .pagination import format_update_time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS identities (
+    sourceUserId TEXT PRIMARY KEY,
+    entityType INTEGER,
+    status INTEGER,
+    mainOrgId TEXT,
+    updateTime TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_identities_entityType ON identities (entityType);
+CREATE INDEX IF NOT EXISTS idx_identities_updateTime ON identities (updateTime);
+
+CREATE TABLE IF NOT EXISTS identity_orgs (
+    sourceUserId TEXT NOT NULL,
+    orgId TEXT NOT NULL,
+    PRIMARY KEY (sourceUserId, orgId)
+);
+CREATE INDEX IF NOT EXISTS idx_identity_orgs_orgId ON identity_orgs (orgId);
+
+CREATE TABLE IF NOT EXISTS orgs (
+    orgId TEXT PRIMARY KEY,
+    sourceOrgId TEXT,
+    parentOrgId TEXT,
+    orgType INTEGER,
+    updateTime TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_orgs_sourceOrgId ON orgs (sourceOrgId);
+CREATE INDEX IF NOT EXISTS idx_orgs_parentOrgId ON orgs (parentOrgId);
+CREATE INDEX IF NOT EXISTS idx_orgs_updateTime ON orgs (updateTime);
+
+CREATE TABLE IF NOT EXISTS tags (
+    tagId TEXT PRIMARY KEY,
+    entityType INTEGER,
+    updateTime TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tags_entityType ON tags (entityType);
+CREATE INDEX IF NOT EXISTS idx_tags_updateTime ON tags (updateTime);
+
+CREATE TABLE IF NOT EXISTS member_tags (
+    sourceUserId TEXT NOT NULL,
+    tagId TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (sourceUserId, tagId)
+);
+CREATE INDEX IF NOT EXISTS idx_member_tags_tagId ON member_tags (tagId);
+"""
+
+
+def _int(value) -> Optional[int]:
+    return int(value) if value is not None else None
+
+
+def _time(value: Optional[datetime]) -> Optional[str]:
+    return format_update_time(value) if value is not None else None
+
+
+class LocalMirror:
+    """
+    SQLite mirror of identities, organizations, tags and tag memberships.
+
+    One instance may be shared across threads; access to the connection is
+    serialized by a lock. Writes are batched into one transaction per call, or
+    per page when driven by :meth:`sync`.
+
+    Example::
+
+        mirror = LocalMirror("directory.db")
+        mirror.fill(client)                      # initial full scan
+        mirror.sync(SyncEngine(client, store))   # later: updateTime deltas
+        identity = mirror.get_identity("2021001")
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path (str): SQLite database path, ``:memory:`` for an in-memory mirror
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "LocalMirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def commit(self) -> None:
+        """Commit pending writes"""
+        with self._lock:
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ writes
+
+    def upsert_identities(self, identities: Iterable[IdentityInfo], commit: bool = True) -> int:
+        """Insert or replace identities, returning the number written"""
+        count = 0
+        with self._lock:
+            for identity in identities:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO identities VALUES (?, ?, ?, ?, ?, ?)",
+                    (identity.sourceUserId, _int(identity.entityType), _int(identity.status),
+                     identity.mainOrg.orgId if identity.mainOrg else None,
+                     _time(identity.updateTime), identity.json())
+                )
+                self._conn.execute("DELETE FROM identity_orgs WHERE sourceUserId = ?", (identity.sourceUserId,))
+                org_ids = {org.orgId for org in identity.orgList or [] if org.orgId}
+                if identity.mainOrg and identity.mainOrg.orgId:
+                    org_ids.add(identity.mainOrg.orgId)
+                self._conn.executemany(
+                    "INSERT INTO identity_orgs VALUES (?, ?)",
+                    [(identity.sourceUserId, org_id) for org_id in org_ids]
+                )
+                count += 1
+            if commit:
+                self._conn.commit()
+        return count
+
+    def upsert_orgs(self, orgs: Iterable[OrgInfoDetail], commit: bool = True) -> int:
+        """Insert or replace organizations, returning the number written"""
+        with self._lock:
+            cursor = self._conn.executemany(
+                "INSERT OR REPLACE INTO orgs VALUES (?, ?, ?, ?, ?, ?)",
+                ((org.orgId, org.sourceOrgId, org.parentOrgId, _int(org.orgType), _time(org.updateTime), org.json())
+                 for org in orgs)
+            )
+            if commit:
+                self._conn.commit()
+            return cursor.rowcount
+
+    def upsert_tags(self, tags: Iterable[TagInfo], commit: bool = True) -> int:
+        """Insert or replace tags, returning the number written"""
+        with self._lock:
+            cursor = self._conn.executemany(
+                "INSERT OR REPLACE INTO tags VALUES (?, ?, ?, ?)",
+                ((tag.tagId, _int(tag.entityType), _time(tag.updateTime), tag.json()) for tag in tags)
+            )
+            if commit:
+                self._conn.commit()
+            return cursor.rowcount
+
+    def upsert_member_tags(self, member_tags: Iterable[MemberTagInfo], commit: bool = True) -> int:
+        """Insert or replace tag memberships, returning the number written"""
+        with self._lock:
+            cursor = self._conn.executemany(
+                "INSERT OR REPLACE INTO member_tags VALUES (?, ?, ?)",
+                ((member.sourceUserId, member.tagId, member.json()) for member in member_tags)
+            )
+            if commit:
+                self._conn.commit()
+            return cursor.rowcount
+
+    def delete_identities(self, source_user_ids: Iterable[str]) -> None:
+        """Delete identities and their organization links"""
+        rows = [(source_user_id,) for source_user_id in source_user_ids]
+        with self._lock:
+            self._conn.executemany("DELETE FROM identities WHERE sourceUserId = ?", rows)
+            self._conn.executemany("DELETE FROM identity_orgs WHERE sourceUserId = ?", rows)
+            self._conn.commit()
+
+    def delete_orgs(self, org_ids: Iterable[str]) -> None:
+        """Delete organizations"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM orgs WHERE orgId = ?", [(org_id,) for org_id in org_ids])
+            self._conn.commit()
+
+    def delete_tags(self, tag_ids: Iterable[str]) -> None:
+        """Delete tags together with their memberships"""
+        rows = [(tag_id,) for tag_id in tag_ids]
+        with self._lock:
+            self._conn.executemany("DELETE FROM tags WHERE tagId = ?", rows)
+            self._conn.executemany("DELETE FROM member_tags WHERE tagId = ?", rows)
+            self._conn.commit()
+
+    def replace_tag_members(self, tag_id: str, member_tags: Iterable[MemberTagInfo]) -> int:
+        """Replace all memberships of a tag, e.g. after a tag member change event"""
+        with self._lock:
+            self._conn.execute("DELETE FROM member_tags WHERE tagId = ?", (tag_id,))
+            return self.upsert_member_tags(member_tags)
+
+    # ---------------------------------------------------------------- filling
+
+    def fill(self, client, page_size: Optional[int] = None) -> None:
+        """
+        Fill the mirror from a full scan of identities, organizations, tags and memberships.
+
+        Args:
+            client (CqhyxkClient): API client
+            page_size (Optional[int]): Page size of the identity and membership scans
+        """
+        kwargs = {"page_size": page_size} if page_size else {}
+        kwargs["decode"] = DECODE_MODEL
+        orgs = client.get_org_list(decode=DECODE_MODEL)
+        self.upsert_orgs((orgs.data.content if orgs.data else None) or [])
+        tags = client.get_tag_list(decode=DECODE_MODEL)
+        self.upsert_tags((tags.data.content if tags.data else None) or [])
+        self.upsert_identities(client.iter_identities(**kwargs))
+        self.upsert_member_tags(client.iter_member_tags(**kwargs))
+
+    def sync(self, engine) -> list:
+        """
+        Apply updateTime deltas from a :class:`~cqhyxk.sync.SyncEngine`.
+
+        Each page is committed before the engine saves its progress, so the mirror
+        and the checkpoint never diverge after a crash. Memberships removed on the
+        platform are not reported by deltas; use :meth:`replace_tag_members` for
+        tag member change events.
+
+        Returns:
+            list: The :class:`~cqhyxk.sync.SyncResult` of every resource
+        """
+        return [
+            engine.sync_orgs(lambda org: self.upsert_orgs([org], commit=False), flush=self.commit),
+            engine.sync_tags(lambda tag: self.upsert_tags([tag], commit=False), flush=self.commit),
+            engine.sync_identities(lambda identity: self.upsert_identities([identity], commit=False), flush=self.commit),
+            engine.sync_member_tags(lambda member: self.upsert_member_tags([member], commit=False), flush=self.commit),
+        ]
+
+    # ---------------------------------------------------------------- queries
+
+    def _query(self, model, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        # Rows were validated when written, so rebuild them without validation.
+        return [construct_model(model, json.loads(row[0])) for row in rows]
+
+    def get_identity(self, source_user_id: str) -> Optional[IdentityInfo]:
+        """根据学工号获取人员身份信息"""
+        result = self._query(IdentityInfo, "SELECT data FROM identities WHERE sourceUserId = ?", (source_user_id,))
+        return result[0] if result else None
+
+    def find_identities(self, org_id: Optional[str] = None, entity_type: Optional[int] = None,
+                        updated_since: Optional[Union[datetime, str]] = None, limit: Optional[int] = None) -> List[IdentityInfo]:
+        """
+        查询人员身份信息
+
+        Args:
+            org_id (Optional[str]): 所属组织 id（orgList 或 mainOrg）
+            entity_type (Optional[int]): 身份类型
+            updated_since (Optional[Union[datetime, str]]): 更新时间下限（包含）
+            limit (Optional[int]): 返回数量上限
+        """
+        sql = "SELECT i.data FROM identities i"
+        clauses, params = [], []
+        if org_id is not None:
+            sql += " JOIN identity_orgs o ON o.sourceUserId = i.sourceUserId"
+            clauses.append("o.orgId = ?")
+            params.append(org_id)
+        if entity_type is not None:
+            clauses.append("i.entityType = ?")
+            params.append(int(entity_type))
+        if updated_since is not None:
+            clauses.append("i.updateTime >= ?")
+            params.append(updated_since if isinstance(updated_since, str) else format_update_time(updated_since))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(IdentityInfo, sql, tuple(params))
+
+    def get_org(self, org_id: str) -> Optional[OrgInfoDetail]:
+        """根据组织 id 获取组织"""
+        result = self._query(OrgInfoDetail, "SELECT data FROM orgs WHERE orgId = ?", (org_id,))
+        return result[0] if result else None
+
+    def get_org_by_source_id(self, source_org_id: str) -> Optional[OrgInfoDetail]:
+        """根据组织原编码获取组织"""
+        result = self._query(OrgInfoDetail, "SELECT data FROM orgs WHERE sourceOrgId = ?", (source_org_id,))
+        return result[0] if result else None
+
+    def list_orgs(self, parent_org_id: Optional[str] = None) -> List[OrgInfoDetail]:
+        """获取组织列表，可按父组织 id 筛选"""
+        if parent_org_id is None:
+            return self._query(OrgInfoDetail, "SELECT data FROM orgs")
+        return self._query(OrgInfoDetail, "SELECT data FROM orgs WHERE parentOrgId = ?", (parent_org_id,))
+
+    def get_tag(self, tag_id: str) -> Optional[TagInfo]:
+        """根据标签 id 获取标签"""
+        result = self._query(TagInfo, "SELECT data FROM tags WHERE tagId = ?", (tag_id,))
+        return result[0] if result else None
+
+    def list_tags(self, entity_type: Optional[int] = None) -> List[TagInfo]:
+        """获取标签列表，可按实体类型筛选"""
+        if entity_type is None:
+            return self._query(TagInfo, "SELECT data FROM tags")
+        return self._query(TagInfo, "SELECT data FROM tags WHERE entityType = ?", (int(entity_type),))
+
+    def get_member_tags(self, source_user_id: Optional[str] = None, tag_id: Optional[str] = None) -> List[MemberTagInfo]:
+        """查询人员标签关系，可按学工号和/或标签 id 筛选"""
+        clauses, params = [], []
+        if source_user_id is not None:
+            clauses.append("sourceUserId = ?")
+            params.append(source_user_id)
+        if tag_id is not None:
+            clauses.append("tagId = ?")
+            params.append(tag_id)
+        sql = "SELECT data FROM member_tags"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._query(MemberTagInfo, sql, tuple(params))
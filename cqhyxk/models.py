@@ -1,17 +1,34 @@
 """
 Pydantic models for cqhyxk API
 """
+import binascii
 from datetime import datetime
 from enum import IntEnum
-from typing import List, Optional, Dict, Any, Union
+from typing import BinaryIO, List, Optional, Dict, Any, Union
 from pydantic import BaseModel, Field
 
+#: 分块解码 Base64 照片时每块的字符数（4 的倍数）
+IMAGE_DECODE_CHUNK_SIZE = 64 * 1024
+
+
+#: 枚举值查找表缓存（枚举类 -> {值: 成员}）
+_ENUM_LOOKUPS: Dict[type, Dict[int, IntEnum]] = {}
+
+
+def enum_lookup(enum_class: IntEnum) -> Dict[int, IntEnum]:
+    """Return the precomputed value-to-member lookup table of an enum class"""
+    table = _ENUM_LOOKUPS.get(enum_class)
+    if table is None:
+        table = {member.value: member for member in enum_class}
+        _ENUM_LOOKUPS[enum_class] = table
+    return table
+
 
 def validate_enum(value: int, enum_class: IntEnum) -> Union[IntEnum, int]:
     """Validate enum value, return as enum if valid, otherwise return raw value"""
     try:
-        return enum_class(value)
-    except ValueError:
+        return enum_lookup(enum_class).get(value, value)
+    except TypeError:
         return value
 
 
@@ -214,6 +231,12 @@ class CommonResponse(BaseModel):
     data: Optional[Dict[str, Any]] = Field(None, description="响应数据，根据接口不同返回不同结构")
 
 
+class PageInfo(BaseModel):
+    """分页信息"""
+    total: Optional[int] = Field(None, description="总数")
+    size: Optional[int] = Field(None, description="返回结果数量")
+
+
 class PageRequest(BaseModel):
     """分页请求基类"""
     current: Optional[int] = Field(None, description="当前页")
@@ -281,9 +304,11 @@ class IdentityPageRequest(PageRequest):
 
 class IdentityPageResponseData(BaseModel):
     """人员身份信息分页响应数据"""
-    total: Optional[int] = Field(None, description="总数")
-    size: Optional[int] = Field(None, description="返回结果数量")
+    page: Optional[PageInfo] = Field(None, description="分页信息")
+    total: Optional[int] = Field(None, description="总数（未嵌套在 page 中时）")
+    size: Optional[int] = Field(None, description="返回结果数量（未嵌套在 page 中时）")
     content: Optional[List[IdentityInfo]] = Field(None, description="查询结果")
+    empty: Optional[bool] = Field(None, description="空标识")
 
 
 class IdentityPageResponse(CommonResponse):
@@ -301,6 +326,72 @@ class FacePhoto(BaseModel):
     class Config:
         json_encoders = {datetime: lambda v: v.isoformat() if v else None}
 
+    def _base64_text(self) -> str:
+        text = self.imageBase64
+        if text is None:
+            raise ValueError("imageBase64 is not available (missing or already released)")
+        if "\n" in text or "\r" in text or " " in text:
+            text = "".join(text.split())
+        return text
+
+    def image_header(self, size: int = 16) -> bytes:
+        """Decode only the first ``size`` bytes of the photo, e.g. to detect its format"""
+        text = self._base64_text()
+        return binascii.a2b_base64(text[:(size + 2) // 3 * 4])[:size]
+
+    def image_bytes(self, release: bool = False) -> bytes:
+        """
+        Decode the photo on demand.
+
+        Args:
+            release (bool): Drop the base64 text after decoding so only the bytes stay alive
+        """
+        data = binascii.a2b_base64(self._base64_text())
+        if release:
+            self.release_image()
+        return data
+
+    def write_image(self, fp: Union[str, BinaryIO], release: bool = True,
+                    chunk_size: int = IMAGE_DECODE_CHUNK_SIZE) -> int:
+        """
+        Stream the decoded photo into a file path or binary file object.
+
+        The base64 text is decoded in chunks, so no full-size bytes copy is
+        created next to it.
+
+        Args:
+            fp (Union[str, BinaryIO]): File path or object with a ``write`` method
+            release (bool): Drop the base64 text once it has been written
+            chunk_size (int): Base64 characters decoded per chunk, rounded down to a multiple of 4
+
+        Returns:
+            int: Number of bytes written
+        """
+        text = self._base64_text()
+        step = max(4, chunk_size - chunk_size % 4)
+        if isinstance(fp, str):
+            with open(fp, "wb") as f:
+                written = self._write_chunks(text, f, step)
+        else:
+            written = self._write_chunks(text, fp, step)
+        text = None
+        if release:
+            self.release_image()
+        return written
+
+    @staticmethod
+    def _write_chunks(text: str, fp: BinaryIO, step: int) -> int:
+        written = 0
+        for start in range(0, len(text), step):
+            chunk = binascii.a2b_base64(text[start:start + step])
+            fp.write(chunk)
+            written += len(chunk)
+        return written
+
+    def release_image(self) -> None:
+        """Drop the base64 text to free its memory; ``faceId`` and the other fields are kept"""
+        self.imageBase64 = None
+
 
 class FacePhotosResponseData(BaseModel):
     """人脸照片响应数据"""
@@ -391,8 +482,9 @@ class MemberTagInfo(BaseModel):
 
 class MemberTagPageResponseData(BaseModel):
     """人员标签关系分页响应数据"""
-    total: Optional[int] = Field(None, description="总数")
-    size: Optional[int] = Field(None, description="返回结果数量")
+    page: Optional[PageInfo] = Field(None, description="分页信息")
+    total: Optional[int] = Field(None, description="总数（未嵌套在 page 中时）")
+    size: Optional[int] = Field(None, description="返回结果数量（未嵌套在 page 中时）")
     content: Optional[List[MemberTagInfo]] = Field(None, description="查询结果")
     empty: Optional[bool] = Field(None, description="空标识")
 
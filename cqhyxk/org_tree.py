@@ -0,0 +1,167 @@
+"""
+Organization tree index for cqhyxk SDK
+"""
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from .decoding import DECODE_MODEL
+from .models import OrgInfoDetail, OrgType
+
+
+class OrgTree:
+    """
+    In-memory organization hierarchy built from :meth:`CqhyxkClient.get_org_list`.
+
+    The tree is built in one pass over the flat list. Parents are resolved by
+    ``parentOrgId`` and, when that is missing, by ``sourceParentOrgId``.
+    Organizations whose parent is not in the list are roots. Parent, children
+    and id lookups are O(1); ancestor and subtree walks are proportional to the
+    number of organizations visited.
+
+    Example::
+
+        tree = OrgTree.from_client(client)
+        college = tree.get_by_source_id("source001")
+        org_ids = tree.subtree_ids(college.orgId)
+    """
+
+    def __init__(self, orgs: Iterable[OrgInfoDetail]):
+        """
+        Args:
+            orgs (Iterable[OrgInfoDetail]): Organizations, e.g. ``get_org_list().data.content``
+        """
+        self._by_id: Dict[str, OrgInfoDetail] = {}
+        self._by_source_id: Dict[str, OrgInfoDetail] = {}
+        self._parent: Dict[str, str] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._roots: List[str] = []
+
+        for org in orgs:
+            if org.orgId is None:
+                continue
+            self._by_id[org.orgId] = org
+            if org.sourceOrgId is not None:
+                self._by_source_id[org.sourceOrgId] = org
+
+        for org_id, org in self._by_id.items():
+            parent = self._by_id.get(org.parentOrgId) if org.parentOrgId is not None else None
+            if parent is None and org.sourceParentOrgId is not None:
+                parent = self._by_source_id.get(org.sourceParentOrgId)
+            if parent is None or parent.orgId == org_id:
+                self._roots.append(org_id)
+            else:
+                self._parent[org_id] = parent.orgId
+                self._children.setdefault(parent.orgId, []).append(org_id)
+
+    @classmethod
+    def from_client(cls, client, physical: Optional[str] = None, internal: Optional[str] = None) -> "OrgTree":
+        """
+        Build the tree from :meth:`CqhyxkClient.get_org_list`.
+
+        Args:
+            client (CqhyxkClient): API client
+            physical (Optional[str]): Passed to ``get_org_list``
+            internal (Optional[str]): Passed to ``get_org_list``
+        """
+        response = client.get_org_list(physical=physical, internal=internal, decode=DECODE_MODEL)
+        return cls(response.data.content if response.data and response.data.content else [])
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, org_id: str) -> bool:
+        return org_id in self._by_id
+
+    def __iter__(self) -> Iterator[OrgInfoDetail]:
+        return iter(self._by_id.values())
+
+    def _resolve(self, org: Union[str, OrgInfoDetail]) -> Optional[str]:
+        """Return the orgId of an organization given as orgId, sourceOrgId or model"""
+        if isinstance(org, OrgInfoDetail):
+            return org.orgId
+        if org in self._by_id:
+            return org
+        found = self._by_source_id.get(org)
+        return found.orgId if found is not None else None
+
+    def get(self, org_id: str) -> Optional[OrgInfoDetail]:
+        """根据组织编码（orgId）获取组织"""
+        return self._by_id.get(org_id)
+
+    def get_by_source_id(self, source_org_id: str) -> Optional[OrgInfoDetail]:
+        """根据组织原编码（sourceOrgId）获取组织"""
+        return self._by_source_id.get(source_org_id)
+
+    @property
+    def roots(self) -> List[OrgInfoDetail]:
+        """没有上级组织的组织"""
+        return [self._by_id[org_id] for org_id in self._roots]
+
+    def parent(self, org: Union[str, OrgInfoDetail]) -> Optional[OrgInfoDetail]:
+        """获取上级组织，org 可为 orgId、sourceOrgId 或组织对象"""
+        parent_id = self._parent.get(self._resolve(org))
+        return self._by_id[parent_id] if parent_id is not None else None
+
+    def children(self, org: Union[str, OrgInfoDetail]) -> List[OrgInfoDetail]:
+        """获取直接下级组织，org 可为 orgId、sourceOrgId 或组织对象"""
+        return [self._by_id[child_id] for child_id in self._children.get(self._resolve(org), ())]
+
+    def ancestors(self, org: Union[str, OrgInfoDetail]) -> Iterator[OrgInfoDetail]:
+        """由近及远遍历全部上级组织"""
+        org_id = self._resolve(org)
+        visited = {org_id}
+        parent_id = self._parent.get(org_id)
+        while parent_id is not None and parent_id not in visited:
+            visited.add(parent_id)
+            yield self._by_id[parent_id]
+            parent_id = self._parent.get(parent_id)
+
+    def descendants(self, org: Union[str, OrgInfoDetail], include_self: bool = False) -> Iterator[OrgInfoDetail]:
+        """按层级（广度优先）遍历全部下级组织"""
+        org_id = self._resolve(org)
+        if org_id is None:
+            return
+        if include_self:
+            yield self._by_id[org_id]
+        queue = deque(self._children.get(org_id, ()))
+        while queue:
+            child_id = queue.popleft()
+            yield self._by_id[child_id]
+            queue.extend(self._children.get(child_id, ()))
+
+    def subtree_ids(self, org: Union[str, OrgInfoDetail]) -> Set[str]:
+        """获取组织及其全部下级组织的 orgId 集合"""
+        return {item.orgId for item in self.descendants(org, include_self=True)}
+
+    def is_ancestor(self, ancestor: Union[str, OrgInfoDetail], org: Union[str, OrgInfoDetail]) -> bool:
+        """判断 ancestor 是否为 org 的上级组织"""
+        ancestor_id = self._resolve(ancestor)
+        return any(item.orgId == ancestor_id for item in self.ancestors(org))
+
+    def filter(self, org_type: Optional[Union[OrgType, int, Iterable[Union[OrgType, int]]]] = None,
+               physical: Optional[bool] = None, internal: Optional[bool] = None,
+               root: Optional[Union[str, OrgInfoDetail]] = None) -> Iterator[OrgInfoDetail]:
+        """
+        按条件筛选组织
+
+        Args:
+            org_type: 组织类型，可为单个值或多个值
+            physical (Optional[bool]): 是否实体组织
+            internal (Optional[bool]): 是否校内组织
+            root: 仅在该组织的子树（含自身）内筛选
+        """
+        if org_type is None:
+            org_types = None
+        elif isinstance(org_type, int):
+            org_types = {int(org_type)}
+        else:
+            org_types = {int(item) for item in org_type}
+        orgs = self.descendants(root, include_self=True) if root is not None else iter(self)
+        for org in orgs:
+            if org_types is not None and (org.orgType is None or int(org.orgType) not in org_types):
+                continue
+            if physical is not None and org.physical != physical:
+                continue
+            if internal is not None and org.internal != internal:
+                continue
+            yield org
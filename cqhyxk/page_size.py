@@ -0,0 +1,134 @@
+"""
+Adaptive page size for cqhyxk SDK
+
+:class:`AdaptivePageSize` tunes ``PageRequest.size`` during a scan from the
+measured latency and response size of each page and from the failure rate:
+it doubles the size while pages are fast and small, halves it when a page is
+slow or large, and halves it and retries when a page fails. Sizes are powers
+of two so that every page boundary stays aligned when the size changes.
+"""
+import threading
+from typing import Optional
+
+#: 默认页面大小下限
+DEFAULT_MIN_PAGE_SIZE = 16
+#: 默认页面大小上限
+DEFAULT_MAX_PAGE_SIZE = 1024
+#: 默认单页目标耗时（秒）
+DEFAULT_TARGET_LATENCY = 2.0
+#: 默认单页最大响应字节数
+DEFAULT_MAX_PAGE_BYTES = 8 * 1024 * 1024
+#: 失败率的指数移动平均权重
+ERROR_RATE_WEIGHT = 0.2
+#: 失败率高于该值时不再增大页面
+MAX_GROWTH_ERROR_RATE = 0.05
+
+
+def floor_power_of_two(value: int) -> int:
+    """Largest power of two not greater than ``value`` (at least 1)"""
+    return 1 << (max(1, value).bit_length() - 1)
+
+
+class AdaptivePageSize:
+    """
+    自适应页面大小
+
+    Thread-safe. One instance keeps what it learned across scans, so it can be
+    reused for later scans of the same endpoint.
+
+    Example::
+
+        adaptive = AdaptivePageSize(min_size=32, max_size=2048, target_latency=1.0)
+        for identity in client.iter_identities(adaptive=adaptive):
+            ...
+        print(adaptive.size)
+    """
+
+    def __init__(self, initial: int = 128, min_size: int = DEFAULT_MIN_PAGE_SIZE, max_size: int = DEFAULT_MAX_PAGE_SIZE,
+                 target_latency: float = DEFAULT_TARGET_LATENCY, max_bytes: int = DEFAULT_MAX_PAGE_BYTES):
+        """
+        Args:
+            initial (int): First page size; all sizes are rounded down to powers of two
+            min_size (int): Smallest page size
+            max_size (int): Largest page size, e.g. the platform's limit
+            target_latency (float): Seconds a page may take; slower pages halve the size and pages
+                faster than half of it double the size
+            max_bytes (int): Response bytes a page may take, with the same rule as ``target_latency``
+        """
+        self.min_size = floor_power_of_two(min_size)
+        self.max_size = floor_power_of_two(max_size)
+        if self.min_size > self.max_size:
+            raise ValueError("min_size must not be greater than max_size")
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = self._bound(floor_power_of_two(initial))
+        self._error_rate = 0.0
+
+    @property
+    def size(self) -> int:
+        """Page size the controller currently aims for"""
+        return self._size
+
+    @property
+    def error_rate(self) -> float:
+        """Moving average of the page failure rate"""
+        return self._error_rate
+
+    def _bound(self, size: int) -> int:
+        return min(self.max_size, max(self.min_size, size))
+
+    def next_size(self, offset: int) -> int:
+        """
+        Return the size of the page starting at ``offset`` records.
+
+        ``offset // size`` is the page number, so the size is the largest power of
+        two up to :attr:`size` that divides ``offset``; a grown size therefore
+        takes effect on the first page boundary it is aligned with.
+        """
+        size = self._size
+        while offset % size:
+            size //= 2
+        return size
+
+    def on_page(self, size: int, seconds: float, nbytes: Optional[int] = None) -> None:
+        """
+        Record a successful page and adjust the size.
+
+        Args:
+            size (int): Requested page size
+            seconds (float): Time the request took
+            nbytes (Optional[int]): Response size in bytes, if known
+        """
+        with self._lock:
+            self._error_rate *= 1 - ERROR_RATE_WEIGHT
+            if size != self._size:
+                # A page of an older size (e.g. an unaligned one) says little about the current size.
+                return
+            too_large = nbytes is not None and nbytes > self.max_bytes
+            if seconds > self.target_latency or too_large:
+                self._size = self._bound(size // 2)
+            elif (seconds * 2 <= self.target_latency and (nbytes is None or nbytes * 2 <= self.max_bytes)
+                  and self._error_rate < MAX_GROWTH_ERROR_RATE):
+                self._size = self._bound(size * 2)
+
+    def limit(self, max_size: int) -> None:
+        """Lower :attr:`max_size`, e.g. after the platform returned fewer records than requested"""
+        with self._lock:
+            self.max_size = max(1, min(self.max_size, floor_power_of_two(max_size)))
+            self.min_size = min(self.min_size, self.max_size)
+            self._size = self._bound(self._size)
+
+    def on_failure(self, size: int) -> bool:
+        """
+        Record a failed page and halve the size.
+
+        Returns:
+            bool: Whether the page should be retried with a smaller size
+        """
+        with self._lock:
+            self._error_rate = self._error_rate * (1 - ERROR_RATE_WEIGHT) + ERROR_RATE_WEIGHT
+            smaller = self._bound(min(self._size, size) // 2)
+            retry = smaller < size
+            self._size = smaller
+            return retry
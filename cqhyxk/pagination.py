@@ -0,0 +1,549 @@
+"""
+Pagination helpers for cqhyxk SDK
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, Tuple, TypeVar
+
+from .exceptions import DeadlineExceeded, RequestError
+from .models import PageRequest
+from .page_size import AdaptivePageSize
+
+#: 更新时间参数格式（updateTimeStart / updateTimeEnd）
+UPDATE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+#: 自动翻页时的默认页面大小
+DEFAULT_PAGE_SIZE = 100
+
+#: 并发拉取分页时的默认线程数
+DEFAULT_MAX_WORKERS = 4
+
+#: 时间窗口分片扫描时单个窗口的默认最大记录数，超过则继续拆分
+DEFAULT_MAX_WINDOW_ROWS = 10000
+#: 时间窗口分片扫描的默认起始时间，更早的记录由一个没有 updateTimeStart 的窗口覆盖
+DEFAULT_SCAN_START = datetime(2000, 1, 1)
+#: 单次拆分窗口的最大份数
+MAX_WINDOW_SPLIT = 16
+#: 窗口内分页过程中数据变动时，单个窗口的最大重扫次数
+MAX_WINDOW_RESCANS = 3
+#: 用于检测接口是否支持更新时间筛选的窗口，其中不应有任何记录
+EMPTY_PROBE_WINDOW = (datetime(1970, 1, 1), datetime(1970, 1, 1, 0, 0, 1))
+
+Window = Tuple[Optional[datetime], datetime]
+
+R = TypeVar("R", bound=PageRequest)
+
+
+def format_update_time(value: datetime) -> str:
+    """Format a datetime as an updateTimeStart/updateTimeEnd query value (aware values in local time)"""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value.strftime(UPDATE_TIME_FORMAT)
+
+
+def parse_update_time(value: str) -> datetime:
+    """Parse an updateTimeStart/updateTimeEnd value produced by format_update_time"""
+    return datetime.strptime(value, UPDATE_TIME_FORMAT)
+
+
+def page_content(response: Any) -> Tuple[List[Any], Optional[int]]:
+    """
+    Return ``(content, total)`` of a page response, either a model or a raw dict.
+
+    The total is read from ``data.page.total`` as documented, falling back to
+    ``data.total``; it is None if the response has neither.
+    """
+    data = response.get("data") if isinstance(response, dict) else response.data
+    if not data:
+        return [], None
+    if isinstance(data, dict):
+        page = data.get("page")
+        total = page.get("total") if isinstance(page, dict) else None
+        return data.get("content") or [], total if total is not None else data.get("total")
+    total = data.page.total if getattr(data, "page", None) is not None else None
+    return data.content or [], total if total is not None else getattr(data, "total", None)
+
+
+def identity_key(item: Any) -> Optional[str]:
+    """De-duplication key of an identity record (model or raw dict)"""
+    return item.get("sourceUserId") if isinstance(item, dict) else item.sourceUserId
+
+
+def member_tag_key(item: Any) -> Optional[Tuple[str, Optional[str]]]:
+    """De-duplication key of a tag membership record (model or raw dict)"""
+    if isinstance(item, dict):
+        source_user_id, tag_id = item.get("sourceUserId"), item.get("tagId")
+    else:
+        source_user_id, tag_id = item.sourceUserId, item.tagId
+    return (source_user_id, tag_id) if source_user_id is not None else None
+
+
+class _PageKeys:
+    """
+    De-duplication keys of the records yielded from the current and the previous page
+
+    A record moved by a change between two page requests shows up again on the
+    page next to the one it was yielded from, so keys older than that are
+    dropped and memory stays bounded by two pages however long the scan is.
+    """
+
+    def __init__(self, key: Callable[[Any], Hashable]):
+        self.key = key
+        self.previous = set()
+        self.current = set()
+
+    def repeated(self, item: Any) -> bool:
+        """Record ``item`` on the current page and return whether it was already yielded"""
+        item_key = self.key(item)
+        if item_key is None:
+            return False
+        repeated = item_key in self.current or item_key in self.previous
+        self.current.add(item_key)
+        return repeated
+
+    def next_page(self) -> None:
+        """Move on to the next page, forgetting the keys of the page before the current one"""
+        self.previous, self.current = self.current, set()
+
+
+def prepare_scan_request(request: Optional[R], request_class: type, page_size: int = DEFAULT_PAGE_SIZE) -> R:
+    """
+    Copy a page request for a full scan.
+
+    The copy starts at page 0 unless ``current`` was given, uses ``page_size``
+    unless ``size`` was given, and pins ``updateTimeEnd`` to now so that records
+    updated while the scan is running do not shift later pages.
+    """
+    request = request.copy() if request is not None else request_class()
+    if request.current is None:
+        request.current = 0
+    if not request.size:
+        request.size = page_size
+    if getattr(request, "updateTimeEnd", None) is None and hasattr(request, "updateTimeEnd"):
+        request.updateTimeEnd = format_update_time(datetime.now())
+    return request
+
+
+def iter_page_items(
+    fetch_page: Callable[[R], Any],
+    request: R,
+    key: Optional[Callable[[Any], Hashable]] = None,
+) -> Iterator[Any]:
+    """
+    Walk all pages of a paged endpoint and yield the records one at a time.
+
+    Only the current page is held in memory. When ``key`` is given, records whose
+    key was yielded from the current or the previous page are dropped, which
+    protects a scan against items that move between pages while it runs; only
+    the keys of those two pages are kept.
+
+    Args:
+        fetch_page (Callable): Function taking a page request and returning a page response
+        request (PageRequest): First page request, updated in place as pages advance
+        key (Optional[Callable]): Function returning the de-duplication key of a record
+
+    Yields:
+        Records from ``response.data.content`` of every page
+    """
+    seen = _PageKeys(key) if key is not None else None
+    fetched = 0
+    while True:
+        # Keep only the content list so a single page is alive at a time.
+        content, total = page_content(fetch_page(request))
+        if not content:
+            return
+        fetched += len(content)
+        for item in content:
+            if seen is not None and seen.repeated(item):
+                continue
+            yield item
+        if len(content) < request.size or (total is not None and fetched >= total):
+            return
+        content = None
+        request.current += 1
+        if seen is not None:
+            seen.next_page()
+
+
+def iter_adaptive_page_items(
+    fetch_page: Callable[[R], Any],
+    request: R,
+    controller: AdaptivePageSize,
+    key: Optional[Callable[[Any], Hashable]] = None,
+    response_bytes: Optional[Callable[[], Optional[int]]] = None,
+) -> Iterator[Any]:
+    """
+    Walk all pages like :func:`iter_page_items`, letting ``controller`` choose each page size.
+
+    The scan keeps a record offset and requests page ``offset // size`` of the
+    size the controller picks for that offset. A page that fails with a
+    :class:`~cqhyxk.exceptions.RequestError` (e.g. a timeout) is retried with a
+    halved size until the controller's minimum is reached. A short page that
+    is not the last one means the platform capped the page size; it is fetched
+    again after lowering the controller's maximum. Without a reported total, a
+    short page ends the scan only if a full page of at least its requested size
+    was already served; otherwise one record past it is probed first.
+
+    Args:
+        fetch_page (Callable): Function taking a page request and returning a page response
+        request (PageRequest): First page request, updated in place as pages advance
+        controller (AdaptivePageSize): Page size controller
+        key (Optional[Callable]): Function returning the de-duplication key of a record
+        response_bytes (Optional[Callable]): Function returning the size of the response
+            just received on this thread, if known
+
+    Yields:
+        Records from ``response.data.content`` of every page
+    """
+    seen = _PageKeys(key) if key is not None else None
+    offset = request.current * request.size
+    # Largest size the platform served a full page of, so it caps pages at no less.
+    served = 0
+    while True:
+        size = controller.next_size(offset)
+        request.size = size
+        request.current = offset // size
+        started = time.perf_counter()
+        try:
+            content, total = page_content(fetch_page(request))
+        except DeadlineExceeded:
+            raise
+        except RequestError:
+            if controller.on_failure(size):
+                continue
+            raise
+        controller.on_page(size, time.perf_counter() - started, response_bytes() if response_bytes is not None else None)
+        if not content:
+            return
+        if len(content) >= size:
+            served = max(served, size)
+        elif total is not None:
+            capped = offset + len(content) < total
+        elif size <= served:
+            capped = False
+        else:
+            # Either the last page or a capped one: look for a record right after it.
+            probe = request.copy()
+            probe.current, probe.size = offset + len(content), 1
+            capped = bool(page_content(fetch_page(probe))[0])
+        if len(content) < size and capped:
+            # The platform capped the page size, so the page offsets no longer
+            # match ours: lower the bound and fetch this offset again.
+            controller.limit(len(content))
+            content = None
+            continue
+        for item in content:
+            if seen is not None and seen.repeated(item):
+                continue
+            yield item
+        if len(content) < size or (total is not None and offset + len(content) >= total):
+            return
+        content = None
+        offset += size
+        if seen is not None:
+            seen.next_page()
+
+
+def fan_out_pages(
+    fetch_page: Callable[[R], Any],
+    request: R,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    ordered: bool = True,
+) -> Iterator[Any]:
+    """
+    Fetch all pages of a paged endpoint concurrently.
+
+    The first page is fetched on the calling thread; its ``total`` determines the
+    remaining pages, which are fetched over a thread pool of ``max_workers``. At
+    most ``2 * max_workers`` pages are in flight or buffered at any time. If the
+    response reports no total, the pages are fetched one after another until a
+    short or empty page.
+
+    Args:
+        fetch_page (Callable): Function taking a page request and returning a page response
+        request (PageRequest): First page request (``current`` and ``size`` must be set)
+        max_workers (int): Maximum number of concurrent page requests
+        ordered (bool): Yield pages in page order if True, otherwise as they complete
+
+    Yields:
+        Page responses, starting with the first page
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    first = fetch_page(request)
+    yield first
+    content, total = page_content(first)
+    if not content or len(content) < request.size:
+        return
+    first = content = None
+    if total is None:
+        yield from _sequential_pages(fetch_page, request)
+        return
+    # ``current`` counts pages from 0, so the last page index is ceil(total / size) - 1.
+    end = -(-total // request.size)
+    pending_pages = iter(range(request.current + 1, end))
+    window = 2 * max_workers
+
+    def submit(executor, page):
+        page_request = request.copy()
+        page_request.current = page
+        return executor.submit(fetch_page, page_request)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight = deque()
+        try:
+            for page in pending_pages:
+                in_flight.append(submit(executor, page))
+                if len(in_flight) >= window:
+                    break
+            while in_flight:
+                if ordered:
+                    future = in_flight.popleft()
+                else:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    future = next(f for f in in_flight if f in done)
+                    in_flight.remove(future)
+                result = future.result()
+                next_page = next(pending_pages, None)
+                if next_page is not None:
+                    in_flight.append(submit(executor, next_page))
+                yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def _sequential_pages(fetch_page: Callable[[R], Any], request: R) -> Iterator[Any]:
+    """Fetch the pages after ``request.current`` one at a time until a short or empty page"""
+    page_request = request.copy()
+    while True:
+        page_request.current += 1
+        page = fetch_page(page_request)
+        content = page_content(page)[0]
+        if not content:
+            return
+        full = len(content) >= page_request.size
+        content = None
+        yield page
+        if not full:
+            return
+
+
+def split_window(start: datetime, end: datetime, parts: int) -> List[Window]:
+    """Split ``[start, end)`` into up to ``parts`` consecutive windows on whole-second bounds"""
+    seconds = int((end - start).total_seconds())
+    parts = max(1, min(parts, seconds))
+    bounds = [start + timedelta(seconds=seconds * index // parts) for index in range(parts)] + [end]
+    return list(zip(bounds, bounds[1:]))
+
+
+def iter_window_items(
+    fetch_page: Callable[[R], Any],
+    request: R,
+    start: Optional[datetime] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    max_window_rows: int = DEFAULT_MAX_WINDOW_ROWS,
+    key: Optional[Callable[[Any], Hashable]] = None,
+) -> Iterator[Any]:
+    """
+    Scan a paged endpoint by ``updateTimeStart`` / ``updateTimeEnd`` windows fetched concurrently.
+
+    The range from ``start`` (or ``request.updateTimeStart``) to
+    ``request.updateTimeEnd`` is split into ``max_workers`` windows. The first
+    page of each window reports its ``total``; a window holding more than
+    ``max_window_rows`` records is split further, otherwise its remaining pages
+    are fetched over the thread pool. Every request therefore pages at most
+    ``max_window_rows`` deep. A window whose ``total`` changes while it is paged
+    is scanned again, up to :data:`MAX_WINDOW_RESCANS` times. Windows cannot be
+    split below one second. If the endpoint ignores the time filters, which is
+    detected by probing :data:`EMPTY_PROBE_WINDOW` first, the whole range is
+    fetched as one window.
+
+    Without an explicit start the scan begins at :data:`DEFAULT_SCAN_START`,
+    and one extra window without ``updateTimeStart`` picks up older records.
+    At most ``2 * max_workers`` pages are in flight or buffered at any time.
+
+    Args:
+        fetch_page (Callable): Function taking a page request and returning a page response
+        request (PageRequest): Template request with ``size`` and ``updateTimeEnd`` set;
+            ``current`` is ignored
+        start (Optional[datetime]): Start of the range, overriding ``request.updateTimeStart``
+        max_workers (int): Maximum number of concurrent page requests
+        max_window_rows (int): Largest number of records paged through in one window
+        key (Optional[Callable]): Function returning the de-duplication key of a record;
+            recommended, since rescanned windows yield their records again. Unlike the
+            sequential scans, the keys of every yielded record are kept until the scan ends.
+
+    Yields:
+        Records of all windows, in no particular order
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    if max_window_rows < request.size:
+        raise ValueError("max_window_rows must be at least the page size")
+    end = parse_update_time(request.updateTimeEnd)
+    windows: List[Window] = []
+    if start is None and request.updateTimeStart is not None:
+        start = parse_update_time(request.updateTimeStart)
+    elif start is None:
+        start = min(DEFAULT_SCAN_START, end)
+        windows.append((None, start))
+    windows.extend(split_window(start, end, max_workers))
+
+    # A task is (window, page, generation); a rescan bumps the window generation
+    # so pages of the abandoned pass no longer trigger rescans.
+    tasks = deque((window, 0, 0) for window in windows)
+    generations: Dict[Window, int] = {}
+    totals: Dict[Window, Optional[int]] = {}
+    seen = set() if key is not None else None
+    limit = 2 * max_workers
+
+    def window_request(window: Window, page: int) -> R:
+        window_start, window_end = window
+        page_request = request.copy()
+        page_request.current = page
+        page_request.updateTimeStart = format_update_time(window_start) if window_start is not None else None
+        page_request.updateTimeEnd = format_update_time(window_end)
+        return page_request
+
+    def submit(executor, task):
+        window, page, _ = task
+        return executor.submit(fetch_page, window_request(window, page))
+
+    if page_content(fetch_page(window_request(EMPTY_PROBE_WINDOW, 0)))[1]:
+        # The time filters are ignored, so splitting would never shrink a window.
+        tasks = deque([((None, end), 0, 0)])
+        max_window_rows = float("inf")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        in_flight: Dict[Any, Tuple[Window, int, int]] = {}
+        try:
+            while tasks or in_flight:
+                while tasks and len(in_flight) < limit:
+                    task = tasks.popleft()
+                    if task[2] == generations.get(task[0], 0):
+                        in_flight[submit(executor, task)] = task
+                if not in_flight:
+                    continue
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, page, generation = in_flight.pop(future)
+                    content, total = page_content(future.result())
+                    future = None
+                    current = generation == generations.get(window, 0)
+                    if current and page == 0:
+                        window_start, window_end = window
+                        if (total is not None and total > max_window_rows and window_start is not None
+                                and window_end - window_start > timedelta(seconds=1)):
+                            # Too deep to page through: the sub-windows cover these records.
+                            parts = min(MAX_WINDOW_SPLIT, -(-total // max_window_rows))
+                            tasks.extend((sub, 0, 0) for sub in split_window(window_start, window_end, max(2, parts)))
+                            continue
+                        totals[window] = total
+                        if total is not None:
+                            tasks.extend((window, p, generation) for p in range(1, -(-total // request.size)))
+                    elif current and total != totals.get(window) and generation < MAX_WINDOW_RESCANS:
+                        generations[window] = generation + 1
+                        tasks.append((window, 0, generation + 1))
+                    if current and total is None and len(content) >= request.size:
+                        tasks.append((window, page + 1, generation))
+                    for item in content:
+                        if seen is not None:
+                            item_key = key(item)
+                            if item_key is not None:
+                                if item_key in seen:
+                                    continue
+                                seen.add(item_key)
+                        yield item
+                    content = None
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+async def aiter_page_items(
+    fetch_page: Callable[[R], Awaitable[Any]],
+    request: R,
+    key: Optional[Callable[[Any], Hashable]] = None,
+) -> AsyncIterator[Any]:
+    """Async counterpart of :func:`iter_page_items`"""
+    seen = _PageKeys(key) if key is not None else None
+    fetched = 0
+    while True:
+        content, total = page_content(await fetch_page(request))
+        if not content:
+            return
+        fetched += len(content)
+        for item in content:
+            if seen is not None and seen.repeated(item):
+                continue
+            yield item
+        if len(content) < request.size or (total is not None and fetched >= total):
+            return
+        content = None
+        request.current += 1
+        if seen is not None:
+            seen.next_page()
+
+
+async def afan_out_pages(
+    fetch_page: Callable[[R], Awaitable[Any]],
+    request: R,
+    max_concurrency: int = DEFAULT_MAX_WORKERS,
+    ordered: bool = True,
+) -> AsyncIterator[Any]:
+    """Async counterpart of :func:`fan_out_pages`, bounded by ``max_concurrency`` tasks"""
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    first = await fetch_page(request)
+    yield first
+    content, total = page_content(first)
+    if not content or len(content) < request.size:
+        return
+    first = content = None
+    if total is None:
+        page_request = request.copy()
+        while True:
+            page_request.current += 1
+            page = await fetch_page(page_request)
+            content = page_content(page)[0]
+            if not content:
+                return
+            full = len(content) >= page_request.size
+            content = None
+            yield page
+            if not full:
+                return
+    import asyncio
+
+    end = -(-total // request.size)
+    pending_pages = iter(range(request.current + 1, end))
+
+    def submit(page):
+        page_request = request.copy()
+        page_request.current = page
+        return asyncio.ensure_future(fetch_page(page_request))
+
+    in_flight = deque()
+    try:
+        for page in pending_pages:
+            in_flight.append(submit(page))
+            if len(in_flight) >= max_concurrency:
+                break
+        while in_flight:
+            if ordered:
+                task = in_flight.popleft()
+            else:
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                task = next(t for t in in_flight if t in done)
+                in_flight.remove(task)
+            result = await task
+            next_page = next(pending_pages, None)
+            if next_page is not None:
+                in_flight.append(submit(next_page))
+            yield result
+    finally:
+        for task in in_flight:
+            task.cancel()
@@ -0,0 +1,260 @@
+"""
+Bulk face photo download for cqhyxk SDK
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Collection, Dict, Iterable, Iterator, List, Mapping, Optional
+
+from .decoding import DECODE_MODEL
+from .exceptions import CqhyxkException
+from .models import FacePhoto
+
+#: 默认并发下载线程数
+DEFAULT_PHOTO_WORKERS = 8
+
+#: 图片文件头与扩展名
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF8", ".gif"),
+    (b"BM", ".bmp"),
+    (b"RIFF", ".webp"),
+)
+_EXTENSIONS = tuple(ext for _, ext in _IMAGE_SIGNATURES) + (".bin",)
+
+#: 下载结果状态
+STATUS_WRITTEN = "written"
+STATUS_EXISTS = "exists"
+STATUS_CACHED = "cached"
+STATUS_NO_PHOTO = "no-photo"
+STATUS_ERROR = "error"
+
+
+def guess_extension(head: bytes) -> str:
+    """Guess the file extension of an image from its first bytes"""
+    for signature, ext in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return ".bin"
+
+
+class FacePhotoStore:
+    """
+    On-disk photo store keyed by ``faceId``.
+
+    The platform assigns a new ``faceId`` whenever a photo changes, so a photo is
+    written once and never rewritten. Files live at
+    ``<root>/<h[:2]>/<h><ext>`` where ``h`` is the SHA-256 of the ``faceId``.
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): Store directory, created if missing
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _base_path(self, face_id: str) -> str:
+        digest = hashlib.sha256(face_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def find(self, face_id: str) -> Optional[str]:
+        """Return the path of a stored photo, or None if it is not stored"""
+        base = self._base_path(face_id)
+        for ext in _EXTENSIONS:
+            if os.path.exists(base + ext):
+                return base + ext
+        return None
+
+    def __contains__(self, face_id: str) -> bool:
+        return self.find(face_id) is not None
+
+    def put(self, photo: FacePhoto) -> str:
+        """
+        Decode a photo into the store and return its path.
+
+        The base64 text is streamed to a temporary file in chunks and released
+        afterwards; the file is then renamed into place, so readers never see a
+        partial photo.
+        """
+        path = self._base_path(photo.faceId) + guess_extension(photo.image_header())
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                photo.write_image(f, release=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+@dataclass
+class PhotoRecord:
+    """人脸照片下载结果（清单中的一行）"""
+    sourceUserId: str
+    status: str
+    faceId: Optional[str] = None
+    faceType: Optional[int] = None
+    path: Optional[str] = None
+    error: Optional[str] = None
+
+
+def load_manifest(path: str) -> Dict[str, List[PhotoRecord]]:
+    """
+    Load a JSON Lines manifest written by :meth:`BulkPhotoDownloader.download`.
+
+    Returns:
+        Dict[str, List[PhotoRecord]]: Records grouped by sourceUserId
+    """
+    records: Dict[str, List[PhotoRecord]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = PhotoRecord(**json.loads(line))
+                records.setdefault(record.sourceUserId, []).append(record)
+    return records
+
+
+class BulkPhotoDownloader:
+    """
+    Concurrent face photo downloader.
+
+    Photos are fetched over a bounded thread pool and decoded straight into a
+    :class:`FacePhotoStore`. Photos whose ``faceId`` is already stored are not
+    written again, but their users are still requested, so the photo is still
+    transferred. When a previous manifest is passed as ``known``, users whose
+    photos from that manifest are all still stored are skipped without a request;
+    users in ``refresh`` (e.g. from personnel change events) are requested anyway,
+    which picks up their changed photos.
+
+    Example::
+
+        downloader = BulkPhotoDownloader(client, FacePhotoStore("photos"))
+        counts = downloader.download(user_ids, manifest_path="photos/manifest.jsonl")
+    """
+
+    def __init__(self, client, store: FacePhotoStore, max_workers: int = DEFAULT_PHOTO_WORKERS):
+        """
+        Args:
+            client (CqhyxkClient): API client
+            store (FacePhotoStore): Photo store
+            max_workers (int): Maximum number of concurrent requests
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.client = client
+        self.store = store
+        self.max_workers = max_workers
+
+    def _known_records(self, source_user_id: str, known: Optional[Mapping[str, List[PhotoRecord]]],
+                       refresh: Collection[str] = ()) -> Optional[List[PhotoRecord]]:
+        if not known or source_user_id in refresh:
+            return None
+        records = known.get(source_user_id)
+        if not records or any(r.status not in (STATUS_WRITTEN, STATUS_EXISTS, STATUS_CACHED) for r in records):
+            return None
+        if all(r.faceId and r.faceId in self.store for r in records):
+            return [PhotoRecord(source_user_id, STATUS_CACHED, r.faceId, r.faceType, r.path) for r in records]
+        return None
+
+    def _fetch(self, source_user_id: str) -> List[PhotoRecord]:
+        try:
+            response = self.client.get_face_photos(source_user_id, decode=DECODE_MODEL)
+        except CqhyxkException as e:
+            return [PhotoRecord(source_user_id, STATUS_ERROR, error=str(e))]
+        photos = response.data.content if response.data and response.data.content else []
+        response = None
+        if not photos:
+            return [PhotoRecord(source_user_id, STATUS_NO_PHOTO)]
+        records = []
+        for photo in photos:
+            face_type = int(photo.faceType) if photo.faceType is not None else None
+            if not photo.faceId or not photo.imageBase64:
+                records.append(PhotoRecord(source_user_id, STATUS_NO_PHOTO, photo.faceId, face_type))
+                continue
+            path = self.store.find(photo.faceId)
+            if path is not None:
+                photo.release_image()
+                records.append(PhotoRecord(source_user_id, STATUS_EXISTS, photo.faceId, face_type, path))
+                continue
+            try:
+                path = self.store.put(photo)
+            except (ValueError, OSError) as e:
+                records.append(PhotoRecord(source_user_id, STATUS_ERROR, photo.faceId, face_type, error=str(e)))
+            else:
+                records.append(PhotoRecord(source_user_id, STATUS_WRITTEN, photo.faceId, face_type, path))
+        return records
+
+    def iter_download(self, source_user_ids: Iterable[str],
+                      known: Optional[Mapping[str, List[PhotoRecord]]] = None,
+                      refresh: Optional[Iterable[str]] = None) -> Iterator[PhotoRecord]:
+        """
+        Download the photos of many users, yielding one record per photo as users complete.
+
+        At most ``2 * max_workers`` users are in flight at any time, so the input
+        iterable is consumed lazily and memory stays bounded.
+
+        Args:
+            source_user_ids (Iterable[str]): 学工号
+            known (Optional[Mapping[str, List[PhotoRecord]]]): Previous manifest from :func:`load_manifest`
+            refresh (Optional[Iterable[str]]): Users requested even if ``known`` lists all their photos
+        """
+        refresh = set(refresh) if refresh is not None else set()
+        ids = iter(source_user_ids)
+        window = 2 * self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = deque()
+            try:
+                while True:
+                    while len(in_flight) < window:
+                        source_user_id = next(ids, None)
+                        if source_user_id is None:
+                            break
+                        cached = self._known_records(source_user_id, known, refresh)
+                        if cached is not None:
+                            yield from cached
+                            continue
+                        in_flight.append(executor.submit(self._fetch, source_user_id))
+                    if not in_flight:
+                        return
+                    yield from in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def download(self, source_user_ids: Iterable[str], manifest_path: Optional[str] = None,
+                 known: Optional[Mapping[str, List[PhotoRecord]]] = None,
+                 refresh: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Download the photos of many users and write a JSON Lines manifest.
+
+        Args:
+            source_user_ids (Iterable[str]): 学工号
+            manifest_path (Optional[str]): Manifest file, one :class:`PhotoRecord` per line
+            known (Optional[Mapping[str, List[PhotoRecord]]]): Previous manifest from :func:`load_manifest`
+            refresh (Optional[Iterable[str]]): Users requested even if ``known`` lists all their photos
+
+        Returns:
+            Dict[str, int]: Number of records per status
+        """
+        counts: Dict[str, int] = {}
+        manifest = open(manifest_path, "w", encoding="utf-8") if manifest_path else None
+        try:
+            for record in self.iter_download(source_user_ids, known=known, refresh=refresh):
+                counts[record.status] = counts.get(record.status, 0) + 1
+                if manifest is not None:
+                    manifest.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+        finally:
+            if manifest is not None:
+                manifest.close()
+        return counts
@@ -0,0 +1,286 @@
+"""
+Subscription callback receiver for cqhyxk SDK
+
+A small embeddable asyncio HTTP server implementing the callback contract of
+``事件订阅 - 回调``: each POST body is validated as a
+:class:`~cqhyxk.models.CallbackRequest`, put on a bounded in-process queue and
+acknowledged with 200 immediately, so slow event handling never makes the
+platform's callbacks fail. When the queue stays full the receiver answers 503
+and the platform retries the callback later.
+
+Events are consumed with :meth:`CallbackReceiver.batches`, which merges the
+``dataIds`` of queued events per ``eventType`` / ``dataStatus``, keeping the
+latest status of each id.
+"""
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .models import CallbackRequest, DataChangeStatus, EventType
+
+#: 默认事件队列容量
+DEFAULT_MAX_QUEUE = 10000
+#: 默认等待队列空位的时间（秒），超时返回 503
+DEFAULT_ENQUEUE_TIMEOUT = 1.0
+#: 默认请求体最大字节数
+DEFAULT_MAX_BODY = 1024 * 1024
+#: 默认每个合并批次的最大数据 id 数
+DEFAULT_BATCH_MAX_IDS = 1000
+#: 默认每个合并批次的最长等待时间（秒）
+DEFAULT_BATCH_MAX_WAIT = 1.0
+
+#: 读取请求行和请求头的超时时间（秒）
+HEADER_TIMEOUT = 30.0
+#: 读取请求体的超时时间（秒）
+BODY_TIMEOUT = 30.0
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+class CallbackReceiver:
+    """
+    事件订阅回调接收器
+
+    Example::
+
+        receiver = CallbackReceiver(port=8080, path="/callback")
+        await receiver.start()
+        client.add_subscription(SubscriptionRequest(eventType=EventType.PERSONNEL,
+                                                    callbackUrl="http://host:8080/callback"))
+        async for batch in receiver.batches():
+            for event in batch:
+                handle(event.event_type, event.data_status, event.data_ids)
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8080, path: Optional[str] = None,
+                 max_queue: int = DEFAULT_MAX_QUEUE, enqueue_timeout: float = DEFAULT_ENQUEUE_TIMEOUT,
+                 max_body: int = DEFAULT_MAX_BODY):
+        """
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on, 0 picks a free port (see :attr:`port`)
+            path (Optional[str]): Only accept callbacks on this path; any path if None
+            max_queue (int): Capacity of the event queue
+            enqueue_timeout (float): Seconds to wait for room in a full queue before answering 503
+            max_body (int): Largest accepted request body in bytes
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.enqueue_timeout = enqueue_timeout
+        self.max_body = max_body
+        self.max_queue = max_queue
+        # Created in start(), inside the running event loop.
+        self.queue: Optional["asyncio.Queue[CallbackRequest]"] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        #: 已接收的事件数
+        self.received = 0
+        #: 因队列已满被拒绝（503）的事件数
+        self.rejected = 0
+
+    async def __aenter__(self) -> "CallbackReceiver":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Start listening; :attr:`port` is updated with the bound port"""
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.max_queue)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop accepting callbacks; events already queued can still be consumed"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Start the receiver if needed and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    keep_alive = await self._handle_request(reader, writer)
+                except _BadRequest as e:
+                    self._respond(writer, e.status, keep_alive=False)
+                    keep_alive = False
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Handle one request on a connection, returning whether to keep it open"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), HEADER_TIMEOUT)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise _BadRequest(400)
+            raise
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise _BadRequest(400)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        try:
+            body = await asyncio.wait_for(self._read_body(reader, headers), BODY_TIMEOUT)
+        except asyncio.IncompleteReadError:
+            # The client ended its side before sending the announced body.
+            raise _BadRequest(400)
+        if self.path is not None and target.split("?", 1)[0] != self.path:
+            status = 404
+        elif method != "POST":
+            status = 405
+        else:
+            status = await self._accept(body)
+        self._respond(writer, status, keep_alive)
+        return keep_alive
+
+    async def _read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            size = 0
+            while True:
+                line = await reader.readuntil(b"\r\n")
+                try:
+                    chunk_size = int(line.split(b";", 1)[0], 16)
+                except ValueError:
+                    raise _BadRequest(400)
+                if chunk_size < 0:
+                    raise _BadRequest(400)
+                if chunk_size == 0:
+                    # Skip trailers up to the terminating empty line.
+                    while await reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    return b"".join(chunks)
+                size += chunk_size
+                if size > self.max_body:
+                    raise _BadRequest(413)
+                chunks.append(await reader.readexactly(chunk_size))
+                if await reader.readexactly(2) != b"\r\n":
+                    raise _BadRequest(400)
+        length = headers.get("content-length")
+        if length is None:
+            return b""
+        try:
+            length = int(length)
+        except ValueError:
+            raise _BadRequest(400)
+        if length < 0:
+            raise _BadRequest(400)
+        if length > self.max_body:
+            raise _BadRequest(413)
+        return await reader.readexactly(length)
+
+    async def _accept(self, body: bytes) -> int:
+        """Validate and enqueue one callback, returning the response status"""
+        try:
+            event = CallbackRequest.parse_raw(body)
+        except (ValidationError, ValueError):
+            return 400
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self.queue.put(event), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                return 503
+        self.received += 1
+        return 200
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        )
+
+    async def get(self) -> CallbackRequest:
+        """Wait for the next received event"""
+        return await self.queue.get()
+
+    async def batches(self, max_ids: int = DEFAULT_BATCH_MAX_IDS,
+                      max_wait: float = DEFAULT_BATCH_MAX_WAIT) -> AsyncIterator[List[CallbackRequest]]:
+        """
+        Consume queued events as merged batches.
+
+        Only the latest ``dataStatus`` of each ``eventType`` / id is kept, so an id
+        added and then deleted within a batch is only reported as deleted. Ids
+        with the same ``eventType`` and latest ``dataStatus`` are merged into one
+        :class:`~cqhyxk.models.CallbackRequest`, in the order of their latest
+        event. A batch is yielded once it holds ``max_ids`` ids or ``max_wait``
+        seconds after its first event, whichever comes first.
+
+        Args:
+            max_ids (int): Maximum number of ids per batch
+            max_wait (float): Maximum seconds to wait after the first event of a batch
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await self.queue.get()
+            latest: Dict[Tuple[EventType, str], DataChangeStatus] = {}
+            deadline = loop.time() + max_wait
+            while True:
+                for data_id in event.data_ids:
+                    # Re-inserted so the id moves to the position of its latest event.
+                    latest.pop((event.event_type, data_id), None)
+                    latest[event.event_type, data_id] = event.data_status
+                if len(latest) >= max_ids:
+                    break
+                try:
+                    event = self.queue.get_nowait()
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            merged: Dict[Tuple[EventType, DataChangeStatus], List[str]] = {}
+            for (event_type, data_id), data_status in latest.items():
+                merged.setdefault((event_type, data_status), []).append(data_id)
+            yield [
+                CallbackRequest(eventType=event_type, dataStatus=data_status, dataIds=ids)
+                for (event_type, data_status), ids in merged.items()
+            ]
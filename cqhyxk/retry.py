@@ -0,0 +1,195 @@
+"""
+Retries and adaptive rate limiting for cqhyxk SDK
+
+:class:`RetryPolicy` retries idempotent calls that failed with a transient
+error (connection errors, timeouts, 429 and 5xx responses) with exponential
+backoff and full jitter, honouring ``Retry-After``.
+
+:class:`AdaptiveRateLimiter` is a token bucket shared by every thread (or task)
+using a client. Its rate grows additively while responses succeed and is cut
+multiplicatively on throttling or transient errors (AIMD), so long scans settle
+at the highest rate the platform tolerates.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Collection, Optional
+
+#: 视为暂时性故障的 HTTP 状态码
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+#: 默认最大尝试次数（含首次请求）
+DEFAULT_MAX_ATTEMPTS = 4
+#: 默认首次重试的退避时间（秒）
+DEFAULT_BACKOFF = 0.5
+#: 默认最大退避时间（秒）
+DEFAULT_MAX_BACKOFF = 30.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a ``Retry-After`` header (seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy:
+    """
+    重试策略
+
+    Only idempotent calls are retried: the query endpoints (including the POST
+    page queries) but never ``add_subscription`` / ``cancel_subscription``.
+
+    Example::
+
+        client = CqhyxkClient(retry=RetryPolicy(max_attempts=5, backoff=1.0))
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, backoff: float = DEFAULT_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, retry_statuses: Collection[int] = TRANSIENT_STATUSES,
+                 retry_codes: Collection[str] = (), jitter: bool = True,
+                 random_func: Callable[[], float] = random.random):
+        """
+        Args:
+            max_attempts (int): Maximum number of attempts, including the first one
+            backoff (float): Base delay in seconds; attempt ``n`` waits up to ``backoff * 2 ** n``
+            max_backoff (float): Upper bound of a single delay, also applied to ``Retry-After``
+            retry_statuses (Collection[int]): HTTP statuses that are retried
+            retry_codes (Collection[str]): API error codes (``APIError.code``) that are retried
+            jitter (bool): Use full jitter (a uniform delay between 0 and the backoff)
+            random_func (Callable[[], float]): Source of randomness in [0, 1)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_codes = frozenset(retry_codes)
+        self.jitter = jitter
+        self._random = random_func
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Return the seconds to wait before retrying a failed attempt, or None if attempts are exhausted.
+
+        Args:
+            attempt (int): Zero-based number of the attempt that failed
+            retry_after (Optional[float]): Delay requested by the server
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if self.jitter:
+            delay *= self._random()
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+
+class AdaptiveRateLimiter:
+    """
+    自适应令牌桶限流器
+
+    Thread-safe; share one instance between clients to limit them together.
+    Callers reserve a token with :meth:`reserve` and wait the returned number of
+    seconds, which works for both threads and asyncio tasks.
+
+    Example::
+
+        limiter = AdaptiveRateLimiter(rate=20, max_rate=200)
+        client = CqhyxkClient(rate_limiter=limiter, retry=RetryPolicy())
+    """
+
+    def __init__(self, rate: float = 10.0, min_rate: float = 1.0, max_rate: Optional[float] = None,
+                 burst: float = 1.0, increase: float = 1.0, decrease: float = 0.5, cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate (float): Initial rate in requests per second
+            min_rate (float): Lower bound of the rate
+            max_rate (Optional[float]): Upper bound of the rate, unbounded if None
+            burst (float): Bucket capacity, i.e. requests allowed at once after an idle period
+            increase (float): Additive increase; the rate grows by about this many requests per
+                second for every second of successful responses
+            decrease (float): Factor applied to the rate on throttling
+            cooldown (float): Minimum seconds between two decreases, so one burst of
+                failures only halves the rate once
+            clock (Callable[[], float]): Monotonic clock
+        """
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rate = self._bound(rate)
+        self._tokens = burst
+        self._updated = clock()
+        self._decreased = float("-inf")
+
+    @property
+    def rate(self) -> float:
+        """Current rate in requests per second"""
+        return self._rate
+
+    def _bound(self, rate: float) -> float:
+        rate = max(self.min_rate, rate)
+        return min(self.max_rate, rate) if self.max_rate is not None else rate
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Take one token and return the seconds to wait before sending the request.
+
+        Args:
+            max_wait (Optional[float]): Longest acceptable wait; if the wait would be longer,
+                no token is taken and None is returned
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            delay = (1 - self._tokens) / self._rate if self._tokens < 1 else 0.0
+            if max_wait is not None and delay > max_wait:
+                return None
+            self._tokens -= 1
+            return delay
+
+    def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Block until a request may be sent.
+
+        Returns:
+            bool: False, without waiting, if that would take longer than ``max_wait`` seconds
+        """
+        delay = self.reserve(max_wait)
+        if delay is None:
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def on_success(self) -> None:
+        """Signal a successful response (additive increase)"""
+        with self._lock:
+            self._rate = self._bound(self._rate + self.increase / self._rate)
+
+    def on_throttle(self) -> None:
+        """Signal throttling or a transient error (multiplicative decrease)"""
+        with self._lock:
+            now = self._clock()
+            if now - self._decreased >= self.cooldown:
+                self._decreased = now
+                self._rate = self._bound(self._rate * self.decrease)
@@ -0,0 +1,112 @@
+"""
+Single-flight request coalescing for cqhyxk SDK
+
+While a call for a key is in flight, further calls for the same key wait for it
+and share its result (or its exception) instead of starting their own, so a
+stampede of identical requests costs one upstream call.
+"""
+import asyncio
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def request_key(method: str, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                json_data: Optional[Dict[str, Any]] = None) -> Tuple[str, str, Hashable, Optional[str]]:
+    """Build the coalescing key of a request from its method, endpoint, query parameters and body"""
+    body = json.dumps(json_data, sort_keys=True, default=str) if json_data is not None else None
+    return method, endpoint, tuple(sorted((params or {}).items())), body
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    线程间请求合并
+
+    Thread-safe. The first caller of a key runs the function on its own thread;
+    callers arriving before it returns block and receive the same result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight.
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it was shared from another caller's call
+
+        Raises:
+            Exception: Whatever ``fn`` raised, in every waiting caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys with a call in flight"""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    协程间请求合并
+
+    For one event loop. The call runs as its own task, so a cancelled caller
+    never cancels the call the other callers are waiting for.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await ``fn()`` unless a call for ``key`` is already in flight.
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it was shared from another caller's call
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), shared
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Number of keys with a call in flight"""
+        return len(self._calls)
@@ -0,0 +1,155 @@
+"""
+Streaming response parsing for cqhyxk SDK
+
+Large page and face photo responses can be parsed incrementally from the HTTP
+stream with ``ijson``: each record of ``data.content`` is decoded and yielded as
+soon as its bytes arrive, so peak memory stays at one record instead of the
+whole body plus the whole response model.
+
+Requires the ``stream`` extra: ``pip install cqhyxk[stream]``.
+"""
+from typing import Any, Callable, Hashable, Iterator, Optional, Type
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+from pydantic import BaseModel
+
+from .decoding import DECODE_MODEL, decode_response
+from .exceptions import APIError, RequestError
+from .pagination import _PageKeys
+
+#: ``data.content`` 数组元素在 ijson 事件流中的前缀
+CONTENT_ITEM_PREFIX = "data.content.item"
+
+
+def _require_ijson() -> None:
+    if ijson is None:
+        raise ImportError("Streaming responses require ijson. Install it with: pip install cqhyxk[stream]")
+
+
+class ChunkReader:
+    """Minimal file-like adapter over an iterator of byte chunks (e.g. ``response.iter_content()``)"""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = iter(chunks)
+
+    def read(self, size: int = -1) -> bytes:
+        # ijson probes the stream type with read(0), which must not consume data.
+        if size == 0:
+            return b""
+        # An empty result means EOF to the parser, so skip empty chunks.
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+
+class StreamingPage:
+    """
+    A response whose ``data.content`` records are parsed while they are downloaded.
+
+    Iterate over the page to receive the records as models (or dicts in ``raw`` mode). ``code``, ``message``
+    and ``total`` are filled in as the corresponding fields are parsed and are
+    complete once iteration has finished. A page can be iterated only once; the
+    underlying connection is released when iteration ends.
+
+    An error ``code`` raises :class:`~cqhyxk.exceptions.APIError` as soon as it
+    is seen, or at the end of the stream if it follows the records.
+    """
+
+    def __init__(self, stream: Any, model: Type[BaseModel], close: Optional[Callable[[], None]] = None,
+                 success_code: str = "00000000", decode: str = DECODE_MODEL):
+        """
+        Args:
+            stream: Binary file-like object with a ``read`` method, e.g. a :class:`ChunkReader`
+            model (Type[BaseModel]): Model built from each record
+            close (Optional[Callable[[], None]]): Called when iteration ends
+            success_code (str): Code of a successful response
+            decode (str): Decode mode of each record, see :mod:`cqhyxk.decoding`
+        """
+        _require_ijson()
+        self._stream = stream
+        self._model = model
+        self._close = close
+        self._success_code = success_code
+        self._decode = decode
+        self._consumed = False
+        self.code: Optional[str] = None
+        self.message: Optional[str] = None
+        self.total: Optional[int] = None
+        self.size: Optional[int] = None
+        #: 已解析的记录数
+        self.count = 0
+
+    def _check_code(self) -> None:
+        if self.code is not None and self.code != self._success_code:
+            raise APIError(message=self.message or 'Unknown error', code=self.code)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._consumed:
+            raise RuntimeError("A StreamingPage can only be iterated once")
+        self._consumed = True
+        builder = None
+        try:
+            for prefix, event, value in ijson.parse(self._stream, use_float=True):
+                if builder is not None:
+                    if prefix == CONTENT_ITEM_PREFIX and event == "end_map":
+                        item = builder.value
+                        builder = None
+                        self.count += 1
+                        yield decode_response(self._model, item, self._decode)
+                    else:
+                        builder.event(event, value)
+                elif prefix == CONTENT_ITEM_PREFIX and event == "start_map":
+                    self._check_code()
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                elif prefix == "code" and event in ("string", "number"):
+                    self.code = str(value)
+                elif prefix == "message" and event == "string":
+                    self.message = value
+                    self._check_code()
+                elif prefix in ("data.page.total", "data.total") and event == "number":
+                    self.total = int(value)
+                elif prefix in ("data.page.size", "data.size") and event == "number":
+                    self.size = int(value)
+            self._check_code()
+        except ijson.JSONError as e:
+            raise RequestError(f"Failed to decode JSON response: {str(e)}")
+        except OSError as e:
+            raise RequestError(f"Request failed: {str(e)}")
+        finally:
+            if self._close is not None:
+                self._close()
+
+
+def iter_streamed_page_items(
+    fetch_page: Callable[[Any], StreamingPage],
+    request: Any,
+    key: Optional[Callable[[Any], Hashable]] = None,
+) -> Iterator[Any]:
+    """
+    Streaming counterpart of :func:`~cqhyxk.pagination.iter_page_items`.
+
+    Records are yielded while each page is still downloading, so only one
+    record is held in memory at a time.
+    """
+    seen = _PageKeys(key) if key is not None else None
+    fetched = 0
+    while True:
+        page = fetch_page(request)
+        for item in page:
+            if seen is not None and seen.repeated(item):
+                continue
+            yield item
+        if not page.count:
+            return
+        fetched += page.count
+        if page.count < request.size or (page.total is not None and fetched >= page.total):
+            return
+        request.current += 1
+        if seen is not None:
+            seen.next_page()
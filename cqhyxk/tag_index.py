@@ -0,0 +1,344 @@
+"""
+Inverted tag membership index for cqhyxk SDK
+
+:class:`TagIndex` maps each ``tagId`` to its members and each ``sourceUserId``
+to its tags. Members are interned to small integer ids and the members of a
+tag are kept as a bitmap (a Python ``int`` with one bit per member), so
+audience queries such as "tag A and tag B but not tag C" are a few big-integer
+operations instead of page scans and set building.
+"""
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .decoding import DECODE_RAW
+from .events import EntityChange
+from .models import DataChangeStatus, EventType, MemberTagPageRequest
+
+#: 每个字节值中置位的比特位置
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+def _field(item: Any, name: str) -> Optional[str]:
+    return item.get(name) if isinstance(item, dict) else getattr(item, name)
+
+
+def bits_of(members: Iterable[int]) -> int:
+    """Build the bitmap of a collection of member ids"""
+    members = list(members)
+    if not members:
+        return 0
+    buffer = bytearray(max(members) // 8 + 1)
+    for member in members:
+        buffer[member >> 3] |= 1 << (member & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the positions of the set bits of a non-negative int in ascending order"""
+    for offset, value in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        if value:
+            base = offset * 8
+            for bit in _BYTE_BITS[value]:
+                yield base + bit
+
+
+class MemberSet:
+    """
+    成员集合
+
+    An immutable set of members of one :class:`TagIndex`. Sets support ``&``,
+    ``|``, ``-``, ``^`` and ``~`` (complement within all indexed members);
+    ``len`` is a popcount and iteration yields ``sourceUserId`` values.
+    """
+
+    __slots__ = ("_index", "bits")
+
+    def __init__(self, index: "TagIndex", bits: int):
+        self._index = index
+        self.bits = bits
+
+    def _combine(self, other: "MemberSet", bits: int) -> "MemberSet":
+        if other._index is not self._index:
+            raise ValueError("MemberSets of different indexes cannot be combined")
+        return MemberSet(self._index, bits)
+
+    def __and__(self, other: "MemberSet") -> "MemberSet":
+        return self._combine(other, self.bits & other.bits)
+
+    def __or__(self, other: "MemberSet") -> "MemberSet":
+        return self._combine(other, self.bits | other.bits)
+
+    def __sub__(self, other: "MemberSet") -> "MemberSet":
+        return self._combine(other, self.bits & ~other.bits)
+
+    def __xor__(self, other: "MemberSet") -> "MemberSet":
+        return self._combine(other, self.bits ^ other.bits)
+
+    def __invert__(self) -> "MemberSet":
+        return MemberSet(self._index, self._index.all().bits & ~self.bits)
+
+    def __len__(self) -> int:
+        return bin(self.bits).count("1")
+
+    def __bool__(self) -> bool:
+        return self.bits != 0
+
+    def __contains__(self, source_user_id: str) -> bool:
+        member = self._index._ids.get(source_user_id)
+        return member is not None and bool(self.bits >> member & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        users = self._index._users
+        for member in iter_bits(self.bits):
+            yield users[member]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, MemberSet) and other._index is self._index and other.bits == self.bits
+
+    def __hash__(self) -> int:
+        return hash(self.bits)
+
+    def __repr__(self) -> str:
+        return f"MemberSet({len(self)} members)"
+
+    def to_set(self) -> Set[str]:
+        """Return the members as a set of ``sourceUserId``"""
+        return set(self)
+
+
+class TagIndex:
+    """
+    In-memory tag membership index built from member-tag pages.
+
+    Memberships are added in bulk, one bitmap rebuild per tag and call. A tag
+    lookup is O(1); combining sets and removing a membership cost one
+    big-integer operation, proportional to the number of indexed members / 64. Member ids are never reused, so a
+    deleted member leaves a cleared bit behind until :meth:`compact`.
+
+    The index is thread-safe, so it can be updated from an
+    :class:`~cqhyxk.events.EventProcessor` handler while other threads query it.
+
+    Example::
+
+        index = TagIndex.from_client(client)
+        audience = index.tag("A") & index.tag("B") - index.tag("C")
+        print(len(audience), sorted(audience))
+        index.query(all_of=["A", "B"], none_of=["C"])   # the same
+
+        with EventProcessor(client, index.apply) as processor:
+            processor.submit(callback_request)          # keeps the index current
+    """
+
+    def __init__(self, member_tags: Iterable[Any] = ()):
+        """
+        Args:
+            member_tags (Iterable[Any]): Memberships as :class:`~cqhyxk.models.MemberTagInfo`
+                or raw dicts, e.g. ``client.iter_member_tags(decode="raw")``
+        """
+        self._lock = threading.RLock()
+        self._ids: Dict[str, int] = {}
+        self._users: List[Optional[str]] = []
+        self._all = 0
+        self._tags: Dict[str, int] = {}
+        self._user_tags: Dict[str, Set[str]] = {}
+        self.add(member_tags)
+
+    @classmethod
+    def from_client(cls, client, request: Optional[MemberTagPageRequest] = None,
+                    page_size: Optional[int] = None) -> "TagIndex":
+        """
+        Build the index from a full scan of :meth:`CqhyxkClient.iter_member_tags`.
+
+        Args:
+            client (CqhyxkClient): API client
+            request (Optional[MemberTagPageRequest]): Scan filters, e.g. one ``tagId``
+            page_size (Optional[int]): Page size of the scan
+        """
+        kwargs = {"page_size": page_size} if page_size else {}
+        return cls(client.iter_member_tags(request, decode=DECODE_RAW, **kwargs))
+
+    def __len__(self) -> int:
+        """Number of indexed members"""
+        return len(self._ids)
+
+    def __contains__(self, source_user_id: str) -> bool:
+        return source_user_id in self._ids
+
+    # ------------------------------------------------------------------ writes
+
+    def _intern(self, source_user_id: str) -> int:
+        member = self._ids.get(source_user_id)
+        if member is None:
+            member = self._ids[source_user_id] = len(self._users)
+            self._users.append(source_user_id)
+        return member
+
+    def _extend_all(self, start: int) -> None:
+        # New members get consecutive ids from ``start``.
+        self._all |= ((1 << (len(self._users) - start)) - 1) << start
+
+    def add(self, member_tags: Iterable[Any]) -> int:
+        """
+        Add memberships; returns the number of memberships read.
+
+        Memberships without ``sourceUserId`` or ``tagId`` are skipped.
+        """
+        count = 0
+        with self._lock:
+            start = len(self._users)
+            # Collect members per tag first, so each tag bitmap is rebuilt once per call.
+            added: Dict[str, List[int]] = {}
+            for item in member_tags:
+                source_user_id, tag_id = _field(item, "sourceUserId"), _field(item, "tagId")
+                if source_user_id is None or tag_id is None:
+                    continue
+                count += 1
+                self._user_tags.setdefault(source_user_id, set()).add(tag_id)
+                added.setdefault(tag_id, []).append(self._intern(source_user_id))
+            for tag_id, members in added.items():
+                self._tags[tag_id] = self._tags.get(tag_id, 0) | bits_of(members)
+            self._extend_all(start)
+        return count
+
+    def add_members(self, source_user_ids: Iterable[str]) -> None:
+        """Index members without tags, so that complements (``~``, ``none_of``) include them"""
+        with self._lock:
+            start = len(self._users)
+            for source_user_id in source_user_ids:
+                self._intern(source_user_id)
+                self._user_tags.setdefault(source_user_id, set())
+            self._extend_all(start)
+
+    def remove(self, source_user_id: str, tag_id: str) -> None:
+        """Remove one membership"""
+        with self._lock:
+            member = self._ids.get(source_user_id)
+            if member is None or tag_id not in self._tags:
+                return
+            self._tags[tag_id] &= ~(1 << member)
+            self._user_tags[source_user_id].discard(tag_id)
+
+    def replace_tag_members(self, tag_id: str, member_tags: Iterable[Any]) -> int:
+        """Replace all memberships of a tag, e.g. after a tag member change event"""
+        with self._lock:
+            self._delete_tag(tag_id)
+            self._tags[tag_id] = 0
+            return self.add(member_tags)
+
+    def delete_tags(self, tag_ids: Iterable[str]) -> None:
+        """Remove tags and all their memberships"""
+        with self._lock:
+            for tag_id in tag_ids:
+                self._delete_tag(tag_id)
+
+    def _delete_tag(self, tag_id: str) -> None:
+        bits = self._tags.pop(tag_id, 0)
+        users = self._users
+        for member in iter_bits(bits):
+            self._user_tags[users[member]].discard(tag_id)
+
+    def delete_members(self, source_user_ids: Iterable[str]) -> None:
+        """Remove members and all their memberships"""
+        with self._lock:
+            for source_user_id in source_user_ids:
+                member = self._ids.pop(source_user_id, None)
+                if member is None:
+                    continue
+                mask = ~(1 << member)
+                for tag_id in self._user_tags.pop(source_user_id, ()):
+                    if tag_id in self._tags:
+                        self._tags[tag_id] &= mask
+                self._all &= mask
+                self._users[member] = None
+
+    def compact(self) -> None:
+        """Renumber the members to drop the bits left by deleted members"""
+        with self._lock:
+            memberships = [(source_user_id, tag_id)
+                           for source_user_id, tags in self._user_tags.items() for tag_id in tags]
+            untagged = [source_user_id for source_user_id, tags in self._user_tags.items() if not tags]
+            tag_ids = list(self._tags)
+            self._ids, self._users, self._all = {}, [], 0
+            self._tags = dict.fromkeys(tag_ids, 0)
+            self._user_tags = {}
+            self.add({"sourceUserId": source_user_id, "tagId": tag_id} for source_user_id, tag_id in memberships)
+            self.add_members(untagged)
+
+    # ----------------------------------------------------------------- events
+
+    def apply(self, changes: Iterable[EntityChange]) -> None:
+        """
+        Apply re-fetched changes from an :class:`~cqhyxk.events.EventProcessor`.
+
+        ``TAG_MEMBER`` changes, whether members were added or removed, replace
+        the members of the tag with the re-fetched ones, and deleted tags and
+        personnel are removed. Other changes, and changes whose re-fetch
+        failed, are ignored.
+        """
+        with self._lock:
+            for change in changes:
+                deleted = change.data_status == DataChangeStatus.DELETED
+                if change.event_type == EventType.TAG_MEMBER:
+                    if change.error is None and change.data is not None:
+                        self.replace_tag_members(change.data_id, change.data)
+                elif change.event_type == EventType.TAG and deleted:
+                    self.delete_tags([change.data_id])
+                elif change.event_type == EventType.PERSONNEL and deleted:
+                    self.delete_members([change.data_id])
+
+    def refresh_tag(self, client, tag_id: str) -> int:
+        """Re-fetch the members of one tag and replace them in the index"""
+        members = list(client.iter_member_tags(MemberTagPageRequest(tagId=tag_id), decode=DECODE_RAW))
+        return self.replace_tag_members(tag_id, members)
+
+    # ---------------------------------------------------------------- queries
+
+    def tag_ids(self) -> List[str]:
+        """Return the indexed tag ids"""
+        with self._lock:
+            return list(self._tags)
+
+    def tag(self, tag_id: str) -> MemberSet:
+        """Return the members of a tag, empty for unknown tags"""
+        return MemberSet(self, self._tags.get(tag_id, 0))
+
+    def all(self) -> MemberSet:
+        """Return all indexed members"""
+        return MemberSet(self, self._all)
+
+    def tags_of(self, source_user_id: str) -> Set[str]:
+        """Return the tag ids of a member"""
+        with self._lock:
+            return set(self._user_tags.get(source_user_id, ()))
+
+    def count(self, tag_id: str) -> int:
+        """Return the number of members of a tag"""
+        return bin(self._tags.get(tag_id, 0)).count("1")
+
+    def query(self, all_of: Iterable[str] = (), any_of: Iterable[str] = (),
+              none_of: Iterable[str] = ()) -> MemberSet:
+        """
+        Select members by tags.
+
+        Args:
+            all_of (Iterable[str]): Members must have every one of these tags
+            any_of (Iterable[str]): Members must have at least one of these tags, if any are given
+            none_of (Iterable[str]): Members must have none of these tags
+
+        Returns:
+            MemberSet: The matching members; all members if no tags are given
+        """
+        with self._lock:
+            tags = self._tags
+            bits = self._all
+            for tag_id in all_of:
+                bits &= tags.get(tag_id, 0)
+            any_of = list(any_of)
+            if any_of:
+                union = 0
+                for tag_id in any_of:
+                    union |= tags.get(tag_id, 0)
+                bits &= union
+            for tag_id in none_of:
+                bits &= ~tags.get(tag_id, 0)
+        return MemberSet(self, bits)
@@ -0,0 +1,82 @@
+"""
+Request timeouts and deadline budgets for cqhyxk SDK
+"""
+import time
+from typing import Callable, Optional, Tuple, Union
+
+from .exceptions import DeadlineExceeded
+
+#: 超时设置：秒数、(连接超时, 读取超时) 或 None（不限制）
+Timeout = Union[None, float, Tuple[Optional[float], Optional[float]]]
+
+#: 默认连接超时（秒）
+DEFAULT_CONNECT_TIMEOUT = 5.0
+#: 默认读取超时（秒）
+DEFAULT_READ_TIMEOUT = 30.0
+#: 默认超时设置
+DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+
+class Deadline:
+    """
+    截止时间
+
+    An overall time budget shared by several calls, e.g. every page request of a
+    scan. Each request's connect and read timeouts are capped by the remaining
+    budget, and no request or retry is started once it has run out.
+
+    Note that a read timeout bounds each socket read, not the whole response, so
+    a response trickling in slowly can overrun the deadline by up to one read timeout.
+
+    Example::
+
+        for identity in client.iter_identities(deadline=Deadline(600)):
+            ...
+    """
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            seconds (float): Budget in seconds from now
+            clock (Callable[[], float]): Monotonic clock
+        """
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    @classmethod
+    def coerce(cls, deadline: Union[None, float, "Deadline"]) -> Optional["Deadline"]:
+        """Return ``deadline`` as a Deadline, starting a new one if it is a number of seconds"""
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self) -> float:
+        """Seconds left, zero once expired"""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self._clock() >= self.expires_at
+
+    def check(self) -> float:
+        """Return the seconds left, or raise DeadlineExceeded if the deadline has passed"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline exceeded")
+        return remaining
+
+    def cap(self, timeout: Timeout) -> Tuple[float, float]:
+        """
+        Cap a timeout by the remaining budget.
+
+        Raises:
+            DeadlineExceeded: If the deadline has passed
+        """
+        remaining = self.check()
+        if timeout is None:
+            return remaining, remaining
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        connect, read = timeout
+        return (min(connect, remaining) if connect is not None else remaining,
+                min(read, remaining) if read is not None else remaining)
@@ -0,0 +1,101 @@
+"""
+Request handling shared by the cqhyxk clients
+
+:class:`~cqhyxk.client.CqhyxkClient` (``requests``) and
+:class:`~cqhyxk.async_client.AsyncCqhyxkClient` (``httpx``) only differ in how
+they send a request and which exceptions their HTTP library raises. Building
+the request body, checking and decoding the response and deciding whether and
+when a failed attempt is retried are implemented here once for both.
+"""
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .exceptions import APIError, AuthenticationError, check_response_data
+from .metrics import MetricsSink, METRIC_JSON_DECODE, METRIC_MODEL
+from .retry import RetryPolicy, AdaptiveRateLimiter, TRANSIENT_STATUSES, parse_retry_after
+
+if TYPE_CHECKING:
+    from .codec import JsonCodec, SchemaDecoder
+
+
+def build_request(base_url: str, endpoint: str, json_data: Optional[Dict], codec: 'JsonCodec') -> Tuple[str, Optional[bytes]]:
+    """Return the URL of ``endpoint`` and the encoded request body, if any"""
+    body = codec.dumps(json_data) if json_data is not None else None
+    return f"{base_url}{endpoint}", body
+
+
+def read_response(response: Any, endpoint: str, codec: 'JsonCodec', metrics: MetricsSink,
+                  schema: Optional['SchemaDecoder'] = None) -> Any:
+    """
+    Check a ``requests`` or ``httpx`` response and decode its body.
+
+    Args:
+        response: HTTP response with ``status_code``, ``content`` and ``raise_for_status()``
+        endpoint (str): API endpoint, labelling the decode metrics
+        codec (JsonCodec): Codec decoding the body
+        metrics (MetricsSink): Receiver of the decode and model construction times
+        schema (Optional[SchemaDecoder]): Codec decoder building the response model directly
+
+    Returns:
+        Any: JSON response from the API, or the model built by ``schema``
+
+    Raises:
+        AuthenticationError: If authentication fails
+        APIError: If the API returns an error response
+        json.JSONDecodeError: If the body is not valid JSON
+        The HTTP library's status error: If the response has an error status
+    """
+    if response.status_code == 401:
+        raise AuthenticationError("Authentication failed. Please check your app key and secret.")
+
+    response.raise_for_status()
+
+    # Parse the JSON response, into the structs of a schema decoder if there is one.
+    started = time.perf_counter()
+    parsed = schema.parse(response.content) if schema is not None else None
+    if parsed is None:
+        data = codec.loads(response.content)
+    metrics.observe(endpoint, METRIC_JSON_DECODE, time.perf_counter() - started)
+
+    if parsed is None:
+        return check_response_data(data)
+    started = time.perf_counter()
+    result = schema.build(parsed)
+    metrics.observe(endpoint, METRIC_MODEL, time.perf_counter() - started)
+    return result
+
+
+def retry_delay(error: Exception, attempt: int, idempotent: bool, retry: Optional[RetryPolicy],
+                rate_limiter: Optional[AdaptiveRateLimiter], response: Any = None,
+                transport_error: bool = False) -> Optional[float]:
+    """
+    Signal a failed attempt to the rate limiter and return the seconds to wait before retrying it,
+    or None if it must not be retried.
+
+    Args:
+        error (Exception): The failure, an :class:`~cqhyxk.exceptions.APIError` or an HTTP library error
+        attempt (int): Number of the failed attempt, starting at 0
+        idempotent (bool): Whether the call may be retried
+        retry (Optional[RetryPolicy]): Retry policy of the client
+        rate_limiter (Optional[AdaptiveRateLimiter]): Rate limiter of the client
+        response: Response of an HTTP status error
+        transport_error (bool): Whether ``error`` is a connection error or timeout
+    """
+    retry_after = None
+    if isinstance(error, APIError):
+        transient = retry is not None and error.code in retry.retry_codes
+    elif response is not None:
+        statuses = retry.retry_statuses if retry is not None else TRANSIENT_STATUSES
+        transient = response.status_code in statuses
+        if transient:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+    else:
+        transient = transport_error
+
+    if not transient:
+        return None
+    if rate_limiter is not None:
+        rate_limiter.on_throttle()
+    if retry is None or not idempotent:
+        return None
+    return retry.delay(attempt, retry_after)
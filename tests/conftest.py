@@ -0,0 +1,44 @@
+"""
+Shared fixtures: the SDK is exercised against ``benchmarks/mock_server.py``
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+from mock_server import MockConfig, start  # noqa: E402
+
+from cqhyxk.client import CqhyxkClient  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    """Start mock servers with ``mock_server(**config)``; they are shut down after the test"""
+    servers = []
+
+    def make(**config):
+        server = start(MockConfig(**config), poll_interval=0.01)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def make_client(mock_server):
+    """Build ``CqhyxkClient`` instances against a fresh mock server: ``make_client(mock_config, **client_options)``"""
+
+    def make(config=None, **options):
+        server = mock_server(**(config or {}))
+        client = CqhyxkClient("key", "secret", server.url, **options)
+        client.server = server
+        return client
+
+    return make
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from cqhyxk.async_client import AsyncCqhyxkClient
+from cqhyxk.exceptions import AuthenticationError
+from cqhyxk.metrics import METRIC_COALESCED
+from cqhyxk.models import IdentityPageRequest
+
+pytest.importorskip("httpx")
+
+ORG_LIST = "/open-api/org/list"
+
+
+def _run(server, scenario, **options):
+    async def main():
+        async with AsyncCqhyxkClient("key", "secret", server.url, **options) as client:
+            return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_responses_match_the_sync_client(mock_server, make_client):
+    server = mock_server(identities=50)
+    sync_client = make_client({"identities": 50})
+
+    async def scenario(client):
+        return (await client.get_org_list(), await client.get_tag_list(tag_id="tag0003"),
+                await client.get_identity_list(IdentityPageRequest(current=1, size=20)))
+
+    orgs, tags, page = _run(server, scenario)
+    assert orgs == sync_client.get_org_list()
+    assert tags == sync_client.get_tag_list(tag_id="tag0003")
+    assert page == sync_client.get_identity_list(IdentityPageRequest(current=1, size=20))
+
+
+def test_iter_and_fan_out_cover_every_record(mock_server):
+    server = mock_server(identities=230, jitter=0.01)
+
+    async def scenario(client):
+        ids = [identity.sourceUserId async for identity in client.iter_identities(page_size=25)]
+        pages = [page async for page in client.get_identity_pages(page_size=25, max_workers=4, ordered=False)]
+        return ids, pages
+
+    ids, pages = _run(server, scenario)
+    expected = [f"u{index:08d}" for index in range(230)]
+    assert ids == expected
+    assert len(pages) == 10
+    assert sorted(identity.sourceUserId for page in pages for identity in page.data.content) == expected
+
+
+def test_concurrent_identical_calls_are_coalesced(mock_server):
+    server = mock_server(latency=0.1)
+
+    async def scenario(client):
+        results = await asyncio.gather(*(client.get_org_list() for _ in range(8)))
+        return results, client.metrics.counter(ORG_LIST, METRIC_COALESCED)
+
+    results, coalesced = _run(server, scenario, coalesce=True)
+    assert server.requests == 1
+    assert coalesced == 7
+    # Each caller receives its own model.
+    assert results[0] == results[1] and results[0] is not results[1]
+    results[0].data.content.clear()
+    assert results[1].data.content
+
+
+def test_missing_credentials_raise(mock_server):
+    server = mock_server()
+
+    async def scenario(client):
+        client.session.headers.pop("app-secret")
+        await client.get_org_list()
+
+    with pytest.raises(AuthenticationError):
+        _run(server, scenario)
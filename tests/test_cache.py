@@ -0,0 +1,109 @@
+import threading
+import time
+
+from cqhyxk.cache import ResponseCache
+from cqhyxk.decoding import DECODE_CONSTRUCT, DECODE_RAW
+from cqhyxk.models import CallbackRequest, OrgListResponse
+from cqhyxk.timeouts import Deadline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hits_are_served_from_the_cache(make_client):
+    client = make_client(cache=ResponseCache())
+    first = client.get_org_list()
+    requests = client.server.requests
+
+    assert client.get_org_list() == first
+    assert client.server.requests == requests
+
+
+def test_hits_cannot_change_the_cached_entry(make_client):
+    client = make_client(cache=ResponseCache())
+    client.get_org_list().data.content.clear()
+    client.get_org_list(decode=DECODE_RAW)["data"]["content"].clear()
+
+    assert client.get_org_list().data.content
+    assert client.get_org_list(decode=DECODE_RAW)["data"]["content"]
+
+
+def test_hits_honour_the_decode_mode(make_client):
+    client = make_client(cache=ResponseCache())
+    client.get_org_list()
+
+    assert isinstance(client.get_org_list(decode=DECODE_CONSTRUCT), OrgListResponse)
+    assert isinstance(client.get_org_list(decode=DECODE_RAW), dict)
+
+
+def test_invalidate_event_evicts_affected_lists(make_client):
+    cache = ResponseCache()
+    client = make_client(cache=cache)
+    client.get_org_list()
+    client.get_tag_list()
+
+    assert cache.invalidate_event(CallbackRequest(eventType=2, dataStatus=2, dataIds=["org00001"])) == 1
+    assert len(cache) == 1
+
+
+def test_fetch_in_flight_during_invalidation_is_not_stored():
+    cache = ResponseCache({"/e": 60})
+    started, release = threading.Event(), threading.Event()
+
+    def slow_fetch():
+        started.set()
+        release.wait(5)
+        return "old"
+
+    thread = threading.Thread(target=cache.get_or_fetch, args=("/e", None, slow_fetch))
+    thread.start()
+    started.wait(5)
+    cache.invalidate("/e")
+    release.set()
+    thread.join()
+
+    assert cache.get_or_fetch("/e", None, lambda: "new") == "new"
+    assert cache.get_or_fetch("/e", None, lambda: "newer") == "new"
+
+
+def test_stale_entries_are_refreshed_in_the_background():
+    clock = FakeClock()
+    cache = ResponseCache({"/e": 10}, stale_while_revalidate=10, clock=clock)
+    cache.get_or_fetch("/e", None, lambda: "old")
+    clock.now = 15
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return "new"
+
+    assert cache.get_or_fetch("/e", None, lambda: "caller", refresh=refresh) == "old"
+    assert refreshed.wait(5)
+    for _ in range(100):
+        if cache.get_or_fetch("/e", None, lambda: "caller") == "new":
+            break
+        time.sleep(0.01)
+    assert cache.get_or_fetch("/e", None, lambda: "caller") == "new"
+
+
+def test_background_refresh_ignores_the_callers_deadline(make_client):
+    clock = FakeClock()
+    cache = ResponseCache(stale_while_revalidate=3600, clock=clock)
+    client = make_client(cache=cache)
+    client.get_org_list()
+    clock.now = 400
+    deadline = Deadline(0.01)
+    time.sleep(0.02)
+
+    # The stale entry is served; its refresh must not run under the spent deadline.
+    assert client.get_org_list(deadline=deadline).data.content
+    for _ in range(500):
+        if not cache._refreshing:
+            break
+        time.sleep(0.01)
+    assert [entry.expires_at > clock.now for entry in cache._entries.values()] == [True]
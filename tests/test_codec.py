@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from cqhyxk.codec import JsonCodec, MsgspecCodec, OrjsonCodec
+from cqhyxk.decoding import DECODE_CONSTRUCT, DECODE_MODEL, DECODE_RAW, check_decode_mode, construct_model
+from cqhyxk.metrics import METRIC_JSON_DECODE, METRIC_MODEL
+from cqhyxk.models import IdentityInfo, IdentityPageRequest, IdentityPageResponse, MemberTagPageRequest
+
+IDENTITY_PAGE = "/open-api/member/identity/page"
+
+
+def _codec(factory):
+    try:
+        return factory()
+    except ImportError as e:
+        pytest.skip(str(e))
+
+
+def _responses(client, decode=None):
+    return (client.get_identity_list(IdentityPageRequest(current=1, size=20), decode=decode),
+            client.get_member_tags_page(MemberTagPageRequest(current=0, size=20), decode=decode),
+            client.get_face_photos("u00000003", decode=decode),
+            client.get_org_list(decode=decode))
+
+
+@pytest.mark.parametrize("factory", [JsonCodec, OrjsonCodec, MsgspecCodec])
+@pytest.mark.parametrize("decode", [DECODE_MODEL, DECODE_CONSTRUCT, DECODE_RAW])
+def test_codecs_decode_like_the_standard_library(make_client, factory, decode):
+    config = {"identities": 50, "photo_bytes": 256}
+    expected = _responses(make_client(config), decode)
+    client = make_client(config, codec=_codec(factory))
+    assert _responses(client, decode) == expected
+    assert client.metrics.percentile(IDENTITY_PAGE, METRIC_JSON_DECODE, 0.5) is not None
+
+
+def test_msgspec_decodes_pages_through_structs(make_client):
+    client = make_client({"identities": 30}, codec=_codec(MsgspecCodec))
+    page = client.get_identity_list(IdentityPageRequest(current=0, size=10))
+
+    assert isinstance(page, IdentityPageResponse) and isinstance(page.data.content[0], IdentityInfo)
+    assert client.metrics.snapshot()[IDENTITY_PAGE]["histograms"][METRIC_MODEL]["count"] == 1
+
+
+def test_msgspec_leaves_errors_and_unexpected_bodies_to_pydantic():
+    decoder = _codec(MsgspecCodec).schema_decoder(IdentityPageResponse)
+    error = {"code": "A0001", "message": "无权限", "data": None}
+    unexpected = {"code": "00000000", "message": "ok", "data": {"content": [{"sourceUserId": 1, "status": "x"}]}}
+    ok = {"code": "00000000", "message": "ok", "data": {"content": [{"sourceUserId": "u1", "status": 1}]}}
+
+    assert decoder(json.dumps(error).encode()) is None
+    assert decoder(json.dumps(unexpected).encode()) is None
+    assert decoder(json.dumps(ok).encode()) == IdentityPageResponse(**ok)
+
+
+@pytest.mark.parametrize("coalesce", [False, True])
+def test_coalescing_clients_skip_the_schema_decoder(make_client, monkeypatch, coalesce):
+    codec = _codec(MsgspecCodec)
+    parsed = []
+    schema_decoder = codec.schema_decoder
+
+    def spy(model_class):
+        decoder = schema_decoder(model_class)
+        return decoder and type(decoder)(lambda content: parsed.append(model_class) or decoder.parse(content), decoder.build)
+
+    monkeypatch.setattr(codec, "schema_decoder", spy)
+    client = make_client({"identities": 30}, codec=codec, coalesce=coalesce)
+    page = client.get_identity_list(IdentityPageRequest(current=0, size=10))
+
+    assert len(page.data.content) == 10
+    assert parsed == ([] if coalesce else [IdentityPageResponse])
+
+
+def test_construct_builds_the_same_models_without_validation(make_client):
+    client = make_client({"identities": 20})
+    raw = client.get_identity_list(IdentityPageRequest(current=0, size=20), decode=DECODE_RAW)
+    constructed = construct_model(IdentityPageResponse, raw)
+
+    assert constructed == IdentityPageResponse(**raw)
+    assert type(constructed.data.content[0].status) is type(IdentityPageResponse(**raw).data.content[0].status)
+
+
+def test_unknown_decode_modes_are_rejected(make_client):
+    assert check_decode_mode(DECODE_RAW) == DECODE_RAW
+    with pytest.raises(ValueError):
+        check_decode_mode("fast")
+    with pytest.raises(ValueError):
+        make_client(decode="fast")
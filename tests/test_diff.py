@@ -0,0 +1,55 @@
+import pytest
+
+from cqhyxk.diff import Snapshot
+from cqhyxk.models import DataChangeStatus, IdentityInfo, MemberTagInfo
+
+
+def _listing(client, decode="model"):
+    return list(client.iter_identities(page_size=50, decode=decode))
+
+
+def test_diff_reports_added_updated_and_deleted_records(make_client):
+    client = make_client({"identities": 100})
+    baseline = Snapshot.for_model(IdentityInfo, records=_listing(client))
+    assert len(baseline) == 100
+
+    listing = _listing(client)
+    listing[3] = listing[3].copy(update={"name": "新姓名", "mobile": "13900000000"})
+    del listing[7]
+    listing.append(IdentityInfo(sourceUserId="u99999999", name="新人"))
+    current = Snapshot.for_model(IdentityInfo)
+    diff = baseline.diff(listing, into=current)
+
+    assert [change.key for change in diff.added] == ["u99999999"]
+    assert [(change.key, change.fields) for change in diff.updated] == [("u00000003", ("name", "mobile"))]
+    assert [(change.key, change.data) for change in diff.deleted] == [("u00000007", None)]
+    assert len(diff) == 3
+    assert len(current) == 100
+    assert [change.data_status for change in baseline.compare(current)] == [
+        DataChangeStatus.ADDED, DataChangeStatus.UPDATED, DataChangeStatus.DELETED]
+
+
+def test_unchanged_listing_has_no_changes(make_client):
+    client = make_client({"identities": 60})
+    baseline = Snapshot.for_model(IdentityInfo, ignore=["updateTime"], records=_listing(client, "raw"))
+    assert len(baseline.diff(_listing(client, "raw"))) == 0
+
+
+def test_saved_snapshots_load_identically(make_client, tmp_path):
+    client = make_client({"identities": 40})
+    identities = Snapshot.for_model(IdentityInfo, records=_listing(client))
+    member_tags = Snapshot.for_model(MemberTagInfo, records=client.iter_member_tags(page_size=50))
+    assert len(member_tags) == 80
+
+    for name, snapshot in (("identities", identities), ("member-tags", member_tags)):
+        path = str(tmp_path / f"{name}.snapshot")
+        snapshot.save(path)
+        loaded = Snapshot.load(path)
+        assert (loaded.key_fields, loaded.fields) == (snapshot.key_fields, snapshot.fields)
+        assert sorted(loaded.keys()) == sorted(snapshot.keys())
+        assert len(snapshot.compare(loaded)) == 0
+
+
+def test_snapshots_of_different_fields_cannot_be_compared():
+    with pytest.raises(ValueError):
+        Snapshot("sourceUserId", ["name"]).compare(Snapshot("sourceUserId", ["mobile"]))
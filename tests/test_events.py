@@ -0,0 +1,119 @@
+import threading
+
+from cqhyxk.events import FULL_LIST_THRESHOLD, MAX_REQUEUES, EventProcessor, merge_status
+from cqhyxk.models import CallbackRequest, DataChangeStatus, EventType
+
+ADDED, UPDATED, DELETED = DataChangeStatus.ADDED, DataChangeStatus.UPDATED, DataChangeStatus.DELETED
+
+
+def _event(event_type, status, *data_ids):
+    return CallbackRequest(eventType=event_type, dataStatus=status, dataIds=list(data_ids))
+
+
+def _collect(client, events, window=0.05):
+    batches = []
+    with EventProcessor(client, batches.append, window=window) as processor:
+        for event in events:
+            processor.submit(event)
+    return batches
+
+
+def test_merge_status():
+    assert merge_status(None, UPDATED) == UPDATED
+    assert merge_status(ADDED, UPDATED) == ADDED
+    assert merge_status(ADDED, DELETED) == DELETED
+    assert merge_status(DELETED, ADDED) == ADDED
+    assert merge_status(ADDED, DELETED, EventType.TAG_MEMBER) == UPDATED
+    assert merge_status(DELETED, DELETED, EventType.TAG_MEMBER) == DELETED
+
+
+def test_events_are_merged_and_refetched_in_one_batch(make_client):
+    client = make_client({"identities": 10, "tags": 5})
+    batches = _collect(client, [
+        _event(EventType.PERSONNEL, ADDED, "u00000001", "u00000002"),
+        _event(EventType.PERSONNEL, UPDATED, "u00000001"),
+        _event(EventType.PERSONNEL, DELETED, "u00000002"),
+        _event(EventType.ORGANIZATION, UPDATED, "org00003"),
+        _event(EventType.TAG_MEMBER, ADDED, "tag0002"),
+    ])
+
+    assert len(batches) == 1
+    changes = {(change.event_type, change.data_id): change for change in batches[0]}
+    assert len(changes) == 4
+    added = changes[EventType.PERSONNEL, "u00000001"]
+    assert (added.data_status, added.data.name) == (ADDED, "姓名1")
+    deleted = changes[EventType.PERSONNEL, "u00000002"]
+    assert (deleted.data_status, deleted.data) == (DELETED, None)
+    assert changes[EventType.ORGANIZATION, "org00003"].data.orgName == "组织3"
+    members = changes[EventType.TAG_MEMBER, "tag0002"].data
+    assert {member.tagId for member in members} == {"tag0002"}
+    assert len(members) == 4
+
+
+def test_many_changes_fetch_the_full_list_once(make_client):
+    client = make_client({"orgs": 50})
+    org_ids = [f"org{index:05d}" for index in range(FULL_LIST_THRESHOLD + 1)]
+    batches = _collect(client, [_event(EventType.ORGANIZATION, UPDATED, *org_ids)])
+
+    assert client.server.requests == 1
+    assert sorted(change.data.orgId for change in batches[0]) == org_ids
+
+
+def test_missing_entities_have_no_data(make_client):
+    client = make_client({"identities": 3})
+    batches = _collect(client, [_event(EventType.PERSONNEL, UPDATED, "u00000099")])
+    assert [(change.data, change.error) for change in batches[0]] == [(None, None)]
+
+
+def test_unexpected_failures_are_requeued(make_client, monkeypatch):
+    client = make_client({"identities": 3})
+    get_identity_list = client.get_identity_list
+    failures = []
+    lock = threading.Lock()
+
+    def flaky(*args, **kwargs):
+        with lock:
+            if len(failures) < 2:
+                failures.append(True)
+                raise ValueError("boom")
+        return get_identity_list(*args, **kwargs)
+
+    monkeypatch.setattr(client, "get_identity_list", flaky)
+    delivered = threading.Event()
+    batches = []
+
+    def handle(changes):
+        batches.append(changes)
+        delivered.set()
+
+    with EventProcessor(client, handle, window=0.01) as processor:
+        processor.submit(_event(EventType.PERSONNEL, UPDATED, "u00000001"))
+        assert delivered.wait(5)
+
+    assert len(failures) == 2
+    assert [change.data.sourceUserId for change in batches[0]] == ["u00000001"]
+
+
+def test_requeues_are_bounded(make_client, monkeypatch):
+    client = make_client({"identities": 3})
+    calls = []
+
+    def broken(*args, **kwargs):
+        calls.append(True)
+        raise ValueError("boom")
+
+    monkeypatch.setattr(client, "get_identity_list", broken)
+    delivered = threading.Event()
+    batches = []
+
+    def handle(changes):
+        batches.append(changes)
+        delivered.set()
+
+    with EventProcessor(client, handle, window=0.01) as processor:
+        processor.submit(_event(EventType.PERSONNEL, UPDATED, "u00000001"))
+        assert delivered.wait(5)
+
+    change, = batches[0]
+    assert change.error == "boom"
+    assert len(calls) == MAX_REQUEUES + 1
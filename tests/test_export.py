@@ -0,0 +1,53 @@
+from datetime import timezone
+
+import pytest
+from mock_server import BASE_TIME
+
+from cqhyxk.export import (
+    FORMAT_ARROW, FORMAT_PARQUET, MEMBER_TAG_COLUMNS, export_identities, export_member_tags, schema_for, write_batches
+)
+
+pa = pytest.importorskip("pyarrow")
+
+
+def _read(path, format):
+    if format == FORMAT_ARROW:
+        return pa.ipc.open_file(pa.memory_map(path)).read_all()
+    import pyarrow.parquet as pq
+    return pq.read_table(path)
+
+
+@pytest.mark.parametrize("format", [FORMAT_ARROW, FORMAT_PARQUET])
+def test_identities_round_trip(make_client, tmp_path, format):
+    client = make_client({"identities": 75, "orgs": 10})
+    path = str(tmp_path / f"identities.{format}")
+    assert export_identities(client, path, format=format, page_size=20, batch_size=30) == 75
+
+    table = _read(path, format)
+    assert table.num_rows == 75
+    assert table.column("sourceUserId").to_pylist() == [f"u{index:08d}" for index in range(75)]
+    assert table.column("status").to_pylist()[:4] == [1, 2, 3, 4]
+    # Batches after the first one extend the dictionaries.
+    assert sorted(set(table.column("nativePlace").to_pylist())) == sorted({f"籍贯{index % 34}" for index in range(75)})
+    assert table.column("orgIds").to_pylist()[1] == ["org00002"]
+    assert table.column("dataMap").to_pylist()[0] == '{"grade": "2020", "major": "专业0"}'
+
+    # Mock times carry no offset, so they are local times.
+    expected = BASE_TIME.replace(second=7).astimezone(timezone.utc)
+    assert table.schema.field("updateTime").type == pa.timestamp("ms", tz="UTC")
+    assert table.column("updateTime").to_pylist()[7] == expected
+
+
+def test_member_tags_export(make_client, tmp_path):
+    client = make_client({"identities": 30, "tags": 4})
+    path = str(tmp_path / "member-tags.arrow")
+    assert export_member_tags(client, path, page_size=25, batch_size=16) == 60
+
+    table = _read(path, FORMAT_ARROW)
+    assert pa.types.is_dictionary(table.schema.field("tagId").type)
+    assert sorted(set(table.column("tagId").to_pylist())) == [f"tag{index:04d}" for index in range(4)]
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_batches([], str(tmp_path / "out"), schema_for(MEMBER_TAG_COLUMNS), format="csv")
@@ -0,0 +1,29 @@
+import importlib.util
+import subprocess
+import sys
+
+import pytest
+
+from .conftest import ROOT
+
+
+def _loaded_modules(statement: str):
+    code = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, stdout=subprocess.PIPE, text=True, check=True).stdout
+    return set(output.split())
+
+
+def test_import_cqhyxk_loads_no_client():
+    modules = _loaded_modules("import cqhyxk")
+    assert "requests" not in modules
+    assert "cqhyxk.client" not in modules
+
+
+@pytest.mark.parametrize("statement", [
+    "from cqhyxk import CqhyxkClient; CqhyxkClient('key', 'secret', 'http://localhost')",
+    pytest.param("from cqhyxk import AsyncCqhyxkClient; AsyncCqhyxkClient('key', 'secret', 'http://localhost')",
+                 marks=pytest.mark.skipif(importlib.util.find_spec("httpx") is None, reason="httpx is not installed")),
+])
+def test_clients_import_optional_machinery_lazily(statement):
+    modules = _loaded_modules(statement)
+    assert not modules & {"cqhyxk.singleflight", "cqhyxk.streaming", "orjson", "msgspec", "ijson"}
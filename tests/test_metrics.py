@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+from cqhyxk.exceptions import AuthenticationError, RequestError
+from cqhyxk.metrics import (
+    METRIC_ERRORS, METRIC_NETWORK, METRIC_REQUESTS, METRIC_RESPONSE_BYTES, InMemoryMetrics, MetricsSink
+)
+from cqhyxk.timeouts import Deadline
+
+ORG_LIST = "/open-api/org/list"
+TAG_LIST = "/open-api/tag/list"
+
+
+def test_requests_are_counted_per_endpoint(make_client):
+    client = make_client({"orgs": 5, "tags": 3})
+    for _ in range(3):
+        client.get_org_list()
+    client.get_tag_list()
+
+    metrics = client.metrics
+    assert metrics.counter(ORG_LIST, METRIC_REQUESTS) == 3
+    assert metrics.counter(TAG_LIST, METRIC_REQUESTS) == 1
+    assert metrics.counter(ORG_LIST, METRIC_RESPONSE_BYTES) > 0
+    snapshot = metrics.snapshot()
+    assert snapshot[ORG_LIST]["histograms"][METRIC_NETWORK]["count"] == 3
+
+    dumped = io.StringIO()
+    metrics.dump(dumped)
+    assert json.loads(dumped.getvalue())[TAG_LIST]["counters"][METRIC_REQUESTS] == 1
+    exposition = metrics.to_prometheus()
+    assert f'cqhyxk_requests_total{{endpoint="{ORG_LIST}"}} 3' in exposition
+    assert f'cqhyxk_network_seconds_count{{endpoint="{ORG_LIST}"}} 3' in exposition
+
+
+def test_errors_are_labelled(make_client):
+    client = make_client({"failure_rate": 1.0})
+    with pytest.raises(RequestError):
+        client.get_org_list()
+    assert client.metrics.counter(ORG_LIST, METRIC_ERRORS, "http_503") == 1
+
+    client = make_client()
+    client.session.headers.pop("app-key")
+    with pytest.raises(AuthenticationError):
+        client.get_org_list()
+    assert client.metrics.counter(ORG_LIST, METRIC_ERRORS, "http_401") == 1
+
+
+def test_percentiles_interpolate_within_buckets():
+    metrics = InMemoryMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.2, 0.4, 0.6, 0.8):
+        metrics.observe(ORG_LIST, METRIC_NETWORK, seconds)
+    assert metrics.percentile(ORG_LIST, METRIC_NETWORK, 0.1) == pytest.approx(0.075)
+    assert 0.2 <= metrics.percentile(ORG_LIST, METRIC_NETWORK, 0.6) <= 0.8
+    assert metrics.percentile(TAG_LIST, METRIC_NETWORK, 0.5) is None
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_discarding_sink(make_client):
+    client = make_client(metrics=MetricsSink())
+    assert client.get_org_list().data.content
+
+
+def test_endpoint_timeouts_override_the_default(make_client):
+    client = make_client({"latency": 0.3}, endpoint_timeouts={ORG_LIST: (1, 0.05)})
+    with pytest.raises(RequestError):
+        client.get_org_list()
+    assert client.get_tag_list().data.content
+
+
+def test_deadline_caps_each_request():
+    clock = [0.0]
+    deadline = Deadline(2, clock=lambda: clock[0])
+    assert deadline.cap((5, 30)) == (2, 2)
+    assert deadline.cap(None) == (2, 2)
+    clock[0] = 1.5
+    assert deadline.cap((0.1, None)) == (0.1, 0.5)
+    assert Deadline.coerce(deadline) is deadline and Deadline.coerce(None) is None
+    clock[0] = 2
+    assert deadline.expired
+    with pytest.raises(RequestError):
+        deadline.check()
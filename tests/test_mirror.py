@@ -0,0 +1,25 @@
+from cqhyxk.mirror import LocalMirror
+from cqhyxk.models import OrgListResponse, TagListResponse
+
+
+def test_fill_mirrors_a_full_scan(make_client):
+    client = make_client({"identities": 120, "orgs": 20, "tags": 5})
+    with LocalMirror() as mirror:
+        mirror.fill(client, page_size=50)
+
+        assert len(mirror.list_orgs()) == 20
+        assert len(mirror.list_tags()) == 5
+        assert mirror.get_identity("u00000007").name == "姓名7"
+        assert len(mirror.get_member_tags(source_user_id="u00000007")) == 2
+
+
+def test_fill_accepts_lists_without_data(make_client, monkeypatch):
+    client = make_client({"identities": 3})
+    empty = {"code": "00000000", "message": "请求成功", "data": None}
+    monkeypatch.setattr(client, "get_org_list", lambda **kwargs: OrgListResponse(**empty))
+    monkeypatch.setattr(client, "get_tag_list", lambda **kwargs: TagListResponse(**empty))
+    with LocalMirror() as mirror:
+        mirror.fill(client)
+
+        assert mirror.list_orgs() == []
+        assert mirror.get_identity("u00000002") is not None
@@ -0,0 +1,52 @@
+import pytest
+
+from cqhyxk.models import OrgInfoDetail, OrgType
+from cqhyxk.org_tree import OrgTree
+
+
+def _org(index):
+    return f"org{index:05d}"
+
+
+@pytest.fixture
+def tree(make_client):
+    # Organization i reports to (i - 1) // 8; org00000 is the root.
+    return OrgTree.from_client(make_client({"orgs": 30}))
+
+
+def test_tree_follows_the_parent_ids(tree):
+    assert len(tree) == 30
+    assert [org.orgId for org in tree.roots] == [_org(0)]
+    assert [org.orgId for org in tree.children(_org(0))] == [_org(i) for i in range(1, 9)]
+    assert tree.parent(_org(20)).orgId == _org(2)
+    assert [org.orgId for org in tree.ancestors(_org(20))] == [_org(2), _org(0)]
+    assert tree.is_ancestor(_org(0), _org(27)) and not tree.is_ancestor(_org(1), _org(27))
+
+
+def test_lookups_accept_source_ids_and_models(tree):
+    org = tree.get_by_source_id("s00003")
+    assert org.orgId == _org(3)
+    assert tree.children("s00003") == tree.children(org) == tree.children(_org(3))
+    assert tree.subtree_ids(org) == {_org(i) for i in [3] + list(range(25, 30))}
+
+
+def test_descendants_are_breadth_first(tree):
+    ids = [org.orgId for org in tree.descendants(_org(0))]
+    assert ids == [_org(i) for i in range(1, 30)]
+    assert tree.subtree_ids("missing") == set()
+
+
+def test_filter(tree):
+    assert [org.orgId for org in tree.filter(org_type=OrgType.ROOT)] == [_org(0)]
+    odd = [org.orgId for org in tree.filter(org_type=[OrgType.FACULTY], root=_org(1))]
+    assert odd == [_org(1)] + [_org(i) for i in range(9, 17) if i % 2]
+    assert all(org.physical for org in tree.filter(physical=True))
+
+
+def test_parents_fall_back_to_the_source_parent_id():
+    orgs = [OrgInfoDetail(orgId="a", sourceOrgId="sa"),
+            OrgInfoDetail(orgId="b", sourceOrgId="sb", sourceParentOrgId="sa"),
+            OrgInfoDetail(orgId="c", parentOrgId="missing")]
+    tree = OrgTree(orgs)
+    assert tree.parent("b").orgId == "a"
+    assert sorted(org.orgId for org in tree.roots) == ["a", "c"]
@@ -0,0 +1,57 @@
+import pytest
+
+from cqhyxk.exceptions import RequestError
+from cqhyxk.models import IdentityPageRequest
+from cqhyxk.page_size import AdaptivePageSize, floor_power_of_two
+from cqhyxk.pagination import identity_key, iter_adaptive_page_items
+
+
+def test_sizes_are_bounded_powers_of_two():
+    assert [floor_power_of_two(value) for value in (0, 1, 3, 64, 100)] == [1, 1, 2, 64, 64]
+    adaptive = AdaptivePageSize(initial=100, min_size=16, max_size=300)
+    assert (adaptive.size, adaptive.min_size, adaptive.max_size) == (64, 16, 256)
+    with pytest.raises(ValueError):
+        AdaptivePageSize(min_size=64, max_size=32)
+
+
+def test_size_follows_latency_and_response_size():
+    adaptive = AdaptivePageSize(initial=64, target_latency=1.0, max_bytes=1000)
+    adaptive.on_page(64, 0.1, 100)
+    assert adaptive.size == 128
+    adaptive.on_page(64, 0.1, 100)  # an older size does not count
+    assert adaptive.size == 128
+    adaptive.on_page(128, 0.7, 100)
+    assert adaptive.size == 128
+    adaptive.on_page(128, 0.1, 2000)
+    assert adaptive.size == 64
+    adaptive.on_page(64, 1.5)
+    assert adaptive.size == 32
+
+
+def test_grown_sizes_wait_for_an_aligned_offset():
+    adaptive = AdaptivePageSize(initial=128)
+    assert [adaptive.next_size(offset) for offset in (0, 64, 96, 256)] == [128, 64, 32, 128]
+
+
+def test_failures_halve_the_size_down_to_the_minimum():
+    adaptive = AdaptivePageSize(initial=64, min_size=16)
+    assert adaptive.on_failure(64) and adaptive.size == 32
+    assert adaptive.on_failure(32) and adaptive.size == 16
+    assert not adaptive.on_failure(16)
+    assert adaptive.error_rate > 0
+
+
+def test_failed_pages_are_retried_smaller(make_client):
+    client = make_client({"identities": 200})
+    sizes = []
+
+    def fetch(request):
+        sizes.append(request.size)
+        if request.size > 32:
+            raise RequestError("Request failed: read timed out")
+        return client.get_identity_list(request)
+
+    adaptive = AdaptivePageSize(initial=128, min_size=16, target_latency=60)
+    items = iter_adaptive_page_items(fetch, IdentityPageRequest(current=0, size=128), adaptive, key=identity_key)
+    assert [item.sourceUserId for item in items] == [f"u{index:08d}" for index in range(200)]
+    assert sizes[:3] == [128, 64, 32]
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+import pytest
+from mock_server import BASE_TIME
+
+from cqhyxk.exceptions import DeadlineExceeded
+from cqhyxk.models import IdentityPageRequest
+from cqhyxk.page_size import AdaptivePageSize
+from cqhyxk.pagination import format_update_time, iter_page_items, iter_window_items, identity_key
+
+
+def _ids(count):
+    return [f"u{index:08d}" for index in range(count)]
+
+
+def _window_request(seconds, size):
+    return IdentityPageRequest(size=size, updateTimeStart=format_update_time(BASE_TIME),
+                               updateTimeEnd=format_update_time(BASE_TIME + timedelta(seconds=seconds)))
+
+
+def test_iter_identities_walks_every_page(make_client):
+    client = make_client({"identities": 230})
+    ids = [identity.sourceUserId for identity in client.iter_identities(page_size=25)]
+    assert ids == _ids(230)
+    assert client.server.requests == 10
+
+
+def test_iter_drops_records_repeated_on_the_next_page():
+    pages = [["a", "b"], ["b", "c"], ["d"]]
+
+    def fetch(request):
+        content = [{"sourceUserId": key} for key in pages[request.current]]
+        return {"data": {"page": {"total": None}, "content": content}}
+
+    items = iter_page_items(fetch, IdentityPageRequest(current=0, size=2), key=identity_key)
+    assert [item["sourceUserId"] for item in items] == ["a", "b", "c", "d"]
+
+
+def test_iter_stops_at_the_deadline(make_client):
+    client = make_client({"identities": 100, "latency": 0.05})
+    with pytest.raises(DeadlineExceeded):
+        list(client.iter_identities(page_size=10, deadline=0.12))
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_fan_out_fetches_every_page_once(make_client, ordered):
+    client = make_client({"identities": 230, "jitter": 0.01})
+    pages = list(client.get_identity_pages(page_size=25, max_workers=4, ordered=ordered))
+
+    assert len(pages) == 10
+    assert client.server.requests == 10
+    if ordered:
+        assert [page.data.content[0].sourceUserId for page in pages] == _ids(230)[::25]
+    ids = [identity.sourceUserId for page in pages for identity in page.data.content]
+    assert sorted(ids) == _ids(230)
+
+
+def test_adaptive_page_size_learns_the_server_cap(make_client):
+    client = make_client({"identities": 1000, "max_page_size": 100})
+    adaptive = AdaptivePageSize(initial=64, max_size=1024, target_latency=60)
+    ids = [identity.sourceUserId for identity in client.iter_identities(adaptive=adaptive)]
+
+    assert ids == _ids(1000)
+    assert adaptive.max_size == 64
+
+
+def test_adaptive_page_size_rejects_streaming(make_client):
+    client = make_client()
+    with pytest.raises(ValueError):
+        client.iter_identities(adaptive=AdaptivePageSize(), stream=True)
+
+
+def test_scan_splits_deep_windows(make_client):
+    client = make_client({"identities": 400})
+    depths = []
+
+    def fetch(request):
+        depths.append((request.current + 1) * request.size)
+        return client.get_identity_list(request)
+
+    items = iter_window_items(fetch, _window_request(400, 10), max_workers=2, max_window_rows=50, key=identity_key)
+    assert sorted(item.sourceUserId for item in items) == _ids(400)
+    assert max(depths) <= 50
+
+
+def test_scan_rescans_windows_whose_total_changes(make_client):
+    client = make_client({"identities": 40})
+    first_pages = []
+    changed = []
+
+    def fetch(request):
+        response = client.get_identity_list(request, decode="raw")
+        if request.current == 0:
+            first_pages.append(request.updateTimeStart)
+        elif not changed:
+            # Another record arrived in this window after its first page.
+            changed.append(request.updateTimeStart)
+            response["data"]["page"]["total"] += 1
+        return response
+
+    items = iter_window_items(fetch, _window_request(40, 10), max_workers=1, key=identity_key)
+    assert sorted(item["sourceUserId"] for item in items) == _ids(40)
+    assert first_pages.count(changed[0]) == 2
+
+
+def test_scan_identities_covers_records_before_the_default_start(make_client):
+    client = make_client({"identities": 120})
+    ids = [identity.sourceUserId for identity in client.scan_identities(page_size=20, max_window_rows=40)]
+    assert sorted(ids) == _ids(120)
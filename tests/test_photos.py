@@ -0,0 +1,41 @@
+from cqhyxk.photos import (
+    STATUS_CACHED, STATUS_EXISTS, STATUS_NO_PHOTO, STATUS_WRITTEN, BulkPhotoDownloader, FacePhotoStore, load_manifest,
+)
+
+USERS = [f"u{index:08d}" for index in range(6)]
+
+
+def test_download_writes_photos_and_manifest(make_client, tmp_path):
+    client = make_client({"identities": 6, "photo_bytes": 256})
+    store = FacePhotoStore(str(tmp_path / "photos"))
+    manifest = str(tmp_path / "manifest.jsonl")
+
+    counts = BulkPhotoDownloader(client, store, max_workers=2).download(USERS + ["missing"], manifest_path=manifest)
+
+    assert counts == {STATUS_WRITTEN: 6, STATUS_NO_PHOTO: 1}
+    records = load_manifest(manifest)
+    assert all(open(record.path, "rb").read(3) == b"\xff\xd8\xff" for record in records[USERS[0]])
+
+
+def test_stored_photos_are_not_written_again(make_client, tmp_path):
+    client = make_client({"identities": 6, "photo_bytes": 256})
+    downloader = BulkPhotoDownloader(client, FacePhotoStore(str(tmp_path)))
+    downloader.download(USERS)
+
+    assert downloader.download(USERS) == {STATUS_EXISTS: 6}
+
+
+def test_known_users_are_skipped_unless_refreshed(make_client, tmp_path):
+    client = make_client({"identities": 6, "photo_bytes": 256})
+    downloader = BulkPhotoDownloader(client, FacePhotoStore(str(tmp_path / "photos")))
+    manifest = str(tmp_path / "manifest.jsonl")
+    downloader.download(USERS, manifest_path=manifest)
+    known = load_manifest(manifest)
+    requests = client.server.requests
+
+    assert downloader.download(USERS, known=known) == {STATUS_CACHED: 6}
+    assert client.server.requests == requests
+
+    counts = downloader.download(USERS, known=known, refresh=USERS[:2])
+    assert counts == {STATUS_CACHED: 4, STATUS_EXISTS: 2}
+    assert client.server.requests == requests + 2
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from cqhyxk.models import CallbackRequest, DataChangeStatus, EventType
+from cqhyxk.receiver import CallbackReceiver
+
+
+async def _exchange(port: int, request: bytes, half_close: bool = False) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+    if half_close:
+        writer.write_eof()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+
+def _run_receiver(scenario):
+    """Run ``scenario(receiver)`` against a started receiver, failing on unhandled loop errors"""
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        async with CallbackReceiver(host="127.0.0.1", port=0) as receiver:
+            result = await scenario(receiver)
+        await asyncio.sleep(0)
+        return result
+
+    result = asyncio.run(main())
+    assert errors == []
+    return result
+
+
+def _callback(data_status: int = 1, data_ids=("u1",)) -> bytes:
+    return json.dumps({"eventType": 1, "dataStatus": data_status, "dataIds": list(data_ids)}).encode()
+
+
+def _post(body: bytes, headers: str) -> bytes:
+    return f"POST /callback HTTP/1.1\r\nHost: test\r\nConnection: close\r\n{headers}\r\n".encode() + body
+
+
+def test_accepts_callbacks():
+    body = _callback()
+
+    async def scenario(receiver):
+        response = await _exchange(receiver.port, _post(body, f"Content-Length: {len(body)}\r\n"))
+        return response, receiver.queue.get_nowait()
+
+    response, event = _run_receiver(scenario)
+    assert response.startswith(b"HTTP/1.1 200")
+    assert event.data_ids == ["u1"]
+
+
+def test_accepts_chunked_callbacks():
+    body = _callback()
+    chunked = f"{len(body):x}\r\n".encode() + body + b"\r\n0\r\n\r\n"
+
+    async def scenario(receiver):
+        return await _exchange(receiver.port, _post(chunked, "Transfer-Encoding: chunked\r\n"))
+
+    assert _run_receiver(scenario).startswith(b"HTTP/1.1 200")
+
+
+def test_rejects_malformed_framing():
+    requests = [
+        _post(b"", "Content-Length: -5\r\n"),
+        _post(b"", "Content-Length: abc\r\n"),
+        _post(b"-5\r\nabc\r\n0\r\n\r\n", "Transfer-Encoding: chunked\r\n"),
+        _post(b"zz\r\n", "Transfer-Encoding: chunked\r\n"),
+        _post(b"a\r\nabc", "Transfer-Encoding: chunked\r\n"),
+    ]
+
+    async def scenario(receiver):
+        responses = [await _exchange(receiver.port, request, half_close=True) for request in requests]
+        return responses, receiver.received
+
+    responses, received = _run_receiver(scenario)
+    for response in responses:
+        assert response.startswith(b"HTTP/1.1 400"), response
+    assert received == 0
+
+
+def test_rejects_invalid_and_oversized_bodies():
+    async def scenario(receiver):
+        receiver.max_body = 10
+        invalid = await _exchange(receiver.port, _post(b"{}", "Content-Length: 2\r\n"))
+        oversized = await _exchange(receiver.port, _post(b"", "Content-Length: 11\r\n"))
+        return invalid, oversized
+
+    invalid, oversized = _run_receiver(scenario)
+    assert invalid.startswith(b"HTTP/1.1 400")
+    assert oversized.startswith(b"HTTP/1.1 413")
+
+
+def test_batches_keep_the_latest_status_of_each_id():
+    async def scenario(receiver):
+        for data_status, data_ids in [(1, ["a", "b"]), (3, ["a"]), (1, ["c"]), (2, ["b"])]:
+            receiver.queue.put_nowait(CallbackRequest(eventType=1, dataStatus=data_status, dataIds=data_ids))
+        batches = receiver.batches(max_wait=0.05)
+        batch = await batches.__anext__()
+        await batches.aclose()
+        return batch
+
+    batch = _run_receiver(scenario)
+    merged = {(event.event_type, event.data_status): event.data_ids for event in batch}
+    assert merged == {
+        (EventType.PERSONNEL, DataChangeStatus.DELETED): ["a"],
+        (EventType.PERSONNEL, DataChangeStatus.ADDED): ["c"],
+        (EventType.PERSONNEL, DataChangeStatus.UPDATED): ["b"],
+    }
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from cqhyxk.exceptions import DeadlineExceeded, RequestError
+from cqhyxk.metrics import METRIC_RETRIES
+from cqhyxk.retry import AdaptiveRateLimiter, RetryPolicy, parse_retry_after
+from cqhyxk.timeouts import Deadline
+
+ORG_LIST = "/open-api/org/list"
+
+
+def test_transient_errors_are_retried(make_client):
+    client = make_client({"failure_rate": 0.3, "throttle_rate": 0.2, "seed": 1},
+                         retry=RetryPolicy(max_attempts=20, backoff=0.001, max_backoff=0.002))
+    for _ in range(10):
+        assert client.get_org_list().data.content
+    assert client.metrics.counter(ORG_LIST, METRIC_RETRIES) > 0
+
+
+def test_transient_errors_fail_without_a_retry_policy(make_client):
+    client = make_client({"failure_rate": 1.0})
+    with pytest.raises(RequestError):
+        client.get_org_list()
+    assert client.server.requests == 1
+
+
+def test_limiter_refuses_waits_past_max_wait():
+    limiter = AdaptiveRateLimiter(rate=1, min_rate=1)
+    assert limiter.acquire()
+    started = time.monotonic()
+    assert not limiter.acquire(max_wait=0.1)
+    assert time.monotonic() - started < 0.1
+    assert 0.9 < limiter.reserve() <= 1.0
+
+
+def test_limiter_wait_is_capped_by_the_deadline(make_client):
+    client = make_client(rate_limiter=AdaptiveRateLimiter(rate=1, min_rate=1))
+    client.get_org_list()
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        client.get_org_list(deadline=Deadline(0.2))
+    assert time.monotonic() - started < 0.2
+
+
+def test_limiter_adapts_its_rate():
+    limiter = AdaptiveRateLimiter(rate=10, min_rate=1, cooldown=0)
+    limiter.on_throttle()
+    assert limiter.rate == 5
+    limiter.on_success()
+    assert limiter.rate > 5
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
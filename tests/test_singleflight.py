@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cqhyxk.metrics import METRIC_COALESCED
+from cqhyxk.singleflight import AsyncSingleFlight, SingleFlight
+from cqhyxk.timeouts import Deadline
+
+ORG_LIST = "/open-api/org/list"
+
+
+def test_concurrent_identical_calls_share_one_request(make_client):
+    client = make_client({"latency": 0.2}, coalesce=True)
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: client.get_org_list(), range(8)))
+
+    assert client.server.requests == 1
+    assert all(response == responses[0] for response in responses)
+    assert len({id(response) for response in responses}) == 8
+    assert client.metrics.counter(ORG_LIST, METRIC_COALESCED) == 7
+
+
+def test_calls_with_different_deadlines_are_not_shared(make_client):
+    client = make_client({"latency": 0.2}, coalesce=True)
+    shared = Deadline(10)
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: client.get_org_list(deadline=shared), range(2)))
+        list(pool.map(lambda _: client.get_org_list(deadline=Deadline(10)), range(2)))
+
+    assert client.server.requests == 3
+
+
+def test_errors_are_shared():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.in_flight() == 0
+
+
+def test_async_calls_share_one_task():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        flight = AsyncSingleFlight()
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5))), flight.in_flight()
+
+    results, in_flight = asyncio.run(main())
+    assert calls == [1]
+    assert [result for result, _ in results] == ["result"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert in_flight == 0
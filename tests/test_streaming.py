@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from cqhyxk.exceptions import APIError, RequestError
+from cqhyxk.models import FacePhoto, IdentityInfo, IdentityPageRequest
+from cqhyxk.streaming import ChunkReader, StreamingPage
+
+pytest.importorskip("ijson")
+
+
+def _chunks(payload, size=7):
+    data = json.dumps(payload).encode("utf-8")
+    return ChunkReader(data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_streamed_scan_matches_the_buffered_scan(make_client):
+    client = make_client({"identities": 130})
+    streamed = list(client.iter_identities(page_size=40, stream=True))
+    buffered = list(client.iter_identities(page_size=40))
+    assert streamed == buffered
+    assert len(streamed) == 130
+
+
+def test_stream_page_reports_its_counts(make_client):
+    client = make_client({"identities": 130})
+    page = client.stream_identity_list(IdentityPageRequest(current=3, size=40), decode="raw")
+    ids = [item["sourceUserId"] for item in page]
+
+    assert ids == [f"u{index:08d}" for index in range(120, 130)]
+    assert (page.code, page.total, page.size, page.count) == ("00000000", 130, 40, 10)
+    with pytest.raises(RuntimeError):
+        list(page)
+
+
+def test_stream_face_photos(make_client):
+    client = make_client({"identities": 3, "photos_per_identity": 2, "photo_bytes": 1024})
+    photos = list(client.stream_face_photos("u00000001"))
+    assert [photo.faceId for photo in photos] == ["face-1-0", "face-1-1"]
+    assert all(isinstance(photo, FacePhoto) for photo in photos)
+
+
+def test_error_code_raises_before_the_records():
+    closed = []
+    payload = {"code": "A0001", "message": "无权限", "data": {"content": [{"sourceUserId": "u1"}]}}
+    page = StreamingPage(_chunks(payload), IdentityInfo, close=lambda: closed.append(True))
+    with pytest.raises(APIError):
+        list(page)
+    assert closed == [True]
+
+
+def test_truncated_stream_raises_request_error():
+    data = json.dumps({"code": "00000000", "data": {"content": [{"sourceUserId": "u1"}]}}).encode("utf-8")
+    page = StreamingPage(ChunkReader([data[:-5]]), IdentityInfo)
+    with pytest.raises(RequestError):
+        list(page)
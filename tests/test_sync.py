@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from cqhyxk.sync import RESOURCE_IDENTITIES, RESOURCE_ORGS, CheckpointStore, SyncEngine
+
+
+def _ids(count):
+    return [f"u{index:08d}" for index in range(count)]
+
+
+def test_first_run_is_full_and_later_runs_are_incremental(make_client, tmp_path):
+    client = make_client({"identities": 95})
+    path = str(tmp_path / "sync-state.json")
+    seen = []
+
+    first = SyncEngine(client, CheckpointStore(path), page_size=20).sync_identities(lambda item: seen.append(item.sourceUserId))
+    assert (first.start, first.count, first.resumed) == (None, 95, False)
+    assert seen == _ids(95)
+
+    # A new process picks the watermark up from the file.
+    engine = SyncEngine(client, CheckpointStore(path), page_size=20)
+    assert engine.watermark(RESOURCE_IDENTITIES).strftime("%Y-%m-%d %H:%M:%S") == first.end
+    second = engine.sync_identities(seen.append)
+    assert second.start is not None and second.count == 0
+
+    engine.reset(RESOURCE_IDENTITIES)
+    assert engine.watermark(RESOURCE_IDENTITIES) is None
+    assert json.loads((tmp_path / "sync-state.json").read_text(encoding="utf-8")) == {}
+
+
+def test_interrupted_run_resumes_at_the_failed_page(make_client, tmp_path):
+    client = make_client({"identities": 95})
+    path = str(tmp_path / "sync-state.json")
+    seen = []
+
+    def crash_on_u45(item):
+        if item.sourceUserId == "u00000045":
+            raise RuntimeError("crash")
+        seen.append(item.sourceUserId)
+
+    with pytest.raises(RuntimeError):
+        SyncEngine(client, CheckpointStore(path), page_size=20).sync_identities(crash_on_u45)
+    assert seen == _ids(45)
+    requests = client.server.requests
+
+    resumed = SyncEngine(client, CheckpointStore(path), page_size=20).sync_identities(lambda item: seen.append(item.sourceUserId))
+    assert resumed.resumed and resumed.start is None
+    # Pages 0 and 1 were stored as done; page 2 is delivered again from its start.
+    assert seen == _ids(45) + _ids(95)[40:]
+    assert client.server.requests - requests == 3
+
+
+def test_flush_runs_before_progress_is_saved(make_client, tmp_path):
+    client = make_client({"identities": 50})
+    store = CheckpointStore(str(tmp_path / "sync-state.json"))
+    saved = []
+
+    SyncEngine(client, store, page_size=20).sync_identities(lambda item: None,
+                                                            flush=lambda: saved.append(store.get(RESOURCE_IDENTITIES)["run"]["current"]))
+    assert saved == [0, 1, 2]
+
+
+def test_lists_are_filtered_by_the_watermark(make_client, tmp_path):
+    client = make_client({"orgs": 12})
+    engine = SyncEngine(client, CheckpointStore(str(tmp_path / "sync-state.json")))
+    orgs = []
+
+    assert engine.sync_orgs(orgs.append).count == 12
+    assert engine.sync_orgs(orgs.append).count == 0
+    assert len(orgs) == 12
+    assert engine.watermark(RESOURCE_ORGS) is not None
@@ -0,0 +1,69 @@
+import pytest
+
+from cqhyxk.events import EntityChange
+from cqhyxk.models import DataChangeStatus, EventType
+from cqhyxk.tag_index import TagIndex
+
+
+def _tag(index):
+    return f"tag{index:04d}"
+
+
+def _holders(count, *tags):
+    """Identities of the mock server holding all of ``tags``: identity i holds tags i % 5 and (i + 1) % 5"""
+    return {f"u{i:08d}" for i in range(count) if all(tag in (i % 5, (i + 1) % 5) for tag in tags)}
+
+
+@pytest.fixture
+def index(make_client):
+    return TagIndex.from_client(make_client({"identities": 50, "tags": 5}), page_size=30)
+
+
+def test_index_matches_the_memberships(index):
+    assert len(index) == 50
+    assert sorted(index.tag_ids()) == [_tag(t) for t in range(5)]
+    assert index.count(_tag(2)) == 20
+    assert index.tags_of("u00000007") == {_tag(2), _tag(3)}
+    assert index.tag(_tag(1)).to_set() == _holders(50, 1)
+
+
+def test_queries_combine_bitmaps(index):
+    assert (index.tag(_tag(1)) & index.tag(_tag(2))).to_set() == _holders(50, 1, 2)
+    assert index.query(all_of=[_tag(1)], none_of=[_tag(2)]).to_set() == _holders(50, 1) - _holders(50, 2)
+    assert index.query(any_of=[_tag(0), _tag(1)]).to_set() == _holders(50, 0) | _holders(50, 1)
+    assert (~index.tag(_tag(0))).to_set() == {f"u{i:08d}" for i in range(50)} - _holders(50, 0)
+    assert not index.query(all_of=["missing"])
+    assert len(index.query()) == 50
+
+
+def test_removals_survive_compaction(index):
+    index.remove("u00000007", _tag(2))
+    index.delete_members(["u00000011"])
+    index.delete_tags([_tag(4)])
+    before = {tag_id: index.tag(tag_id).to_set() for tag_id in index.tag_ids()}
+    index.compact()
+
+    assert {tag_id: index.tag(tag_id).to_set() for tag_id in index.tag_ids()} == before
+    assert _tag(4) not in index.tag_ids()
+    assert "u00000011" not in index
+    assert index.tags_of("u00000007") == {_tag(3)}
+
+
+def test_apply_replaces_tag_members_and_removes_deletes(index):
+    members = [{"sourceUserId": "u00000001", "tagId": _tag(0)}, {"sourceUserId": "u00000099", "tagId": _tag(0)}]
+    index.apply([
+        EntityChange(EventType.TAG_MEMBER, DataChangeStatus.UPDATED, _tag(0), data=members),
+        EntityChange(EventType.PERSONNEL, DataChangeStatus.DELETED, "u00000002"),
+        EntityChange(EventType.TAG_MEMBER, DataChangeStatus.UPDATED, _tag(1), error="failed"),
+    ])
+
+    assert index.tag(_tag(0)).to_set() == {"u00000001", "u00000099"}
+    assert "u00000002" not in index
+    assert index.count(_tag(2)) == 19
+    assert index.count(_tag(1)) == 20
+
+
+def test_refresh_tag_refetches_its_members(index, make_client):
+    index.delete_tags([_tag(3)])
+    assert index.refresh_tag(make_client({"identities": 50, "tags": 5}), _tag(3)) == 20
+    assert index.tag(_tag(3)).to_set() == _holders(50, 3)